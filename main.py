@@ -28,6 +28,9 @@ from project.robot_db.python.typeDB_main.builder import BuildModel
 from project.robot_db.python.typeDB_main.inquirer import QueryModel
 from project.robot_db.python.typeDB_main.color_text import Color, Box
 from project.robot_db.python.typeDB_main.rules import RuleBuilder
+from project.robot_db.python.typeDB_main.batch import BatchRunner
+from project.robot_db.python.typeDB_main.telemetry import query_sites
+from project.robot_db.python.typeDB_main.instrument import query_stats
 import time
 
 color = Color()
@@ -75,9 +78,17 @@ if __name__ == '__main__':
 # ╭──────────────────────────────────────────────────────────────────────────╮
     # model.datahandling.load_data("robot_db", 'entity', commitment=True)
     # model.datahandling.load_data("robot_db", 'relation', commitment=True)
+    # BULK-LOAD MODE (rows per transaction and write transactions in flight)
+    # model.datahandling.load_data("robot_db", 'entity', commitment=True, batch_size=500, workers=4)
+    # PARALLEL INGESTION (entity and relation files scheduled by dependency)
+    # model.datahandling.load_all("robot_db", commitment=True, workers=4)
+    # INCREMENTAL UPDATE (only the rows changed in the data files)
+    # model.datahandling.update_data("robot_db", 'entity', commitment=True)
 # ╰──────────────────────────────────────────────────────────────────────────╯
 # ╭──────────────────────────────────────────────╮
     # model.datahandling.unload_data("robot_db")
+    # CHUNKED UNLOAD (things deleted per committed write transaction)
+    # model.datahandling.unload_data("robot_db", batch_size=1000)
     # model.schema.delete_schema("robot_db")
 # ╰──────────────────────────────────────────────╯
 
@@ -114,6 +125,25 @@ if __name__ == '__main__':
     query.command_line('plug connector CONN-ELECT-PUSH-MB-HD-01 AT interface INTF-RCELE-SLID-FX-00-21')
     
     """
+    # CONCURRENT MODE (independent questions of a phrase on parallel read transactions)
+    # query.command_line('open valve MECH-VALVE-TURN-UN-IN-11', concurrent=True)
+    # NEAREST TOOLS (actual location from the navigation system: latitude, longitude[, water-depth])
+    # query.command_line('clean surface OF rov-panel SUBS-ROVPN-UNDF-FX-HD-01', position=(-22.5, -40.3, 1250.0))
+    # BATCH MODE (list or file of phrases, latency percentiles and throughput)
+    # BatchRunner(query, workers=1).run(['open valve MECH-VALVE-TURN-UN-IN-11',
+    #                                    'plug connector CONN-ELECT-PUSH-MB-HD-01 AT interface INTF-RCELE-SLID-FX-00-21'])
+    # REASONING COST (time per query site; the audit reruns each query site with the inference switched)
+    # query_sites.start_audit(query.connection, "robot_db")
+    # query.command_line('open valve MECH-VALVE-TURN-UN-IN-11')
+    # query_sites.report()
+    # QUERY STATISTICS (per call site and query template; also at exit with MOSASAUR_QUERY_STATS=<path>)
+    # query_stats.dump('query_stats.json')
+    # PHASE TRACING (Chrome trace format, flame chart in ui.perfetto.dev or chrome://tracing)
+    #   MOSASAUR_TRACE=trace.json python main.py
+    #   MOSASAUR_PROFILE='Q2 element inquiry' MOSASAUR_PROFILE_OUT=q2.prof python main.py   (cProfile of one phase)
+    # OFFLINE BENCHMARK (in-process TypeDB stand-in, no server; results saved to compare versions)
+    #   python -m project.robot_db.python.typeDB_main.benchmark --save bench.json --compare bench_old.json
+
     end_time = time.time()
     execution_time_ms = (end_time - start_time) * 1000
 
@@ -0,0 +1,109 @@
+"""
+                    Project MOSASAUR - async_inquirer.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Asynchronous inquirer file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typedb.client import TransactionType
+from project.robot_db.python.typeDB_main.inquirer import QueryModel
+from project.robot_db.python.typeDB_main.auxiliary import *
+from project.robot_db.python.typeDB_main.telemetry import query_sites
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+
+
+class AsyncQueryModel:
+    """
+    Asyncio facade of QueryModel, for callers running in an event loop (e.g. the mission planner).
+    The TypeDB client is blocking, so every call runs on a worker thread, each with its own READ
+    transaction taken from the pool of the connection manager - independent questions can then be
+    awaited together:
+        async_query = AsyncQueryModel()
+        tools, location = await asyncio.gather(async_query.goal_list('clean', 'function'),
+                                               async_query.find_location(['valve', 'MECH-VALVE-TURN-UN-IN-11']))
+    """
+    def __init__(self, db_name='robot_db', workers=4, query_model=None):
+        self.db_name = db_name
+        self.query_model = QueryModel() if query_model is None else query_model
+        self.connection = self.query_model.connection
+        self.session_type = self.query_model.session_type
+        self.options = self.query_model.options
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='async-query')
+
+    def read(self, function, *args):
+        """
+        Runs function(transaction, *args) on a pooled READ transaction (worker thread side), with the
+        reasoning options of the function if it is a query site (see query_site).
+        """
+        with self.connection.transaction(self.db_name, self.session_type, TransactionType.READ,
+                                         query_sites.options(function, self.options)) as tx:
+            return function(tx, *args)
+
+    async def run(self, function, *args):
+        """
+        :param function: blocking function of a transaction, function(tx, *args)
+        :return: result of the function, awaited on the worker pool
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.read, function, *args)
+
+    async def find_type(self, element):
+        return await self.run(find_type, element)
+
+    async def element_type(self, element):
+        return await self.run(element_type, element)
+
+    async def goal_list(self, a_value, a_name, e_type=None):
+        return await self.run(goal_list, a_value, a_name, e_type)
+
+    async def get_relations(self, elem, elem_type, tag, pair2=None, prep1=None):
+        return await self.run(get_relations, elem, elem_type, tag, pair2, prep1)
+
+    async def find_location(self, loc_pair):
+        return await self.run(find_location, loc_pair)
+
+    async def command_line(self, phrase=None, test_title=None, position=None):
+        """
+        Awaitable QueryModel.command_line (the whole situation awareness procedure of a phrase).
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(self.query_model.command_line, phrase, test_title,
+                                                                 position=position))
+
+    async def situation_report(self, phrase, concurrent=False, position=None):
+        """
+        Awaitable QueryModel.situation_report (headless mode - never prompts).
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(self.query_model.situation_report, phrase,
+                                                                 concurrent, position))
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
@@ -25,9 +25,15 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from project.robot_db.python.typeDB_main.color_text import Color, Box
+from project.robot_db.python.typeDB_main.cache import type_cache, value_index, relation_cache
+from project.robot_db.python.typeDB_main.location import location_service
+from project.robot_db.python.typeDB_main.telemetry import query_site
+from project.robot_db.python.typeDB_main.instrument import query_stats
+from collections import namedtuple
 import csv
 import datetime
 import pprint
+import sys
 
 color = Color()
 box = Box()
@@ -41,6 +47,23 @@ class LocationError(Exception):
     pass
 
 
+class PhraseError(Exception):
+    """
+    Invalid input phrase in headless mode (raised instead of asking for a new phrase).
+    """
+    pass
+
+
+class MissingIdError(PhraseError):
+    pass
+
+
+class TagNumberError(PhraseError):
+    def __init__(self, message, tags=None):
+        super().__init__(message)
+        self.tags = tags or []                                  # tag-numbers available for the element
+
+
 def find_paths(self, d, leaf_key, current_path=None):
     if current_path is None:
         current_path = []
@@ -80,8 +103,28 @@ def csv_to_dict_list(i):
     return dict_list
 
 
+def csv_header(i):
+    with open(i['data_path'] + ".csv") as csv_file:
+        return next(csv.reader(csv_file, skipinitialspace=True), [])
+
+
+def csv_rows(i):
+    """
+    Streams the rows of a data file (header skipped) as lists of values,
+    so the loader memory does not grow with the size of the file.
+    :param i: file dictionary {"data_path": path without extension}
+    :return: yields each row of the file
+    """
+    with open(i['data_path'] + ".csv") as csv_file:
+        csv_reader = csv.reader(csv_file, skipinitialspace=True)
+        next(csv_reader, None)
+        for row in csv_reader:
+            if row:
+                yield row
+
+
 def match_query(tx, q):
-    return tx.query().match(q)
+    return query_stats.match(tx, q, 2)
 
 
 def taxonomy_relation(c_name, a_name, target_element, target_id, relation_name, transaction):
@@ -153,8 +196,25 @@ def determine_data_type(value):
     return 'string'
 
 
-def query_builder(q, n, v, c_type=None, k=None):
+def query_builder(q, n, v, c_type=None, k=None, convert=None):
+    """
+    Appends an attribute to an insert/match query.
+    :param q: query under construction
+    :param n: attribute name (entity) or variable number
+    :param v: attribute value (text from the data file)
+    :param c_type: 'entity' for 'has n v', otherwise '$vn v;'
+    :param k: suffix of the attribute name / variable
+    :param convert: converter of the column (see loader.ColumnPlan) - guesses the type when None
+    :return: query
+    """
     k = '' if k is None else k
+    if convert is not None:
+        literal = convert(v)
+        if c_type == 'entity':
+            q += f' has {n}{k} {literal}'
+        else:
+            q += f' $v{n}{k} {literal};'
+        return q
     data_type = determine_data_type(v)
     if c_type == 'entity':
         if data_type == 'string':
@@ -169,14 +229,19 @@ def query_builder(q, n, v, c_type=None, k=None):
     return q
 
 
-def element_type(transaction, element):
+@query_site()
+def element_type(transaction, element, interactive=True):
 
     # element_id = element[1] if isinstance(element, list) else None
     element = element[0] if isinstance(element, list) else element
-    concept_type = find_type(transaction, element).split(':')[0]
-    label = find_type(transaction, element).split(':')[1]
+    e_type = find_type(transaction, element, interactive)
+    concept_type = e_type.split(':')[0]
+    label = e_type.split(':')[1]
 
     if concept_type == 'attribute':
+        owners = value_index.owners(transaction, label, element)
+        if owners is not None:                                  # key attribute - answered by the value index
+            return (label, owners[0]) if owners else (label, concept_type)
         query = f'match $y isa entity, has {label} "{element}"; get $y;'
         element_list = list(match_query(transaction, query))
 
@@ -189,22 +254,55 @@ def element_type(transaction, element):
         return label, concept_type
 
 
+@query_site(infer=False)
 def goal_list(tx, a_value, a_name, e_type=None):
     if e_type == 'attribute':
         query = f'match $x "{a_value}"; get $x;'
-        q = list(tx.query().match(query))
+        q = list(match_query(tx, query))
         q_list = []
         for i in q:
             q_list.append(i.map().get('x').as_attribute().get_type().get_label().name())
     else:
         query = f'match $x isa thing, has {a_name} "{a_value}"; get $x;'
-        q = list(tx.query().match(query))
+        q = list(match_query(tx, query))
         q_list = []
         for i in q:
             q_list.append(i.map().get('x').as_entity().get_type().get_label().name())
     return q_list
 
 
+@query_site(infer=True)
+def tool_list(tx, command):
+    """
+    :return: element types of the tools having the command as function
+    """
+    query_tool = f'match $x isa tool, has function "{str(command)}", has element-type $y; get $y;'
+    return [e.map().get('y').as_attribute().get_value() for e in list(match_query(tx, query_tool))]
+
+
+@query_site(infer=True)
+def goal_location(tx, command):
+    """
+    :return: goal-location of the goal of the command ('' if the command has none)
+    """
+    prep_q = f'match $x isa goal, has command-type "{command}", has goal-location $gl; get $gl;'
+    prep_iter = list(match_query(tx, prep_q))
+    return prep_iter[0].map().get('gl').as_attribute().get_value() if prep_iter != [] else ''
+
+
+@query_site()
+def super_type(tx, e_type, element):
+    """
+    :param e_type: element type of the element (see element_type)
+    :return: label of the supertype of an entity element, None for an attribute element
+    """
+    if e_type[1] != 'entity':
+        return None
+    query_entity = f'match $e type {element}; get $e;'
+    iterator = next(match_query(tx, query_entity)).map()
+    return iterator.get('e').as_remote(tx).get_supertype().get_label()
+
+
 def pair_element_id(e, eid, d_phrase):
     try:
         element = d_phrase[e]
@@ -227,7 +325,7 @@ def pair_element_id(e, eid, d_phrase):
         return None
 
 
-def phrase2dict(transaction, phrase):
+def phrase2dict(transaction, phrase, interactive=True):
 
     # phrase_list = [(n, w) for n, w in enumerate(phrase.split())]
     phrase_list = [w for w in phrase.split()]
@@ -251,7 +349,7 @@ def phrase2dict(transaction, phrase):
         v1 = c['element']                                       # counts number of elements
         v2 = c['pair']                                          # counts number of pairs
 
-        id_type = find_type(transaction, tn)
+        id_type = find_type(transaction, tn, interactive)
 
         # print(color.neon([id_type, tn.lower()]))              # TO BE IMPLEMENT LATER (TAG OR ELEMENT-TYPE)
 
@@ -275,18 +373,22 @@ def phrase2dict(transaction, phrase):
                     q_tag = f'match $x isa {e1}, ' \
                             f'has tag-number $t; get $t;'
 
-                q = list(transaction.query().match(query))
+                q = list(match_query(transaction, query))
                 if not q:                                       # if the tag-number is not found in database
                     if ex == 'exception':                       # here ask for the element correct ID
                         # print(color.yellow(tn))
                         raise IndexError                        # raise IndexError
 
+                    elif not interactive:                       # headless - no prompt for the correct tag-number
+                        it_tag = match_query(transaction, q_tag)
+                        answer_list = [t.map().get('t').as_attribute().get_value() for t in it_tag]
+                        raise TagNumberError(f'tag number {tn} of {e1} is incorrect', answer_list)
                     else:                                       # when the tag-number is wrong but exists in database
                         print(box.red(f'ATTENTION ! > TAG NUMBER ({tn}) IS INCORRECT !', 'function check_for_tag'))
                         # q_tag = f'match $x isa {e1}, has tag-number $t; get $t;'
                         # print(color.green(q_tag))
                         print(color.e6('\u0009' * 2 + '\u25B6 LIST OF AVAILABLE TAG-NUMBERS:'))
-                        it_tag = transaction.query().match(q_tag)
+                        it_tag = match_query(transaction, q_tag)
                         answer_list = []
                         for t in it_tag:
                             answer_list.append(t.map().get('t').as_attribute().get_value())
@@ -310,17 +412,20 @@ def phrase2dict(transaction, phrase):
             prep_list = ['to', 'at', 'linked-to', 'of']
             # if the tag-number is not found in database
             if tn in prep_list:
-                print(box.neon('OK, ---------------> remove latter in check_for_tag', f'PREP - {tn.upper()}'))
+                print(box.neon('OK, ---------------> remove latter in check_for_tag', f'PREP - {tn.upper()}')) \
+                    if interactive else None
                 index += c['element']
                 p_dict[f'prep-{index}'] = tn.upper()
                 c.update({'element': v1 + 1})
 
+            if not interactive:
+                raise PhraseError(f'{tag} is neither a tag-number nor a preposition')
             print(box.e8('ATTENTION \u26A0\u0009 TRANSACTION CLOSED', '(RESETING) valid_input_phrase'))
             return phrase2dict(transaction, p)
 
     for i, e in enumerate(phrase_list):
 
-        e_type = find_type(transaction, e)                      # finds the type of the element
+        e_type = find_type(transaction, e, interactive)         # finds the type of the element
 
         if e_type is None:
             p_dict = {}
@@ -340,6 +445,8 @@ def phrase2dict(transaction, phrase):
                     tag_number = phrase_list[i + 1]
                     check_for_tag(phrase, tag_number, e, counter)
                 except IndexError:                              # If there is no id next, raise a IndexError
+                    if not interactive:
+                        raise MissingIdError(f'element {e} has no id (tag-number)') from None
                     print(box.e2(f'ATTENTION ! > ELEMENT ({e}) ID NOT FOUND', 'function phrase2dict'))
                     # THIS FIRST CONDITION SEEMS NOT BEING USED...
                     if i + 1 < len(phrase_list):
@@ -356,19 +463,37 @@ def phrase2dict(transaction, phrase):
 
 
 # VERY IMPORTANT FUNCTION
-def find_type(tx, element):
-
+@query_site()
+def find_type(tx, element, interactive=True):
+    """
+    :param tx: open transaction
+    :param element: word of the phrase
+    :param interactive: prints the error of an unknown word and returns None (raises PhraseError otherwise)
+    :return: 'kind:label' of the word
+    """
     prep_position_list = ['TO', 'FROM', 'AT', 'IN', 'ON', 'OF', 'INTO']
     # prep_part_list = ['OF', 'LINKED-TO']
     prep_part_list = ['OF']
 
     # element = element.lower()     # to be implemented later... not only tag-number
     try:
-        test_type = tx.concepts().get_thing_type(element)
+        if type_cache.ensure(tx):                               # labels and roles resolved from the schema cache
+            kind = type_cache.kind(element)
+            if kind is not None:
+                return f'{kind}:{element}'
+            test_type = None
+        else:
+            test_type = tx.concepts().get_thing_type(element)
         if test_type is None:
             if element.upper() in prep_position_list or element in prep_part_list:
                 return f'{element}:role:teste'
             else:
+                attribute = value_index.attribute_of(tx, str(element))    # key attribute values (tag-number...)
+                if attribute is not None:
+                    return f'attribute:{attribute}'
+                relation = type_cache.relation_of(element.lower())
+                if relation is not None:
+                    return f'{element.lower()}:role:{relation}'
                 try:
                     a_query = f'match $x "{str(element)}"; get $x;'
                     iterator = next(match_query(tx, a_query))
@@ -387,12 +512,78 @@ def find_type(tx, element):
             return f'relation:{test_type.get_label()}'
 
     except Exception as e:
-        print(box.e1('\u26A0\u0009 > (ATTENTION WRONG INPUT)', f'{str(e).split("Read:")[1]}'))
+        message = str(e).split("Read:")[-1].strip()            # server errors: '[CODE] ... Read: message'
+        if not interactive:                                     # headless - the query error closed the transaction
+            raise PhraseError(f'unknown word {element}: {message}') from None
+        print(box.e1('\u26A0\u0009 > (ATTENTION WRONG INPUT)', f'{message}'))
         return None
 
 
-def get_relations(tx, elem, elem_type, tag, pair2=None, prep1=None):
+class RelationEntry(namedtuple('RelationEntry', ['element', 'attribute', 'value', 'role'])):
+    """
+    Neighbor of an element in a relation: element type, tag-number | element-type, its value, role played.
+    Formatted only when it is shown (str).
+    """
+    __slots__ = ()
+
+    @property
+    def key(self):
+        return self.element, self.value
+
+    def __str__(self):
+        return f'{self.element} {self.value} \u25B6 {self.role}'
+
 
+class RelationSet:
+    """
+    Neighbors of one relation type, in the order they are found (ordered set of RelationEntry).
+    The first neighbor is kept whatever its attribute; after it only the tag-number neighbors are added,
+    and the first of them replaces an element-type neighbor.
+    """
+    __slots__ = ('entries', 'started')
+
+    def __init__(self):
+        self.entries = {}                                       # RelationEntry -> None
+        self.started = False
+
+    def add(self, entry):
+        if not self.started:
+            self.entries[entry] = None
+            self.started = True
+        elif entry not in self.entries:
+            first = next(iter(self.entries), None)              # only the first entry may be an element-type
+            if first is not None and 'element-type' in first.attribute:
+                del self.entries[first]
+            if entry.attribute == 'tag-number':
+                self.entries[entry] = None
+
+
+@query_site(infer=True, audit=False)
+def get_relations(tx, elem, elem_type, tag, pair2=None, prep1=None, interactive=True):
+    """
+    Relations of an element (see query_relations), answered from the relation cache when the same
+    arguments were already queried since the last write of the data or the rules.
+    :param interactive: prints the error of an unknown pair2 word (raises PhraseError otherwise, see find_type)
+    """
+    key = relation_cache.key(elem, elem_type, tag, pair2, prep1)
+    result = relation_cache.get(key)
+    if result is None:
+        result = query_relations(tx, elem, elem_type, tag, pair2, prep1, interactive=interactive)
+        relation_cache.put(key, result)
+    return result
+
+
+@query_site(infer=True)
+def query_relations(tx, elem, elem_type, tag, pair2=None, prep1=None, joined=False, interactive=True):
+    """
+    Relations and possible locations of an element (and of the pair2 element, if provided).
+    With pair2, the one-hop neighborhoods x-y, x-z and z-w are queried separately and joined here on the
+    iids of x and z (see relation_hop), instead of one query returning their cross product.
+    :param joined: uses the single joined query of the whole neighborhood instead
+    :param interactive: see find_type
+    :return: relations dictionaries of x-y, x-z and z-w, location pairs of y and w, locations dictionary
+             and coordinates of the element
+    """
     relations_list = ['forming', 'assembling', 'composing', 'linking', 'positioning']
 
     coordinates = []
@@ -417,7 +608,7 @@ def get_relations(tx, elem, elem_type, tag, pair2=None, prep1=None):
     # $rz type relation:role;
 
     if pair2:   # If the pair2 element is provided
-        e_type2 = find_type(tx, pair2[0])
+        e_type2 = find_type(tx, pair2[0], interactive)
 
         if prep1:
             if prep1.lower() == 'of' and elem == 'surface':
@@ -440,34 +631,30 @@ def get_relations(tx, elem, elem_type, tag, pair2=None, prep1=None):
 
         q_get2 = 'get $x, $y, $z, $rx, $r2x, $r2z, $rw, $ry, $rz, $rxy, $rwz, $rxz, $t, $s;'
 
-        if elem_type[1] == 'entity':
-            if e_type2.split(':')[0] == 'entity':
-                query = qrx_a + qry + qrw + qze + qr_xy + qr_xz_wz + q_get2
-            else:
-                query = qrx_a + qry + qrw + qza + qr_xy + qr_xz_wz + q_get2
-        else:
-            if e_type2.split(':')[0] == 'entity':
-                query = qrx_b + qry + qrw + qze + qr_xy + qr_xz_wz + q_get2
-            else:
-                query = qrx_b + qry + qrw + qza + qr_xy + qr_xz_wz + q_get2
+        qrx = qrx_a if elem_type[1] == 'entity' else qrx_b
+        qrz = qze if e_type2.split(':')[0] == 'entity' else qza
+        query = qrx + qry + qrw + qrz + qr_xy + qr_xz_wz + q_get2
     else:
         query = qrx_a + qry + qr_xy + q_get if elem_type[1] == 'entity' else qrx_b + qry + qr_xy + q_get
 
     # To find possible current locations of connector or tool
     if elem == 'connector' or elem == 'tool':
 
-        ql1 = f'$lm isa landmark-point, has name $ln, has latitude $lt, has longitude $lg, has water-depth $wd; '
-        ql2 = f'$l(currently-located-at:$x, location:$lm) isa locating; '
-        qlg = f'get $lm, $ln, $lt, $lg, $wd;'
-        query_l = qrx_a + ql1 + ql2 + qlg if elem_type[1] == 'entity' else qrx_b + ql1 + ql2 + qlg
-        iterator_l = list(match_query(tx, query_l))
-        for loc in iterator_l:
-            # lm = loc.map().get('lm').get_type().get_label().name()
-            ln = loc.map().get('ln').as_attribute().get_value()
-            lt = loc.map().get('lt').as_attribute().get_value()
-            lg = loc.map().get('lg').as_attribute().get_value()
-            wd = loc.map().get('wd').as_attribute().get_value()
-
+        # from the location index (same constraints on $x as qrx_a / qrx_b)
+        if elem_type[1] == 'entity':
+            x_args = (elem, tag or None) if qrx_a != 'match ' else (None, None)
+            located = location_service.where(tx, *x_args, role='currently-located-at')
+        else:
+            located = location_service.where(tx, elem_type[1], tag or None, elem_type[0], elem,
+                                             role='currently-located-at')
+        if located is None:                                     # index unavailable
+            ql1 = f'$lm isa landmark-point, has name $ln, has latitude $lt, has longitude $lg, has water-depth $wd; '
+            ql2 = f'$l(currently-located-at:$x, location:$lm) isa locating; '
+            qlg = f'get $lm, $ln, $lt, $lg, $wd;'
+            query_l = qrx_a + ql1 + ql2 + qlg if elem_type[1] == 'entity' else qrx_b + ql1 + ql2 + qlg
+            located = [[loc.map().get(v).as_attribute().get_value() for v in ['ln', 'lt', 'lg', 'wd']]
+                       for loc in match_query(tx, query_l)]
+        for ln, lt, lg, wd in located:
             coordinates.append(f'name: {ln} | latitude: {lt} | longitude: {lg} | water-depth: {wd}')
 
     l_dict = {}
@@ -475,24 +662,12 @@ def get_relations(tx, elem, elem_type, tag, pair2=None, prep1=None):
     rxz_dict = {}
     rwz_dict = {}
 
-    iterator_r = list(match_query(tx, query))
-
     def retrieve_relations(r, e1, tgl, tgn, re1, re2, r_dict):
         if r in relations_list:
             if r not in r_dict:
-                r_dict[r] = {}
+                r_dict[r] = RelationSet()
             if re1 != 'role' and re2 != 'role':
-                v = [e1, tgl, tgn, re1]
-                if r in r_dict:
-                    if isinstance(r_dict[r], list):
-                        if v not in r_dict[r]:
-                            match_et = list(filter(lambda lz: 'element-type' in lz[1], r_dict[r]))
-                            if match_et:
-                                r_dict[r].remove(match_et[0])
-                            if tgl == 'tag-number':
-                                r_dict[r].append(v)
-                    else:
-                        r_dict[r] = [v]
+                r_dict[r].add(RelationEntry(sys.intern(e1), sys.intern(tgl), tgn, sys.intern(re1)))
         return r_dict
 
     def retrieve_location(target, e_role, t_role, t_tag, t_type, l_d, l_pair):
@@ -503,6 +678,44 @@ def get_relations(tx, elem, elem_type, tag, pair2=None, prep1=None):
                     if [target, t_tag] not in l_pair:
                         l_pair.append([target, t_tag])          # [equipment, tag-number]
 
+    def retrieve_hops():
+        # x-y (only for the x related to z), x-z and z-w one-hop neighborhoods
+        q_xy = qrx + qry + qr_xy + qrz + '$rxz($x, $z) isa relation; get $x, $y, $t, $rxy, $rx, $ry;'
+        q_xz = qrx + qrz + qr_xz + 'get $x, $z, $rxz, $r2x, $rz;'
+        q_wz = 'match ' + qrz + qrw + qr_wz + 'get $z, $w, $s, $rwz, $r2z, $rw;'
+        xy = relation_hop(tx, q_xy, 'x', 'y', 'rxy', 'rx', 'ry', 't')
+        xz = relation_hop(tx, q_xz, 'x', 'z', 'rxz', 'r2x', 'rz')
+        wz = relation_hop(tx, q_wz, 'z', 'w', 'rwz', 'r2z', 'rw', 's')
+
+        x_attributes = {}                                       # x iid -> attribute types of its y (ordered set)
+        for x_iid, _, _, _, _, _, _, _, tt in xy:
+            x_attributes.setdefault(x_iid, {})[tt] = None
+        z_neighbors = {}                                        # z iid -> z-w rows
+        for row in wz:
+            z_neighbors.setdefault(row[0], []).append(row)
+        # an x-z pair takes part in the neighborhood only if x has y and z has w (as in the joined query)
+        pairs = [row for row in xz if row[0] in x_attributes and row[2] in z_neighbors]
+        x_iids = {row[0] for row in pairs}
+        z_iids = dict.fromkeys(row[2] for row in pairs)
+
+        for x_iid, _, _, y, rxy, rx, ry, t, tt in xy:
+            if x_iid in x_iids:
+                retrieve_location(y, rx, ry, t, tt, l_dict, location_pair1)
+                retrieve_relations(rxy, y, tt, t, ry, rx, rxy_dict)
+        for z_iid in z_iids:
+            for _, _, _, w, rwz, r2z, rw, s, ss in z_neighbors[z_iid]:
+                retrieve_location(w, r2z, rw, s, ss, l_dict, location_pair2)
+                retrieve_relations(rwz, w, ss, s, rw, rw, rwz_dict)
+        for x_iid, x, _, _, rxz, r2x, rz, _, _ in pairs:
+            for tt in x_attributes[x_iid]:
+                retrieve_relations(rxz, x, tt, tag, r2x, rz, rxz_dict)
+
+    if pair2 and not joined:
+        retrieve_hops()
+        iterator_r = []
+    else:
+        iterator_r = list(match_query(tx, query))
+
     for i in iterator_r:
 
         x = i.map().get('x').get_type().get_label().name()
@@ -542,10 +755,43 @@ def get_relations(tx, elem, elem_type, tag, pair2=None, prep1=None):
     return f_rxy_dict, f_rxz_dict, f_rwz_dict, location_pair1, location_pair2, l_dict, coordinates
 
 
+def relation_hop(tx, query, a, b, r, ra, rb, attribute=None):
+    """
+    One-hop neighborhood of the relations query: answers binding $r($ra:$a, $rb:$b) and the
+    tag-number or element-type $attribute of $b.
+    :return: distinct rows (a iid, a type, b iid, b type, r type, ra, rb, attribute value, attribute type)
+             in the order of the answers
+    """
+    rows = {}
+    for i in match_query(tx, query):
+        m = i.map()
+        value = m.get(attribute).as_attribute() if attribute else None
+        row = (m.get(a).get_iid(), m.get(a).get_type().get_label().name(),
+               m.get(b).get_iid(), m.get(b).get_type().get_label().name(),
+               m.get(r).as_relation().get_type().get_label().name(),
+               m.get(ra).as_role_type().get_label().name(), m.get(rb).as_role_type().get_label().name(),
+               value.get_value() if value else None,
+               value.get_type().get_label().name() if value else None)
+        rows[row] = None
+    return list(rows)
+
+
 def filter_relations(p_dict):
-    for k in p_dict.keys():
-        p_dict[k] = list(map(lambda i: f'{i[0]} {i[2]} ▶ {i[3]}', p_dict[k]))
-    return p_dict
+    """
+    :return: relations dictionary {relation: [RelationEntry]}
+    """
+    return {k: list(v.entries) for k, v in p_dict.items()}
+
+
+def command_compliance(c, e, use_tool, s_class, g_list):
+    """
+    :return: True if the command can be applied to the element (always True for tool commands)
+    """
+    if use_tool:
+        return True
+    check1 = bool(list(filter(lambda item: str(e) in item, g_list)))
+    check2 = bool(list(filter(lambda item: str(s_class) in item, g_list)))
+    return check1 or check2
 
 
 def check_command_compliance(c, e, use_tool, s_class, g_list):
@@ -588,7 +834,25 @@ def link(tx, c, link1, link2, linking=False):
     return color.orange(test)
 
 
+@query_site(infer=True)
 def find_location(tx, loc_pair):
+    """
+    :param loc_pair: [type, tag-number]
+    :return: first location [name, latitude, longitude, water-depth] of the thing (see find_locations), or None
+    """
+    list_parameters = find_locations(tx, loc_pair)
+    return list_parameters[0] if list_parameters else None
+
+
+def find_locations(tx, loc_pair):
+    """
+    :param loc_pair: [type, tag-number]
+    :return: every location [name, latitude, longitude, water-depth] of the thing, from the location index
+             (or from a landmark-point query if the index is unavailable)
+    """
+    list_parameters = location_service.locations(tx, loc_pair)
+    if list_parameters is not None:
+        return list_parameters
     tab = '\u0009'
     q1 = f'match '
     q2 = f'$x isa {loc_pair[0]}, has tag-number "{loc_pair[1]}"; '
@@ -605,10 +869,10 @@ def find_location(tx, loc_pair):
             lon = i.map().get('lon').as_attribute().get_value()
             wdp = i.map().get('wdp').as_attribute().get_value()
             list_parameters.append([n, lat, lon, wdp])
-        return list_parameters[0]
+        return list_parameters
     else:
         # print(color.e2(f'{tab * 6}\u25B6 No location found for {loc_pair}'))
-        return None
+        return []
 
 
 def division_line(text, test=None):
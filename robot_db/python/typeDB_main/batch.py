@@ -0,0 +1,159 @@
+"""
+                    Project MOSASAUR - batch.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Batch command file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typedb.client import TransactionType
+from project.robot_db.python.typeDB_main.inquirer import QueryModel
+from project.robot_db.python.typeDB_main.color_text import Color, Box
+from project.robot_db.python.typeDB_main.cache import value_index
+from concurrent.futures import ThreadPoolExecutor
+import math
+import time
+
+color = Color()
+box = Box()
+
+
+def percentile(values, p):
+    """
+    :param values: sorted list of values
+    :param p: percentile (0 - 100)
+    :return: nearest-rank percentile of the values (None if empty)
+    """
+    if not values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(values)))
+    return values[rank - 1]
+
+
+class BatchRunner:
+    """
+    Runs a whole intervention procedure (a list or a file of phrases) through QueryModel.command_line.
+    All the phrases share the same QueryModel, so the warm sessions, the pooled transactions, the schema
+    cache and the value index are set up once for the batch instead of once per command. With workers > 1
+    the phrases are spread over a thread pool.
+    The report gives the latency percentiles of the phrases and the throughput of the batch.
+    By default (headless=True) the phrases go through QueryModel.situation_report (no output, no prompt)
+    and the SituationReport of each phrase is kept in self.reports, in the order of the phrases.
+    With headless=False they go through command_line, which prompts for a new phrase when one is invalid,
+    so the batch then runs on a single worker.
+    The position of the vehicle (see QueryModel.command_line) is given to every phrase of the batch.
+    """
+    def __init__(self, query_model=None, workers=1, concurrent=False, db_name='robot_db', headless=True,
+                 position=None):
+        self.query_model = QueryModel() if query_model is None else query_model
+        self.workers = max(1, int(workers))
+        if self.workers > 1 and not headless:
+            raise ValueError('workers > 1 needs headless=True (command_line reads its prompts from the terminal)')
+        self.concurrent = concurrent
+        self.db_name = db_name
+        self.headless = headless
+        self.position = position                                # (latitude, longitude[, water-depth])
+        self.reports = []                                       # SituationReport of each phrase (headless mode)
+        self.results = []                                       # [phrase, latency (ms), error]
+        self.elapsed = 0.0
+
+    @staticmethod
+    def phrases(source):
+        """
+        :param source: list of phrases, or path of a text file with one phrase per line ('#' for comments)
+        :return: list of phrases
+        """
+        if isinstance(source, str):
+            with open(source) as f:
+                lines = [line.strip() for line in f]
+            return [line for line in lines if line and not line.startswith('#')]
+        return list(source)
+
+    def warm_up(self):
+        """
+        Opens the data session (type cache from the schema snapshot) and builds the value index
+        before the clock starts, so the first phrase does not pay for them.
+        """
+        connection = self.query_model.connection
+        with connection.transaction(self.db_name, self.query_model.session_type, TransactionType.READ,
+                                    self.query_model.options) as tx:
+            value_index.ensure(tx)
+
+    def run_phrase(self, n, phrase):
+        """
+        :param n: index of the phrase in the batch (its SituationReport goes to self.reports[n])
+        :param phrase: input phrase
+        :return: [phrase, latency (ms), error]
+        """
+        start = time.perf_counter()
+        error = None
+        try:
+            if self.headless:
+                self.reports[n] = self.query_model.situation_report(phrase, concurrent=self.concurrent,
+                                                                    position=self.position)
+            else:
+                self.query_model.command_line(phrase, concurrent=self.concurrent, position=self.position)
+        except Exception as e:
+            self.reports[n] = getattr(e, 'report', None) if self.headless else None
+            error = f'{type(e).__name__}: {e}'
+        return [phrase, (time.perf_counter() - start) * 1000, error]
+
+    def run(self, source):
+        """
+        :param source: list of phrases or path of a phrase file (see phrases)
+        :return: report dictionary (see report)
+        """
+        phrases = self.phrases(source)
+        self.reports = [None] * len(phrases) if self.headless else []
+        self.warm_up()
+        start = time.perf_counter()
+        if self.workers == 1:
+            self.results = [self.run_phrase(n, phrase) for n, phrase in enumerate(phrases)]
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='batch') as executor:
+                self.results = list(executor.map(self.run_phrase, range(len(phrases)), phrases))
+        self.elapsed = time.perf_counter() - start
+        return self.report()
+
+    def report(self, verbose=True):
+        """
+        :return: dictionary with the number of phrases and errors, the latency percentiles (ms)
+                 and the throughput (phrases/s)
+        """
+        latencies = sorted(r[1] for r in self.results)
+        errors = [r for r in self.results if r[2] is not None]
+        report = {'phrases': len(self.results), 'errors': len(errors),
+                  'p50': percentile(latencies, 50), 'p90': percentile(latencies, 90),
+                  'p95': percentile(latencies, 95), 'p99': percentile(latencies, 99),
+                  'max': latencies[-1] if latencies else None,
+                  'total': self.elapsed * 1000,
+                  'throughput': len(self.results) / self.elapsed if self.elapsed else 0.0}
+        if verbose:
+            print(color.cyan('\n' + "━" * 175 + '\n'))
+            for phrase, latency, error in self.results:
+                line = f'{latency:10.2f} ms ▶ {phrase}'
+                print(color.e1(f'{line} ▶ {error}') if error else color.c3(line))
+            if latencies:
+                print(box.c1(f'BATCH > ({report["phrases"]}) phrases in {report["total"]:.2f} ms',
+                             f'{report["throughput"]:.2f} phrases/s | errors: {report["errors"]}', 0))
+                print(box.c4(f'LATENCY > p50 {report["p50"]:.2f} | p90 {report["p90"]:.2f} | '
+                             f'p95 {report["p95"]:.2f} | p99 {report["p99"]:.2f} | (max {report["max"]:.2f}) ms', '', 0))
+        return report
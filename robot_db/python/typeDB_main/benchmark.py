@@ -0,0 +1,349 @@
+"""
+                    Project MOSASAUR - benchmark.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Offline benchmark file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from project.robot_db.python.typeDB_main import client_standin     # typedb.client without typedb-client
+from typedb.client import SessionType, TransactionType
+from project.robot_db.python.typeDB_main.builder import BuildModel
+from project.robot_db.python.typeDB_main.inquirer import QueryModel
+from project.robot_db.python.typeDB_main.auxiliary import phrase2dict, element_type, get_relations, find_location
+from project.robot_db.python.typeDB_main.color_text import Color, Box
+from project.robot_db.python.typeDB_main.cache import relation_cache
+from project.robot_db.python.typeDB_main.telemetry import query_sites, reasoning_options
+from project.robot_db.python.typeDB_main.batch import percentile
+from project.robot_db.python.typeDB_main.standin import StandInClient, LatencyModel, synthetic_world, install
+from project.robot_db.python.typeDB_main import snapshot
+from contextlib import contextmanager, redirect_stdout
+import statistics
+import platform
+import tempfile
+import argparse
+import json
+import time
+import sys
+import gc
+import io
+import os
+import csv
+
+color = Color()
+box = Box()
+
+main_phrases = ['open valve MECH-VALVE-TURN-UN-IN-11',
+                'open valve MECH-VALVE-TURN-UN-HD-10',
+                'apply-torque-on interface OF valve MECH-VALVE-TURN-UN-IN-11',
+                'clean surface OF rov-panel SUBS-ROVPN-UNDF-FX-HD-01',
+                'clean interface OF valve MECH-VALVE-TURN-UN-IN-11',
+                'operate mechanism OF tool TOOL-CLAMP-MANU-AT-UN-03',
+                'cut steel-wire-rope1 OF vessel SHIP-VESSL-UNDF-MB-00-17',
+                'cut steel-wire-rope1 OF AHTS-vessel-winch EQPT-WINCH-AHTS-MB-00-17',
+                'plug connector CONN-ELECT-PUSH-MB-HD-01 AT interface INTF-RCELE-SLID-FX-00-21']
+
+
+def write_data(world, folder):
+    """
+    Writes the things of a stand-in world as the data files of DataHandling.load_data: one entity file
+    per concrete type (the surfaces are left out, load_data inserts them with their assets) and one
+    relation file per relation type, the role players given by their tag-number (name for the
+    landmark-points). A relation file holds the rows with the roles of its first relation.
+    :param world: World (see standin.synthetic_world)
+    :param folder: data folder (entity_data and relation_data are created in it)
+    """
+    for concept_type in ['entity', 'relation']:
+        os.makedirs(os.path.join(folder, f'{concept_type}_data'), exist_ok=True)
+    for label, things in world.instances_of.items():
+        kind = world.types[label].kind
+        if kind == 'entity' and label != 'surface':
+            attributes = [a.type.label.name() for a in things[0].attributes]
+            first = [a for a in ['element-type', 'tag-number'] if a in attributes]
+            header = first + [a for a in attributes if a not in first]
+            rows = []
+            for thing in things:
+                values = {a.type.label.name(): a.value for a in thing.attributes}
+                rows.append([values.get(a, '') for a in header]) if set(values) == set(header) else None
+        elif kind == 'relation':
+            roles = [role_type.label.name() for role_type, _ in things[0].players]
+            header = [f'{r}{"*" if roles.count(r) > 1 else ""} : {key_attribute(p)}'
+                      for r, (_, p) in zip(roles, things[0].players)]
+            rows = [[f'{p.type.label.name()} : {key_value(p)}' for _, p in thing.players] for thing in things
+                    if [role_type.label.name() for role_type, _ in thing.players] == roles]
+        else:
+            continue
+        path = os.path.join(folder, f'{kind}_data', f'{label}.csv')
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+
+def key_attribute(thing):
+    return 'name' if thing.type.label.name() == 'landmark-point' else 'tag-number'
+
+
+def key_value(thing):
+    label = key_attribute(thing)
+    return next(a.value for a in thing.attributes if a.type.label.name() == label)
+
+
+@contextmanager
+def quiet():
+    """
+    No terminal output, and an empty input: a prompt of command_line raises EOFError instead of waiting.
+    """
+    stdin = sys.stdin
+    sys.stdin = io.StringIO('')
+    try:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            yield
+    finally:
+        sys.stdin = stdin
+
+
+class Benchmark:
+    """
+    Offline benchmark of the model: the TypeDB client is replaced by a StandInClient (see standin.py)
+    over a synthetic world, so the suite runs on any machine without a server, and every run sends the
+    same queries and gets the same answers for a given scale and seed.
+    The cases cover DataHandling.load_data (entity and relation files), phrase2dict, get_relations,
+    find_location and full command_line runs (sequential and concurrent) for the phrases of main.py.
+    Each case is run 'warmup' times, then 'repeat' times with the garbage collector off; the report
+    gives the median, p90, minimum and mean time (ms) and the queries served per run, which do not
+    depend on the machine. Results are saved as JSON (save) and two saved results compared (compare).
+    The latencies come from the LatencyModel of the stand-in: the model times, the times of a
+    query_stats recording, or none (latency scale 0: only the Python code is timed).
+    """
+    def __init__(self, scale=20, seed=1729, latency=None, repeat=5, warmup=1, phrases=None, db_name='robot_db'):
+        self.scale = scale
+        self.seed = seed
+        self.latency = LatencyModel() if latency is None else latency
+        self.repeat = max(1, int(repeat))
+        self.warmup = max(0, int(warmup))
+        self.phrases = list(main_phrases if phrases is None else phrases)
+        self.db_name = db_name
+        self.world = None
+        self.client = None
+        self.folder = None
+        self.datahandling = None
+        self.query_model = None
+        self.relation_args = {}                                 # phrase -> get_relations arguments
+        self.locations = []                                     # [type, tag-number] of the phrase locations
+        self.errors = {}                                        # phrase -> error of prepare
+        self.results = []                                       # case dictionaries (see case)
+
+    def setup(self):
+        """
+        Builds the world, installs its client in the ConnectionManager and writes its data files.
+        The schema snapshot and the data files go to a temporary folder.
+        """
+        self.world = synthetic_world(self.scale, self.seed)
+        self.client = StandInClient(self.world, self.latency, [self.db_name])
+        self.folder = tempfile.mkdtemp(prefix='mosasaur_bench_')
+        snapshot.snapshot_folder = os.path.join(self.folder, 'cache')
+        install(self.client)
+        write_data(self.world, os.path.join(self.folder, 'data'))
+        self.datahandling = BuildModel.DataHandling()
+        self.datahandling.data_folder = os.path.join(self.folder, 'data')
+        self.query_model = QueryModel()
+        self.prepare()
+
+    def read(self, function, site, options=None):
+        """
+        Runs a function of a READ transaction with the options of its query site (as Questions does).
+        """
+        options = query_sites.options(site, self.query_model.options if options is None else options)
+        with self.query_model.connection.transaction(self.db_name, SessionType.DATA, TransactionType.READ,
+                                                     options) as tx:
+            return function(tx)
+
+    def prepare(self):
+        """
+        Arguments of the get_relations and find_location cases, computed as QueryModel.assess does.
+        A phrase that fails here has no get_relations case (its error is kept in self.errors).
+        """
+        for phrase in self.phrases:
+            try:
+                with quiet():
+                    self.prepare_phrase(phrase)
+            except (Exception, EOFError) as e:
+                self.errors[phrase] = f'{type(e).__name__}: {e}'
+
+    def prepare_phrase(self, phrase):
+        d_phrase = self.read(lambda tx: phrase2dict(tx, phrase, False), phrase2dict, reasoning_options())
+        element1 = d_phrase.get('element-1', 0)
+        e = element1 if element1 != 0 else d_phrase.get('pair-1', 0)
+        if not e:
+            return
+        element, tag = (e[0], e[1]) if isinstance(e, list) else (e, None)
+        e_type = self.read(lambda tx: element_type(tx, element), element_type)
+        args = (element, e_type, tag, d_phrase.get('pair-2', 0), d_phrase.get('prep-1', 0))
+        relations = self.read(lambda tx: get_relations(tx, *args), get_relations)
+        self.relation_args[phrase] = args
+        for loc in relations[3] + relations[4]:
+            self.locations.append(list(loc)) if list(loc) not in self.locations else None
+
+    def case(self, group, name, function, reset=None):
+        """
+        Times a case: warmup runs, then repeat runs with the garbage collector off.
+        :param group: group of the case (load_data, phrase2dict, ...)
+        :param name: name of the case in its group
+        :param function: function of the case (no argument)
+        :param reset: function run before each run, out of the timing (e.g. a cache clear)
+        :return: case dictionary
+        """
+        times = []
+        error = None
+        for n in range(self.warmup + self.repeat):
+            reset() if reset is not None else None
+            self.client.reset_counters()
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            try:
+                with quiet():
+                    function()
+            except (Exception, EOFError) as e:
+                error = f'{type(e).__name__}: {e}'
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                gc.enable()
+            times.append(elapsed) if n >= self.warmup else None
+        ordered = sorted(times)
+        result = {'group': group, 'name': name, 'runs': len(times),
+                  'median': statistics.median(ordered), 'p90': percentile(ordered, 90),
+                  'min': ordered[0], 'mean': statistics.fmean(ordered),
+                  'counters': dict(self.client.counters), 'error': error}
+        self.results.append(result)
+        return result
+
+    def run(self):
+        """
+        Runs every case of the suite.
+        :return: list of case dictionaries
+        """
+        self.setup() if self.client is None else None
+        self.results = []
+        for concept_type in ['entity', 'relation']:
+            self.case('load_data', concept_type, lambda c=concept_type: self.datahandling.load_data(
+                self.db_name, c, commitment=False, verbose=False))
+        for phrase in self.phrases:
+            self.case('phrase2dict', phrase, lambda p=phrase: self.read(
+                lambda tx: phrase2dict(tx, p, False), phrase2dict, reasoning_options()))
+        for phrase, args in self.relation_args.items():
+            self.case('get_relations', phrase, lambda a=args: self.read(
+                lambda tx: get_relations(tx, *a), get_relations), relation_cache.clear)
+        for loc in self.locations:
+            self.case('find_location', ' '.join(loc), lambda l=loc: self.read(
+                lambda tx: find_location(tx, l), find_location))
+        for concurrent in [False, True]:
+            for phrase in self.phrases:
+                self.case('command_line (concurrent)' if concurrent else 'command_line', phrase,
+                          lambda p=phrase, c=concurrent: self.query_model.command_line(p, concurrent=c),
+                          relation_cache.clear)
+        return self.results
+
+    def report(self, verbose=True):
+        """
+        :return: dictionary with the total median time (ms) and the number of errors of the suite
+        """
+        total = sum(r['median'] for r in self.results)
+        errors = [r for r in self.results if r['error'] is not None]
+        if verbose:
+            for phrase, error in self.errors.items():
+                print(color.e1(f'PREPARE ▶ {phrase} ▶ {error}'))
+            group = None
+            for r in self.results:
+                if r['group'] != group:
+                    group = r['group']
+                    print(color.cyan('\n' + "━" * 175 + '\n'))
+                    print(box.c4(f'{group.upper()}', '', 0))
+                c = r['counters']
+                line = f'{r["median"]:10.2f} ms (p90 {r["p90"]:.2f} | min {r["min"]:.2f} | mean {r["mean"]:.2f}) ' \
+                       f'▶ {c["matches"]} matches, {c["answers"]} answers, {c["writes"]} writes ▶ {r["name"]}'
+                print(color.e1(f'{line} ▶ {r["error"]}') if r['error'] else color.c3(line))
+            print(box.c1(f'BENCHMARK > ({len(self.results)}) cases in {total:.2f} ms (sum of the medians)',
+                         f'scale {self.scale} | seed {self.seed} | runs {self.repeat} | errors: {len(errors)}', 0))
+        return {'cases': len(self.results), 'total': total, 'errors': len(errors)}
+
+    def to_dict(self):
+        return {'meta': {'scale': self.scale, 'seed': self.seed, 'repeat': self.repeat, 'warmup': self.warmup,
+                         'latency': self.latency.to_dict(), 'python': platform.python_version(),
+                         'platform': platform.platform(), 'date': time.strftime('%Y-%m-%d %H:%M:%S')},
+                'errors': self.errors, 'cases': self.results}
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @staticmethod
+    def compare(old, new, tolerance=0.05, verbose=True):
+        """
+        Compares two benchmark results case by case: ratio of the median times and difference of the
+        queries served (a different number of queries is a change of the code path, not noise).
+        :param old: result dictionary (see to_dict) or path of a saved result
+        :param new: result dictionary or path of a saved result
+        :param tolerance: relative change of the median reported as faster / slower
+        :return: list of [group, name, old median, new median, ratio, matches difference]
+        """
+        results = []
+        for r in [old, new]:
+            if isinstance(r, str):
+                with open(r, encoding='utf-8') as f:
+                    r = json.load(f)
+            results.append({(c['group'], c['name']): c for c in r['cases']})
+        rows = []
+        for key, c_new in results[1].items():
+            c_old = results[0].get(key)
+            if c_old is None:
+                continue
+            ratio = c_new['median'] / c_old['median'] if c_old['median'] else float('inf')
+            matches = c_new['counters']['matches'] - c_old['counters']['matches']
+            rows.append([key[0], key[1], c_old['median'], c_new['median'], ratio, matches])
+            if verbose:
+                line = f'{c_old["median"]:10.2f} ▶ {c_new["median"]:10.2f} ms ({ratio:6.2f}x)' \
+                       f'{f" | matches {matches:+d}" if matches else ""} ▶ {key[0]} ▶ {key[1]}'
+                print(color.e1(line) if ratio > 1 + tolerance else
+                      color.cyan(line) if ratio < 1 - tolerance else color.c3(line))
+        return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline benchmark of the MOSASAUR model (TypeDB stand-in)')
+    parser.add_argument('--scale', type=int, default=20, help='manifolds of the synthetic world')
+    parser.add_argument('--seed', type=int, default=1729)
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per case')
+    parser.add_argument('--warmup', type=int, default=1, help='untimed runs per case')
+    parser.add_argument('--latency', default='model',
+                        help="'model', 'none' (Python time only) or a query_stats JSON recording")
+    parser.add_argument('--save', help='JSON file of the results')
+    parser.add_argument('--compare', help='JSON file of previous results')
+    arguments = parser.parse_args()
+
+    latency_model = LatencyModel() if arguments.latency == 'model' else \
+        LatencyModel(scale=0.0) if arguments.latency == 'none' else LatencyModel(recording=arguments.latency)
+    benchmark = Benchmark(arguments.scale, arguments.seed, latency_model, arguments.repeat, arguments.warmup)
+    benchmark.run()
+    benchmark.report()
+    benchmark.save(arguments.save) if arguments.save else None
+    Benchmark.compare(arguments.compare, benchmark.to_dict()) if arguments.compare else None
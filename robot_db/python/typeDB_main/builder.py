@@ -25,9 +25,15 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from typedb.client import TypeDB, SessionType, TransactionType, TypeDBOptions
-from subprocess import PIPE, Popen, CREATE_NEW_PROCESS_GROUP
+from subprocess import PIPE, Popen
 from project.robot_db.python.typeDB_main.auxiliary import *
 from project.robot_db.python.typeDB_main.color_text import Color, Box
+from project.robot_db.python.typeDB_main.connection import connection
+from project.robot_db.python.typeDB_main.loader import BulkLoader, IngestionScheduler, ColumnPlan
+from project.robot_db.python.typeDB_main.cache import type_cache, value_index, relation_cache
+from project.robot_db.python.typeDB_main.snapshot import schema_snapshot, invalidate_snapshot, TypeHierarchy
+from project.robot_db.python.typeDB_main.instrument import match_rows
+from project.robot_db.python.typeDB_main.sync import DataSync
 import os
 import time
 import pprint
@@ -86,8 +92,9 @@ class BuildModel:
 
     class Client:
         def __init__(self):
-            with TypeDB.core_client(address=TypeDB.DEFAULT_ADDRESS) as client_db:
-                self.client = client_db
+            # Every component shares the process-wide client (see connection.py)
+            self.connection = connection()
+            self.client = self.connection.get_client()
 
     class Database:
         def __init__(self):
@@ -123,6 +130,7 @@ class BuildModel:
             db_list = self.lists()
             if db_name in db_list:
                 print(f'Deleting database \033[33m>>>>\033[0m [\033[33m{db_name:^10}\033[0m]')
+                connection().close_sessions(db_name)
                 self.client.databases().get(db_name).delete()
             else:
                 print(f'Database [{db_name}] does not exist or deleted.')
@@ -131,6 +139,7 @@ class BuildModel:
         def __init__(self):
             self.db_name = None
             self.client = BuildModel.Client().client
+            self.connection = connection()
             self.datahandling = BuildModel.DataHandling
             self.session_type = SessionType.SCHEMA
 
@@ -139,10 +148,9 @@ class BuildModel:
             This function returns the entire schema of the database.
             :return: schema
             """
-            with self.client.session(db_name, self.session_type) as session:
-                db_schema = session.database().schema()
-                session.close()
-                return db_schema
+            session = self.connection.session(db_name, self.session_type)
+            db_schema = session.database().schema()
+            return db_schema
 
         def load_schema(self, db_name):
             """
@@ -169,78 +177,78 @@ class BuildModel:
                 tql_temp = temp.read()
 
             print(box.cyan(f'\u26A0\u0009 > (WARNING!) SCHEMA IS NOW BEING LOADED'))
-            with self.client.session(db_name, self.session_type) as session:
-                with session.transaction(TransactionType.WRITE) as transaction:
-                    # print(transaction.is_open())
-                    # transaction.query().define(tql1)                      # uncomment after testing
-                    # transaction.query().define(tql2)                      # uncomment after testing
-                    # transaction.query().define(tql3)                      # uncomment after testing
-                    # transaction.query().define(tql4)                      # uncomment after testing
-                    transaction.query().define(tql_temp)
-                    print(f'\033[31mWARNING!!! TEMPORARY SCHEMA - REMOVE THIS WARNING AFTER!!!\033[0m')
-                    transaction.commit()
-                    transaction.close()
-                session.close()
+            with self.connection.transaction(db_name, self.session_type, TransactionType.WRITE) as transaction:
+                # print(transaction.is_open())
+                # transaction.query().define(tql1)                      # uncomment after testing
+                # transaction.query().define(tql2)                      # uncomment after testing
+                # transaction.query().define(tql3)                      # uncomment after testing
+                # transaction.query().define(tql4)                      # uncomment after testing
+                transaction.query().define(tql_temp)
+                print(f'\033[31mWARNING!!! TEMPORARY SCHEMA - REMOVE THIS WARNING AFTER!!!\033[0m')
+                transaction.commit()
+            type_cache.invalidate()
+            value_index.invalidate()
+            relation_cache.bump()
+            invalidate_snapshot(db_name)
+            self.connection.warm(db_name)
+
+        def snapshot(self, db_name):
+            """
+            Returns the parsed schema of the database (hierarchy, ownerships, roles, rules), read from
+            the snapshot file when the schema did not change since it was saved.
+            :param db_name: name of the database
+            :return: SchemaSnapshot
+            """
+            return schema_snapshot(self.connection.get_client(), db_name)
 
         def schema_dict(self, thing, tx):
-            query = f'match $var sub! {thing}; get $var;'
-            iterator = tx.query().match(query)
-            result_dict = {}
-            for cmap in iterator:
-                d = cmap.map()
-                for key in d.keys():
-                    concept = d[key].get_label().name()
-                    concept_d = self.schema_dict(concept, tx)
-                    if concept_d:
-                        result_dict[concept] = concept_d
-                    else:
-                        result_dict[concept] = ''
-            return result_dict
-
-        def undef_concepts(self, thing, tx):
-            # thing = ['entity', 'attribute', 'relation']
-            query = f'match $c sub! {thing}; get $c;'
-            iterator = tx.query().match(query)
-            result_list = []
-            for cmap in iterator:
-                d = cmap.map()
-                for k, v in d.items():
-                    concept = v.get_label().name()
-                    sub_concept = self.undef_concepts(concept, tx)  # recursive call to get the sub_concept
-                    # Check if the sub_concepts list is not empty
-                    if sub_concept:
-                        result_list.append([concept] + sub_concept)
-                    else:
-                        # if sub_concept list is empty, then undefine the concept
-                        tx.query().undefine(f'undefine {concept} sub {thing};')
-            return result_list
+            return TypeHierarchy.load(tx).tree(thing)
+
+        @staticmethod
+        def undefine_query(hierarchy, rules, things_list):
+            """
+            Builds a single undefine query for the rules and every type below things_list, with each type
+            undefined before its supertype (subtypes must go first) and the rules before the types they use.
+            :param hierarchy: TypeHierarchy of the schema
+            :param rules: labels of the rules
+            :param things_list: root types, in the order they are deleted
+            :return: undefine query ('' if there is nothing to undefine)
+            """
+            statements = [f'rule {rule};' for rule in rules]
+            for thing in things_list:
+                for concept in reversed(hierarchy.ordered(thing)):
+                    statements.append(f'{concept} sub {hierarchy.parents[concept]};')
+            return f'undefine {" ".join(statements)}' if statements else ''
 
         def delete_schema(self, db_name):
             session_type = SessionType.SCHEMA
             print(box.violet(f'\u26A0\u0009 > (WARNING!)   SCHEMA IS BEING DELETED'))
-            with self.client.session(db_name, session_type) as sch_session:
-                with sch_session.transaction(TransactionType.WRITE) as transaction:
-                    things_list = ['entity', 'attribute', 'relation']
-                    for concept in things_list:
-                        print(f'{color.red(" Deleting... ")}{concept}')
-                        self.undef_concepts(concept, transaction)
-                    transaction.commit()
-                transaction.close()
+            with self.connection.transaction(db_name, session_type, TransactionType.WRITE) as transaction:
+                things_list = ['entity', 'relation', 'attribute']      # owners before the attributes they own
+                hierarchy = TypeHierarchy.load(transaction)
+                rules = [rule.get_label() for rule in transaction.logic().get_rules()]
+                for concept in things_list:
+                    print(f'{color.red(" Deleting... ")}{concept} ({len(hierarchy.ordered(concept))} types)')
+                query = self.undefine_query(hierarchy, rules, things_list)
+                transaction.query().undefine(query) if query else None
+                transaction.commit()
+            type_cache.invalidate()
+            value_index.invalidate()
+            relation_cache.bump()
+            invalidate_snapshot(db_name)
             print(box.blue(f"({db_name}) > SCHEMA DELETED"))
 
         def print_schema_dict(self, db_name):
-            session_type = SessionType.SCHEMA
-            with self.client.session(db_name, session_type) as sch_session:
-                with sch_session.transaction(TransactionType.READ) as transaction:
-                    things_list = ['entity', 'attribute', 'relation']
-                    for concept in things_list:
-                        pprint.pprint(self.schema_dict(concept, transaction))
-                transaction.close()
+            snapshot = self.snapshot(db_name)
+            things_list = ['entity', 'attribute', 'relation']
+            for concept in things_list:
+                pprint.pprint(snapshot.hierarchy(concept))
 
     class DataHandling:
         def __init__(self):
             self.db_name = None
             self.client = BuildModel.Client().client
+            self.connection = connection()
             self.session_type = SessionType.DATA
             self.inputs = None
             self.data_folder = './project/robot_db/data'
@@ -256,122 +264,292 @@ class BuildModel:
                     file_paths.append(file_dict)
             return file_paths
 
-        def load_data(self, db_name, concept_type=None, commitment=False):
+        def entity_queries(self, transaction, thing, rows, plan, verbose=True, entries=None):
+            """
+            Builds the insert queries of every row of an entity data file.
+            :param transaction: transaction used to resolve the concept types
+            :param thing: entity type of the data file
+            :param rows: rows of the data file (lists of values, see csv_rows)
+            :param plan: ColumnPlan compiled from the header of the data file
+            :param verbose: prints the queries
+            :param entries: list receiving the (value, attribute, owner) entries of the value index
+            :return: yields the list of insert queries of each row
+            """
+            entries = [] if entries is None else entries
+            for x, values in enumerate(rows):
+                q = f'insert $v{x} isa {thing},'
+                for column in plan.columns:
+                    # Query constructors - concepts, attributes and roles
+                    a_key = column.key                          # attribute key j
+                    a_value = column.value(values)              # attribute value j
+                    # SPECIAL CASE ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+                    if ":" in a_value and not column.temporal:
+                        attribute = column.attribute
+                        a_key, a_list = a_value.split(" : ")[0], a_value.split(" : ")[1]
+                        if column.multi:
+                            if " | " in a_list:
+                                q = f'insert $v{x} isa {a_key},'
+                                a_parts = a_list.split(" | ")
+                                for n, a in enumerate(a_parts):
+                                    q += f' has {column.attributes[n]} "{str(a)}"'
+                                    q += f',' if n < len(a_parts) - 1 else ''
+                                    entries.append((a, column.attributes[n], a_key))
+                            else:
+                                q = f'insert $v{x} isa {a_key},'
+                                q += f' has {column.attributes[0]} "{str(a_list)}"'
+                                entries.append((a_list, column.attributes[0], a_key))
+                        else:
+                            a_value = a_list
+                            key_type = find_type(transaction, a_key)
+                            if str(key_type).split(":")[0] == 'entity':
+                                q = f'insert $v{x} isa {a_key},'
+                                q += f' has {attribute} "{str(a_value)}"'
+                                entries.append((a_value, attribute, a_key))
+                            else:
+                                q = query_builder(q, a_key, a_value, 'entity', None, plan.converter(a_key))
+                                q += ';'
+                                q += f' $v{x} "{str(a_key)}"'
+                                q += f',' if not column.last else ''
+                    # NORMAL CASE ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+                    else:
+                        q = query_builder(q, a_key, a_value, 'entity', '', column.convert)
+                        entries.append((a_value, a_key, thing)) if column.indexed else None
+                    q += f',' if not column.last else ''
+                q += f';'
+                row = [q]
+                print(f'{color.c4(q)}') if verbose else None
+                # FOR SURFACES ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+                if plan.tag_column is not None:
+                    s_tag = plan.tag_column.value(values)
+                    name = plan.column('element-type').value(values)
+                    insert_s = f'insert $s{x} isa surface, ' \
+                               f'has name "surface-of-{name}", ' \
+                               f'has tag-number "{s_tag}";'
+                    row.insert(0, insert_s)
+                    entries.extend([(s_tag, 'tag-number', 'surface'), (f'surface-of-{name}', 'name', 'surface')])
+                    print(color.c3(insert_s)) if verbose else None
+                yield row
+
+        def relation_queries(self, transaction, thing, rows, plan, verbose=True):
+            """
+            Builds the match-insert queries of every row of a relation data file.
+            :param transaction: transaction used to resolve the concept types
+            :param thing: relation type of the data file
+            :param rows: rows of the data file (lists of values, see csv_rows)
+            :param plan: ColumnPlan compiled from the header of the data file
+            :param verbose: prints the queries
+            :return: yields the list of insert queries of each row
+            """
+            for x, values in enumerate(rows):
+                q1 = f'match'
+                q2 = f' insert $rel{x} ('
+                for k, column in enumerate(plan.columns):
+                    d_values = column.value(values)
+                    concept = d_values.split(" : ")[0]
+                    c_type = find_type(transaction, concept)
+                    role = column.role                          # For multiple roles with same name (role*)
+                    a_name = column.attribute
+                    a_value = d_values.split(" : ")[1]
+                    if a_value:
+                        q1 += f' $v{x + 1}{k} isa {concept},'
+                        if column.multi:                        # For multiple attributes
+                            if "|" in a_value:                  # For multiple attributes
+                                a_parts = a_value.split(" | ")
+                                for i, a in enumerate(a_parts):
+                                    if a != '-':
+                                        q1 = query_builder(q1, column.attributes[i], a, 'entity', '',
+                                                           column.converters[i])
+                                        q1 = q1 + ',' if i < len(a_parts) - 1 else q1 + ';'
+                            else:
+                                if c_type.split(":")[0] == 'entity':
+                                    q1 = query_builder(q1, column.attributes[0], a_value, 'entity', None,
+                                                       column.converters[0])
+                                    q1 += ';'
+                                else:
+                                    q1 = query_builder(q1, x + 1, a_value, None, None, plan.converter(concept))
+                        else:
+                            if c_type.split(":")[0] == 'entity':
+                                # q1 += f' $v{x + 1}{k} isa {concept},'
+                                q1 = query_builder(q1, a_name, a_value, 'entity', None, column.converters[0])
+                                q1 += ';'
+                            else:
+                                # q1 += f' $v{x + 1}{k} isa {concept};'
+                                q1 = query_builder(q1, x + 1, a_value, None, None, plan.converter(concept))
+                    else:
+                        q1 += f' $v{x + 1}{k} isa {concept};'
+                    q2 += f'{role}: $v{x + 1}{k}'
+                    q2 += f', ' if not column.last else ')'
+                q3 = f' isa {thing};'
+                insert_query = q1 + q2 + q3
+                print(f'{color.cyan(insert_query)}') if verbose else None
+                yield [insert_query]
+
+        def row_queries(self, transaction, concept_type, thing, rows, plan, verbose=True, entries=None):
+            if concept_type == 'entity':
+                return self.entity_queries(transaction, thing, rows, plan, verbose, entries)
+            elif concept_type == 'relation':
+                return self.relation_queries(transaction, thing, rows, plan, verbose)
+            return iter([])
+
+        def load_data(self, db_name, concept_type=None, commitment=False, batch_size=None, workers=1, verbose=True):
+            """
+            This function loads the data files of a concept type (entity or relation) into the database.
+            By default each file is inserted row by row in a single write transaction.
+            With batch_size, the bulk-load mode splits each file in transactions of batch_size rows
+            and keeps up to 'workers' write transactions in flight at once.
+            :param db_name: name of the database
+            :param concept_type: 'entity' or 'relation'
+            :param commitment: commits the transactions
+            :param batch_size: rows per write transaction (bulk-load mode)
+            :param workers: write transactions in flight at once (bulk-load mode)
+            :param verbose: prints every insert query
+            """
             inputs = self.file_paths(concept_type)
-            with self.client.session(db_name, self.session_type) as session:
-                for i in inputs:
-                    print(color.c3('\n' + "\u2501" * 175 + '\n'))
-                    print(box.l_cyan(f'DATA FILE: {i["data_path"].split("/")[-1]}.csv'))
-                    thing = i["data_path"].split("/")[-1]
-                    items = csv_to_dict_list(i)
-
-                    with session.transaction(TransactionType.WRITE) as transaction:
-                        if concept_type == 'entity':
-                            for item_dict, x in zip(items, range(0, len(items))):
-                                q = f'insert $v{x} isa {thing},'
-                                for j in range(0, len(item_dict)):
-                                    # Query constructors - concepts, attributes and roles
-                                    a_key = list(item_dict.keys())[j]           # attribute key j
-                                    a_value = list(item_dict.values())[j]       # attribute value j
-                                    # SPECIAL CASE ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-                                    if ":" in a_value:
-                                        attribute = a_key.split(" : ")[1]
-                                        a_key = a_value.split(" : ")[0]
-                                        if "|" in attribute:
-                                            if " | " in a_value.split(" : ")[1]:
-                                                a_list = a_value.split(" : ")[1]
-                                                q = f'insert $v{x} isa {a_key},'
-                                                for n, a in enumerate(a_list.split(" | ")):
-                                                    q += f' has {attribute.split(" | ")[n]} "{str(a)}"'
-                                                    q += f',' if n < len(a_list.split(" | ")) - 1 else ''
-                                            else:
-                                                a_list = a_value.split(" : ")[1]
-                                                q = f'insert $v{x} isa {a_key},'
-                                                q += f' has {attribute.split(" | ")[0]} "{str(a_list)}"'
-                                        else:
-                                            a_value = a_value.split(" : ")[1]
-                                            key_type = find_type(transaction, a_key)
-                                            if str(key_type).split(":")[0] == 'entity':
-                                                q = f'insert $v{x} isa {a_key},'
-                                                q += f' has {attribute} "{str(a_value)}"'
-                                            else:
-                                                q = query_builder(q, a_key, a_value, 'entity')
-                                                q += ';'
-                                                q += f' $v{x} "{str(a_key)}"'
-                                                q += f',' if j < len(item_dict) - 1 else ''
-                                    # NORMAL CASE ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-                                    else:
-                                        q = query_builder(q, a_key, a_value, concept_type, '')
-                                    q += f',' if j < len(item_dict) - 1 else ''
-                                q += f';'
-                                # FOR SURFACES ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-                                if item_dict.get('tag-number', 0) != 0:
-                                    s_tag = item_dict['tag-number']
-                                    name = item_dict['element-type']
-                                    insert_s = f'insert $s{x} isa surface, ' \
-                                               f'has name "surface-of-{name}", ' \
-                                               f'has tag-number "{s_tag}";'
-                                    transaction.query().insert(insert_s)
-                                print(f'{color.c4(q)}')
-                                print(color.c3(insert_s))
-                                transaction.query().insert(q)
-                            transaction.commit() if commitment else None
-                        elif concept_type == 'relation':
-                            for item_dict, x in zip(items, range(0, len(items))):
-                                q1 = f'match'
-                                q2 = f' insert $rel{x} ('
-                                for k in range(0, int(len(item_dict.keys()))):
-                                    d_keys = list(item_dict.keys())[k]
-                                    d_values = list(item_dict.values())[k]
-                                    concept = d_values.split(" : ")[0]
-                                    c_type = find_type(transaction, concept)
-                                    role = d_keys.split(" : ")[0]
-                                    # For multiple roles with same name
-                                    role = role.split("*")[0] if "*" in role else role
-                                    a_name = d_keys.split(" : ")[1]
-                                    a_value = d_values.split(" : ")[1]
-                                    if a_value:
-                                        q1 += f' $v{x + 1}{k} isa {concept},'
-                                        if "|" in a_name:               # For multiple attributes
-                                            if "|" in a_value:          # For multiple attributes
-                                                for i, a in enumerate(a_value.split(" | ")):
-                                                    if a_value.split(" | ")[i] != '-':
-                                                        q1 = query_builder(q1, a_name.split(" | ")[i], a, 'entity', '')
-                                                        q1 = q1 + ',' if i < len(a_value.split(" | ")) - 1 else q1 + ';'
-                                            else:
-                                                if c_type.split(":")[0] == 'entity':
-                                                    q1 = query_builder(q1, a_name.split(" | ")[0], a_value, 'entity')
-                                                    q1 += ';'
-                                                else:
-                                                    q1 = query_builder(q1, x + 1, a_value)
-                                        else:
-                                            if c_type.split(":")[0] == 'entity':
-                                                # q1 += f' $v{x + 1}{k} isa {concept},'
-                                                q1 = query_builder(q1, a_name, a_value, 'entity')
-                                                q1 += ';'
-                                            else:
-                                                # q1 += f' $v{x + 1}{k} isa {concept};'
-                                                q1 = query_builder(q1, x + 1, a_value)
-                                    else:
-                                        q1 += f' $v{x + 1}{k} isa {concept};'
-                                    q2 += f'{role}: $v{x + 1}{k}'
-                                    q2 += f', ' if k < int(len(item_dict.keys()) - 1) else ')'
-                                q3 = f' isa {thing};'
-                                insert_query = q1 + q2 + q3
-                                print(f'{color.cyan(insert_query)}')
-                                transaction.query().insert(insert_query)
-                            transaction.commit() if commitment else None
-                        transaction.close()
-
-        def unload_data(self, db_name):
-            with self.client.session(db_name, self.session_type) as session:
-                with session.transaction(TransactionType.WRITE) as transaction:
+            loader = BulkLoader(db_name, batch_size, workers, commitment) if batch_size else None
+            for i in inputs:
+                self.load_file(db_name, i, concept_type, commitment, loader, verbose)
+            loader.report() if loader is not None else None
+
+        def load_file(self, db_name, i, concept_type, commitment=False, loader=None, verbose=True):
+            """
+            This function loads one data file into the database.
+            :param db_name: name of the database
+            :param i: file dictionary {"data_path": path without extension}
+            :param concept_type: 'entity' or 'relation'
+            :param commitment: commits the transaction(s)
+            :param loader: BulkLoader of the bulk-load mode (None for a single write transaction)
+            :param verbose: prints every insert query
+            """
+            print(color.c3('\n' + "\u2501" * 175 + '\n'))
+            print(box.l_cyan(f'DATA FILE: {i["data_path"].split("/")[-1]}.csv'))
+            thing = i["data_path"].split("/")[-1]
+            header = csv_header(i)
+            rows = csv_rows(i)                                  # rows streamed from the file
+            entries = []                                        # new key attribute values (value index)
+
+            if loader is not None:
+                # BULK-LOAD MODE ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+                with self.connection.transaction(db_name, self.session_type, TransactionType.READ) as tx:
+                    plan = self.column_plan(tx, header, concept_type)
+                    loader.load(thing, self.row_queries(tx, concept_type, thing, rows, plan, verbose, entries))
+                value_index.add_all(entries) if commitment else None
+                relation_cache.bump() if commitment else None
+                return
+
+            with self.connection.transaction(db_name, self.session_type, TransactionType.WRITE) as transaction:
+                plan = self.column_plan(transaction, header, concept_type)
+                for row in self.row_queries(transaction, concept_type, thing, rows, plan, verbose, entries):
+                    for q in row:
+                        transaction.query().insert(q)
+                transaction.commit() if commitment else None
+            value_index.add_all(entries) if commitment else None
+            relation_cache.bump() if commitment else None
+
+        @staticmethod
+        def column_plan(transaction, header, concept_type):
+            """
+            Compiles the header of a data file (parsed columns and one value converter per attribute,
+            from the value types of the schema cache).
+            """
+            value_types = type_cache.value_types if type_cache.ensure(transaction) else None
+            return ColumnPlan(header, concept_type, value_types)
+
+        def load_all(self, db_name, commitment=False, workers=4, batch_size=None, verbose=False):
+            """
+            This function loads the entity_data and relation_data folders at once. The files are
+            scheduled on a worker pool following their dependencies: a relation file waits only for
+            the files that insert the concepts its role columns reference (see IngestionScheduler).
+            :param db_name: name of the database
+            :param commitment: commits the transactions
+            :param workers: files loaded at once
+            :param batch_size: rows per write transaction (bulk-load mode inside each file)
+            :param verbose: prints every insert query
+            """
+            scheduler = IngestionScheduler(self, db_name, workers, commitment, batch_size, verbose)
+            return scheduler.run()
+
+        def unload_data(self, db_name, batch_size=None):
+            """
+            This function deletes all the data of the database.
+            :param db_name: name of the database
+            :param batch_size: things deleted per write transaction - the data is deleted type by type
+                               (relations before their role players, attributes last) and every batch
+                               is committed, so an interrupted unload resumes where it stopped.
+                               None deletes everything in a single write transaction.
+            """
+            print(box.e7(f"\u26A0\u0009 > (WARNING!) ALL DATA IS BEING DELETED"))
+            if batch_size is None:
+                with self.connection.transaction(db_name, self.session_type, TransactionType.WRITE) as transaction:
                     delete_query = f'match $t isa thing; delete $t isa thing;'
-                    print(box.e7(f"\u26A0\u0009 > (WARNING!) ALL DATA IS BEING DELETED"))
                     transaction.query().delete(delete_query)
                     transaction.commit()
-                print(box.e2(f"\u26A0\u0009 > (WARNING!)   ALL DATA IS NOW DELETED"))
-                transaction.close()
+            else:
+                start = time.time()
+                total = 0
+                for label in self.unload_order(db_name):
+                    total += self.unload_type(db_name, label, batch_size)
+                print(box.c3(f'UNLOAD > ({total}) things in {time.time() - start:.2f} s'))
+            value_index.invalidate()
+            relation_cache.bump()
+            print(box.e2(f"\u26A0\u0009 > (WARNING!)   ALL DATA IS NOW DELETED"))
+
+        def unload_order(self, db_name):
+            """
+            :return: types in deletion order - the relation types, then the entity types, then the attribute
+                     types (the types of each root are listed subtypes first; every type only deletes the
+                     instances of exactly that type, see unload_type)
+            """
+            with self.connection.transaction(db_name, SessionType.SCHEMA, TransactionType.READ) as tx:
+                hierarchy = TypeHierarchy.load(tx)
+            return [concept for thing in ['relation', 'entity', 'attribute']
+                    for concept in reversed(hierarchy.ordered(thing))]
 
-        def update_data(self):
-            pass
+        def unload_type(self, db_name, label, batch_size):
+            """
+            Deletes every instance of exactly one type (isa!), batch_size instances per committed write transaction.
+            :param db_name: name of the database
+            :param label: type label
+            :param batch_size: things deleted per write transaction
+            :return: number of things deleted
+            """
+            with self.connection.transaction(db_name, self.session_type, TransactionType.READ) as tx:
+                remaining = tx.query().match_aggregate(f'match $t isa! {label}; get $t; count;').get().as_int()
+            if not remaining:
+                return 0
+            start = time.time()
+            deleted = 0
+            while True:
+                with self.connection.transaction(db_name, self.session_type, TransactionType.WRITE) as transaction:
+                    match_query = f'match $t isa! {label}; get $t; limit {batch_size};'
+                    iids = [cmap.get('t').get_iid() for cmap in match_rows(transaction, match_query)]
+                    if iids:                                    # the whole batch in one delete query
+                        disjunction = ' or '.join(f'{{$t iid {iid};}}' for iid in iids)
+                        transaction.query().delete(f'match $t isa! {label}; {disjunction}; delete $t isa {label};')
+                        transaction.commit()
+                deleted += len(iids)
+                print(color.red(f' Deleting... {label} {deleted}/{remaining}'), end='\r')
+                if len(iids) < batch_size:
+                    break
+            elapsed = time.time() - start
+            print(color.red(f' Deleting... {label} {deleted}/{remaining}'), f'in {elapsed:.2f} s')
+            return deleted
+
+        def update_data(self, db_name, concept_type=None, commitment=False, verbose=True):
+            """
+            This function applies the changes of the data files of a concept type (entity or relation) to the
+            database, writing only the inserted, updated and deleted rows (see DataSync).
+            :param db_name: name of the database
+            :param concept_type: 'entity' or 'relation'
+            :param commitment: commits the transactions
+            :param verbose: prints the queries
+            :return: dictionary with the total number of inserted, updated and deleted rows
+            """
+            data_sync = DataSync(self, db_name, commitment, verbose)
+            totals = {'inserted': 0, 'updated': 0, 'deleted': 0}
+            for i in self.file_paths(concept_type):
+                print(color.c3('\n' + "\u2501" * 175 + '\n'))
+                print(box.l_cyan(f'DATA FILE: {i["data_path"].split("/")[-1]}.csv'))
+                counts = data_sync.sync_file(i, concept_type)
+                for key in totals:
+                    totals[key] += counts[key]
+            return totals
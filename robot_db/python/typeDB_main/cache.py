@@ -0,0 +1,276 @@
+"""
+                    Project MOSASAUR - cache.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Cache file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from project.robot_db.python.typeDB_main.instrument import match_rows
+from collections import OrderedDict
+import threading
+import copy
+
+
+class TypeCache:
+    """
+    In-memory copy of the type labels of the schema, used by find_type to resolve
+    labels, role names and prepositions without a server round trip.
+    It is filled from the schema snapshot when the data session is opened (see snapshot.py), or
+    else with one query per root type (entity, attribute, relation) plus one for the roles, the
+    first time a transaction asks for it. It must be invalidated whenever the schema changes
+    (load_schema, delete_schema, rule_builder).
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.failed = False
+        self.kinds = {}                                         # label -> 'entity' | 'attribute' | 'relation'
+        self.roles = {}                                         # role name -> relation label
+        self.value_types = {}                                   # attribute label -> long | double | ...
+
+    def load(self, tx):
+        kinds = {}
+        roles = {}
+        value_types = {}
+        for root in ['entity', 'attribute', 'relation']:
+            for cmap in match_rows(tx, f'match $t sub {root}; get $t;'):
+                concept = cmap.get('t')
+                kinds[concept.get_label().name()] = root
+                if root == 'attribute':
+                    value_type = concept.as_attribute_type().get_value_type()
+                    value_types[concept.get_label().name()] = str(getattr(value_type, 'name', value_type)).lower()
+        for cmap in match_rows(tx, 'match $r sub relation; $r relates $role; get $r, $role;'):
+            role = cmap.get('role').get_label().name()
+            roles.setdefault(role, cmap.get('r').get_label().name())
+        with self.lock:
+            self.kinds = kinds
+            self.roles = roles
+            self.value_types = value_types
+            self.loaded = True
+
+    def load_snapshot(self, snapshot):
+        """
+        Fills the cache from a SchemaSnapshot (no query to the server).
+        :param snapshot: SchemaSnapshot of the database
+        """
+        with self.lock:
+            self.kinds = dict(snapshot.kinds)
+            self.roles = snapshot.roles()
+            self.value_types = dict(snapshot.value_types)
+            self.loaded = True
+            self.failed = False
+
+    def ensure(self, tx):
+        """
+        Loads the cache from the transaction if it is empty.
+        :param tx: open transaction
+        :return: True if the cache can be used
+        """
+        if self.loaded:
+            return True
+        with self.lock:
+            if not self.loaded and not self.failed:
+                try:
+                    self.load(tx)
+                except Exception:
+                    self.failed = True                          # not retried until the next invalidation
+            return self.loaded
+
+    def kind(self, label):
+        return self.kinds.get(label)
+
+    def relation_of(self, role):
+        return self.roles.get(role)
+
+    def value_type(self, label):
+        return self.value_types.get(label)
+
+    def invalidate(self):
+        with self.lock:
+            self.loaded = False
+            self.failed = False
+            self.kinds = {}
+            self.roles = {}
+            self.value_types = {}
+
+
+type_cache = TypeCache()
+
+
+class ValueIndex:
+    """
+    Reverse index value -> (attribute type, owner types) of the key attributes, used by find_type and
+    element_type instead of the unanchored 'match $x "<value>"' scan. It is built with one bulk read
+    of every ownership of the key attributes and updated incrementally by DataHandling.load_data.
+    """
+    key_attributes = ['tag-number', 'element-type', 'name', 'command-type', 'function']
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.failed = False
+        self.attributes = []                                    # key attributes defined in the schema
+        self.values = {}                                        # value -> {attribute type: [owner types]}
+
+    def load(self, tx):
+        if not type_cache.ensure(tx):
+            raise LookupError('type cache unavailable')
+        attributes = [a for a in self.key_attributes if type_cache.kind(a) == 'attribute']
+        values = {}
+        if attributes:
+            disjunction = ' or '.join(f'{{$a isa {a};}}' for a in attributes)
+            query = f'match $o has $a; {disjunction}; get $o, $a;'
+            for cmap in match_rows(tx, query):
+                attribute = cmap.get('a').as_attribute()
+                owner = cmap.get('o').get_type().get_label().name()
+                label = attribute.get_type().get_label().name()
+                owners = values.setdefault(str(attribute.get_value()), {}).setdefault(label, [])
+                if owner not in owners:
+                    owners.append(owner)
+        with self.lock:
+            self.attributes = attributes
+            self.values = values
+            self.loaded = True
+
+    def ensure(self, tx):
+        """
+        Builds the index from the transaction if it is empty.
+        :param tx: open transaction
+        :return: True if the index can be used
+        """
+        if self.loaded:
+            return True
+        with self.lock:
+            if not self.loaded and not self.failed:
+                try:
+                    self.load(tx)
+                except Exception:
+                    self.failed = True                          # not retried until the next invalidation
+            return self.loaded
+
+    def attribute_of(self, tx, value):
+        """
+        :return: label of the key attribute type holding the value, None if no key attribute holds it
+        """
+        if not self.ensure(tx):
+            return None
+        labels = self.values.get(value)
+        return next(iter(labels)) if labels else None
+
+    def owners(self, tx, attribute, value, kind='entity'):
+        """
+        :return: owner types of the attribute value (only of the given root kind), None if not indexed
+        """
+        if not self.ensure(tx) or attribute not in self.attributes:
+            return None
+        owners = self.values.get(value, {}).get(attribute, [])
+        return [o for o in owners if kind is None or type_cache.kind(o) == kind]
+
+    def add(self, value, attribute, owner):
+        with self.lock:
+            if not self.loaded or attribute not in self.attributes:
+                return
+            owners = self.values.setdefault(str(value), {}).setdefault(attribute, [])
+            if owner not in owners:
+                owners.append(owner)
+
+    def add_all(self, entries):
+        for value, attribute, owner in entries:
+            self.add(value, attribute, owner)
+
+    def invalidate(self):
+        with self.lock:
+            self.loaded = False
+            self.failed = False
+            self.attributes = []
+            self.values = {}
+
+
+value_index = ValueIndex()
+
+
+def freeze(value):
+    """
+    :return: hashable copy of an argument (lists and tuples become tuples)
+    """
+    return tuple(freeze(v) for v in value) if isinstance(value, (list, tuple)) else value
+
+
+class RelationCache:
+    """
+    Bounded LRU cache of the results of auxiliary.get_relations, keyed on its arguments and on the
+    data version. The data version is bumped by every write of the data or of the rules (load_data,
+    unload_data, update_data, load_schema, delete_schema, rule_builder), so the results cached before
+    a write are never returned after it.
+    The results are copied in and out of the cache, as the callers modify the relation dictionaries.
+    """
+    def __init__(self, maxsize=256):
+        self.lock = threading.Lock()
+        self.maxsize = maxsize
+        self.version = 0                                        # data version
+        self.entries = OrderedDict()                            # key -> result (least recently used first)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, *args):
+        return (self.version,) + freeze(args)
+
+    def get(self, key):
+        """
+        :return: copy of the cached result, None if the key is not cached
+        """
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            result = self.entries[key]
+        return copy.deepcopy(result)
+
+    def put(self, key, result):
+        result = copy.deepcopy(result)
+        with self.lock:
+            if key[0] != self.version:                          # the data changed while the query ran
+                return
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def bump(self):
+        """
+        New data version: drops every cached result.
+        """
+        with self.lock:
+            self.version += 1
+            self.entries.clear()
+
+    def clear(self):
+        """
+        Drops every cached result, keeping the data version (e.g. to time get_relations uncached).
+        """
+        with self.lock:
+            self.entries.clear()
+
+
+relation_cache = RelationCache()
@@ -0,0 +1,84 @@
+"""
+                    Project MOSASAUR - client_standin.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+TypeDB client stand-in file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import importlib.util
+import enum
+import types
+import sys
+
+
+class SessionType(enum.Enum):
+    DATA = 0
+    SCHEMA = 1
+
+
+class TransactionType(enum.Enum):
+    READ = 0
+    WRITE = 1
+
+
+class TypeDBOptions:
+    """
+    Reasoning options of a transaction (the ones read by the model and by the StandInClient).
+    """
+    def __init__(self):
+        self.infer = None
+        self.explain = None
+
+    @staticmethod
+    def core():
+        return TypeDBOptions()
+
+
+class TypeDB:
+    DEFAULT_ADDRESS = 'localhost:1729'
+
+    @staticmethod
+    def core_client(address):
+        raise ConnectionError(f'typedb-client is not installed - no TypeDB server at {address} '
+                              f'(install a StandInClient, see standin.install)')
+
+
+def register():
+    """
+    Makes 'typedb.client' importable when typedb-client is not installed, with the enums and options above,
+    so the benchmark and the tests run on the StandInClient alone. Does nothing if typedb-client is there.
+    :return: True if the stand-in module was registered
+    """
+    if 'typedb.client' in sys.modules or importlib.util.find_spec('typedb') is not None:
+        return False
+    client = types.ModuleType('typedb.client')
+    client.SessionType, client.TransactionType = SessionType, TransactionType
+    client.TypeDBOptions, client.TypeDB = TypeDBOptions, TypeDB
+    package = types.ModuleType('typedb')
+    package.__path__ = []
+    package.client = client
+    sys.modules['typedb'], sys.modules['typedb.client'] = package, client
+    return True
+
+
+register()
@@ -0,0 +1,201 @@
+"""
+                    Project MOSASAUR - connection.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Connection file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typedb.client import TypeDB, SessionType, TransactionType
+from project.robot_db.python.typeDB_main.cache import type_cache
+from project.robot_db.python.typeDB_main.snapshot import schema_snapshot
+from contextlib import contextmanager
+import threading
+import atexit
+
+
+class ConnectionManager:
+    """
+    Process-wide owner of the TypeDB client. It keeps one warm session per (database, session type)
+    and a pool of idle READ transactions per (database, session type, options), so the short commands
+    of the situation awareness procedure do not pay the session open/close round trip every time.
+    WRITE transactions are never pooled: they are opened on demand and closed after use, and the
+    pooled READ transactions of that database are dropped since they no longer see the latest data.
+    """
+    def __init__(self, address=TypeDB.DEFAULT_ADDRESS, pool_size=4):
+        self.address = address
+        self.pool_size = pool_size
+        self.client = None
+        self.sessions = {}                                      # (db_name, session_type) -> session
+        self.pools = {}                                         # (db_name, session_type, options) -> [tx]
+        self.generation = {}                                    # db_name -> number of invalidations
+        self.lock = threading.RLock()
+
+    def get_client(self):
+        with self.lock:
+            if self.client is None or not self.client.is_open():
+                self.client = TypeDB.core_client(address=self.address)
+            return self.client
+
+    def session(self, db_name, session_type=SessionType.DATA):
+        """
+        Returns the warm session for the database, opening it on first use (or if it was closed).
+        The session is owned by the manager - do NOT use it in a 'with' block.
+        :param db_name: name of the database
+        :param session_type: SessionType.DATA or SessionType.SCHEMA
+        :return: open session
+        """
+        with self.lock:
+            key = (db_name, session_type)
+            session = self.sessions.get(key)
+            if session is None or not session.is_open():
+                self.drop_pool(db_name, session_type)
+                session = self.get_client().session(db_name, session_type)
+                self.sessions[key] = session
+                if session_type == SessionType.DATA and not type_cache.loaded:
+                    self.warm(db_name)                      # schema labels ready before the first command
+            return session
+
+    def warm(self, db_name):
+        """
+        Fills the type cache from the schema snapshot of the database, falling back to the
+        schema queries of TypeCache.load if the snapshot cannot be read.
+        :param db_name: name of the database
+        """
+        try:
+            type_cache.load_snapshot(schema_snapshot(self.get_client(), db_name))
+        except Exception:
+            with self.transaction(db_name, SessionType.DATA) as tx:
+                type_cache.ensure(tx)
+
+    @staticmethod
+    def options_key(options):
+        if options is None:
+            return None
+        return getattr(options, 'infer', None), getattr(options, 'explain', None)
+
+    @contextmanager
+    def transaction(self, db_name, session_type=SessionType.DATA, tx_type=TransactionType.READ, options=None):
+        """
+        Hands out a transaction on the warm session of the database.
+        READ transactions are taken from (and given back to) the pool of matching options.
+        WRITE transactions are closed on exit; commit them inside the 'with' block as usual.
+        :param db_name: name of the database
+        :param session_type: SessionType.DATA or SessionType.SCHEMA
+        :param tx_type: TransactionType.READ or TransactionType.WRITE
+        :param options: TypeDBOptions of the transaction (None for the server defaults)
+        :return: open transaction
+        """
+        if tx_type == TransactionType.WRITE:
+            tx = self.open_transaction(db_name, session_type, tx_type, options)
+            try:
+                yield tx
+            finally:
+                if tx.is_open():
+                    tx.close()
+                self.invalidate(db_name)
+            return
+
+        key = (db_name, session_type, self.options_key(options))
+        tx = None
+        with self.lock:
+            generation = self.generation.get(db_name, 0)
+            pool = self.pools.setdefault(key, [])
+            while pool and tx is None:
+                candidate = pool.pop()
+                tx = candidate if candidate.is_open() else None
+        if tx is None:
+            tx = self.open_transaction(db_name, session_type, tx_type, options)
+        try:
+            yield tx
+        except BaseException:
+            # gRPC aborts the whole transaction on a query error, never give it back to the pool
+            if tx.is_open():
+                tx.close()
+            raise
+        else:
+            with self.lock:
+                pool = self.pools.setdefault(key, [])
+                fresh = generation == self.generation.get(db_name, 0)
+                if tx.is_open() and fresh and len(pool) < self.pool_size:
+                    pool.append(tx)
+                elif tx.is_open():
+                    tx.close()
+
+    def open_transaction(self, db_name, session_type, tx_type, options=None):
+        session = self.session(db_name, session_type)
+        if options is None:
+            return session.transaction(tx_type)
+        return session.transaction(tx_type, options=options)
+
+    def drop_pool(self, db_name, session_type=None):
+        with self.lock:
+            for key in list(self.pools.keys()):
+                if key[0] == db_name and (session_type is None or key[1] == session_type):
+                    for tx in self.pools.pop(key):
+                        if tx.is_open():
+                            tx.close()
+
+    def invalidate(self, db_name):
+        """
+        Drops every pooled READ transaction of the database (after a commit they read an old snapshot).
+        :param db_name: name of the database
+        """
+        with self.lock:
+            self.generation[db_name] = self.generation.get(db_name, 0) + 1
+            self.drop_pool(db_name)
+
+    def close_sessions(self, db_name):
+        """
+        Closes the warm sessions of the database (required before deleting it).
+        :param db_name: name of the database
+        """
+        with self.lock:
+            self.drop_pool(db_name)
+            for key in list(self.sessions.keys()):
+                if key[0] == db_name:
+                    session = self.sessions.pop(key)
+                    if session.is_open():
+                        session.close()
+
+    def close(self):
+        with self.lock:
+            for db_name in {key[0] for key in self.sessions.keys()}:
+                self.close_sessions(db_name)
+            if self.client is not None and self.client.is_open():
+                self.client.close()
+            self.client = None
+
+
+manager = None
+manager_lock = threading.Lock()
+
+
+def connection():
+    """
+    Returns the process-wide ConnectionManager (created on first call).
+    """
+    global manager
+    with manager_lock:
+        if manager is None:
+            manager = ConnectionManager()
+            atexit.register(manager.close)
+        return manager
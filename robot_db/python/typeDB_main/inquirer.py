@@ -24,11 +24,21 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from typedb.client import SessionType, TransactionType, TypeDBOptions
+from typedb.client import SessionType, TransactionType
 from project.robot_db.python.typeDB_main.builder import BuildModel
 from project.robot_db.python.typeDB_main.auxiliary import *
 from project.robot_db.python.typeDB_main.color_text import Color, Box
-from project.robot_db.python.typeDB_main.decider import DecisionMaker
+from project.robot_db.python.typeDB_main.connection import connection
+from project.robot_db.python.typeDB_main.questions import Questions
+from project.robot_db.python.typeDB_main.report import SituationReport, ElementReport
+from project.robot_db.python.typeDB_main.proximity import rank_tools
+from project.robot_db.python.typeDB_main.telemetry import reasoning_options
+from project.robot_db.python.typeDB_main.tracing import tracer, traced
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from project.robot_db.python.typeDB_main.decider import DecisionMaker
+except ImportError:                                             # no decision module - no decision maker
+    DecisionMaker = None
 import copy
 color = Color()
 box = Box()
@@ -46,24 +56,83 @@ class QueryModel:
     def __init__(self):
         self.db_name = None
         self.client = BuildModel.Client().client
+        self.connection = connection()
         self.session_type = SessionType.DATA
         self.schema = BuildModel.Schema()
-        self.decision = DecisionMaker()
-        options = TypeDBOptions.core()
-        options.infer = True
-        options.explain = True
-        self.options = options
+        self.decision = DecisionMaker() if DecisionMaker is not None else None
+        self.options = reasoning_options(infer=True)            # command_line transaction - sites with inference
         self.copy = copy
         self.count = 0
+        self.workers = 8                                        # parallel READ transactions (concurrent mode)
+        self.executor = None
+
+    def question_executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='question')
+        return self.executor
+
+    def ask_questions(self, questions, command, e, pair2, prep1, position=None, interactive=True):
+        """
+        Registers the questions of a parsed phrase (see Questions). In concurrent mode the independent
+        branches start at once: the command lookups, the goal-location of the command, and the element
+        type -> relations -> location chains of the element and of the pair 2.
+        :param questions: Questions of the phrase
+        :param command: command of the phrase (0 if none)
+        :param e: element-1 or pair-1 of the phrase
+        :param pair2: pair-2 of the phrase (0 if none)
+        :param prep1: prep-1 of the phrase (0 if none)
+        :param position: actual location of the vehicle (ranks the tools of the command by distance)
+        :param interactive: prints the error of an unknown word (raises PhraseError otherwise, see find_type)
+        """
+        if command != 0:
+            questions.ask('command-type', lambda tx: find_type(tx, command, interactive).split(":")[1],
+                          find_type)
+            questions.ask('command-functions', lambda tx: goal_list(tx, command, 'function', 'attribute'), goal_list)
+            questions.ask('command-type-goals', lambda tx: goal_list(tx, command, "command-type"), goal_list)
+            questions.ask('tools', lambda tx: tool_list(tx, command), tool_list)
+            questions.ask('tool-ranking', lambda tx: rank_tools(tx, command, questions.answer('tools'), position),
+                          rank_tools) if position is not None else None
+            questions.ask('command-goals', lambda tx: goal_list(tx, command, questions.answer('command-type')),
+                          goal_list)
+        questions.ask('goal-location', lambda tx: goal_location(tx, command), goal_location)
+        if not e:
+            return
+        element, tag_number = (e[0], e[1]) if isinstance(e, list) else (e, None)
+        questions.ask(('element-type', element), lambda tx: element_type(tx, element, interactive), element_type)
+        questions.ask(('relations', element), lambda tx: get_relations(
+            tx, element, questions.answer(('element-type', element)), tag_number, pair2, prep1, interactive),
+                      get_relations)
+        questions.ask(('supertype', element), lambda tx: super_type(tx, questions.answer(('element-type', element)),
+                                                                     element), super_type)
+        if pair2:
+            questions.ask(('element-type', pair2[0]), lambda tx: element_type(tx, pair2[0], interactive),
+                          element_type)
+            questions.ask(('supertype', pair2[0]), lambda tx: super_type(tx, questions.answer(('element-type', pair2[0])),
+                                                                         pair2[0]), super_type)
+
+        def ask_locations(tx):
+            relations = questions.answer(('relations', element))
+            l_pair1, l_pair2 = relations[3], relations[4]
+            for lp in [l_pair1, l_pair2]:
+                if len(lp) == 1:
+                    questions.ask(('location', tuple(lp[0])), lambda t, loc=lp[0]: find_location(t, loc), find_location)
+            lp = l_pair2 if pair2 else l_pair1                  # location of the target (see command_line)
+            if len(lp) == 1:
+                target, tag = lp[0]
+                questions.ask(('element-type', target), lambda t: element_type(t, target, interactive), element_type)
+                questions.ask(('relations', target, tag), lambda t: get_relations(
+                    t, target, questions.answer(('element-type', target)), tag, interactive=interactive), get_relations)
+
+        questions.ask('locations', ask_locations)
 
     def open_tx(self):
         db_name = "robot_db"
-        with self.client.session(db_name, self.session_type) as session:
-            with session.transaction(TransactionType.READ, options=self.options) as tx:
-                print(tx.is_open())
-                return tx
+        tx = self.connection.open_transaction(db_name, self.session_type, TransactionType.READ, self.options)
+        print(tx.is_open())
+        return tx
 
-    def valid_input_phrase(self, p, reset_tx=''):
+    @traced('phrase validation')
+    def valid_input_phrase(self, p, reset_tx='', interactive=True):
         """
         This function checks if the input phrase is valid.
         NOTE: On the gRPC side, when an error occurs, the remote call is stopped.
@@ -71,30 +140,39 @@ class QueryModel:
         transaction is aborted (even on syntax errors)
         :param reset_tx:
         :param p: input phrase p
+        :param interactive: asks for a new phrase if it is not valid (raises PhraseError otherwise)
         :return p_dict: phrase in dictionary format
         """
         db_name = "robot_db"
-        with self.client.session(db_name, self.session_type) as session:
-            with session.transaction(TransactionType.READ, options=self.options) as tx:
-
-                if reset_tx != '':                                      # RESET TRANSACTION
-                    new_phrase = p                                      # RESET PHRASE
-                    p_dict = phrase2dict(tx, new_phrase)                # RESET PHRASE DICTIONARY
-                else:
-                    p_dict = phrase2dict(tx, p)                         # PHRASE DICTIONARY
-
-                if p_dict != {} and len(p_dict) > 1:                    # VALIDATE PHRASE IF NOT EMPTY
-                    return p_dict
-                else:
-                    new_phrase = input(f'INPUT NEW PHRASE \u25B6 ')     # ASK FOR NEW PHRASE
-                return self.valid_input_phrase(new_phrase, 'reset')     # RECURSIVE FUNCTION
-
-    def command_line(self, phrase=None, test_title=None):
+        options = reasoning_options()                               # type and tag-number lookups only
+        with self.connection.transaction(db_name, self.session_type, TransactionType.READ, options) as tx:
+
+            if reset_tx != '':                                      # RESET TRANSACTION
+                new_phrase = p                                      # RESET PHRASE
+                p_dict = phrase2dict(tx, new_phrase, interactive)   # RESET PHRASE DICTIONARY
+            else:
+                p_dict = phrase2dict(tx, p, interactive)            # PHRASE DICTIONARY
+
+            if p_dict != {} and len(p_dict) > 1:                    # VALIDATE PHRASE IF NOT EMPTY
+                return p_dict
+            elif not interactive:
+                raise PhraseError(f'invalid input phrase: "{p}"')
+            else:
+                new_phrase = input(f'INPUT NEW PHRASE \u25B6 ')     # ASK FOR NEW PHRASE
+            return self.valid_input_phrase(new_phrase, 'reset')     # RECURSIVE FUNCTION
+
+    @traced()
+    def command_line(self, phrase=None, test_title=None, concurrent=False, position=None):
         """
         This function is the main function of the class. It receives a phrase and returns the query.
+        The answers are computed by assess and printed by render.
         :param test_title:
         :param phrase:
-        :return:
+        :param concurrent: runs the independent questions of the phrase on parallel READ transactions
+                           (the answers are still printed in the original order)
+        :param position: actual location of the vehicle from the navigation system, (latitude, longitude)
+                         or (latitude, longitude, water-depth) - the tools of the command are ranked by distance
+        :return: SituationReport of the phrase
         """
 
         if test_title:
@@ -102,316 +180,410 @@ class QueryModel:
 
         phrase = '' if phrase is None else phrase           # SOLVES ERROR NUMBER 1 - NO INPUT PHRASE
         tab = '\u0009'                                      # ASCII TAB CHARACTER
-        db_name = "robot_db"                                # DATABASE NAME
-        qn = 0
-        with self.client.session(db_name, self.session_type) as session:
-            # with session.transaction(TransactionType.READ) as transaction:  # TO TESTE WITHOUT INFERENCE
-            with session.transaction(TransactionType.READ, options=self.options) as transaction:
 
-                d_phrase = self.valid_input_phrase(phrase)  # VALIDATE INPUT PHRASE (ERROR HANDLING)
+        d_phrase = self.valid_input_phrase(phrase)          # VALIDATE INPUT PHRASE (ERROR HANDLING)
+        report = self.assess(phrase, d_phrase, concurrent, position)
+        self.render(report)
 
-                print(box.c0(f'(INPUT PHRASE) > {phrase}', tab=5, division=True))
-                #      ╭──────────────────────╮
-                # ━━━━━┥ INPUT PHRASE ▶ phase ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-                #      ╰──────────────────────╯
+        if isinstance(report.error, ComplianceError):
+            print(color.e1(f'{tab * 2}' + f'{"─" * 120}'))
+            p = input(color.e1(f'\n{tab * 2}PLEASE ENTER A VALID COMMAND LINE \u25B6 '))
+            self.command_line(p, concurrent=concurrent, position=position)
 
-                print(box.c1(f'Command Line > {d_phrase}')) if d_phrase is not None else 0
-                print(color.c3('\n \u25B6 STARTING SITUATION AWARENESS PROCEDURE\n'))
-                '''
-                ╭──────────────────────────────────────────────────────────────────────────╮
-                │ Command Line ▶ {'command': '', element:, '', prep: '', 'pair': ['', '']} │
-                ╰──────────────────────────────────────────────────────────────────────────╯
-                '''
-                question0 = f'Q{qn}. What is my actual location (latitude, longitude) ?'
-                print(f' \u25B6 {question0}')
-                answer0 = 'location > (ACTUAL - from navigation system)'
-                complement_answer0 = 'name | latitude | longitude | Water Depth'
-                print(box.c1(answer0, complement_answer0, 0))
-
-                ''' ▶ Q0. What is my actual location (latitude, longitude) ?
-                ╭────────────────────────────────────────────╮ ╭───────────────────────────────────────────╮
-                │ location ▶ ACTUAL - from navigation system ├─┤ name | latitude | longitude | Water Depth │
-                ╰────────────────────────────────────────────╯ ╰───────────────────────────────────────────╯
-                '''
-                def return_element(name):
-                    return d_phrase.get(name, 0) if d_phrase is not None else 0
-
-                # Extract all elements from the phrase dictionary
-                command = return_element('command')
-                element1 = return_element('element-1')
-                pair1 = return_element('pair-1')
-                prep1 = return_element('prep-1')
-                element2 = return_element('element-2')
-                pair2 = return_element('pair-2')
-                prep2 = return_element('prep-2')
-                element3 = return_element('element-3')
-
-                # ━━┥ 1. COMMAND INQUIRE ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-                qn += 1
-                if command != 0:
-                    command_type = find_type(transaction, command).split(":")[1]
-                    command_list = goal_list(transaction, command, 'function', 'attribute')
-
-                    # print(link(transaction, command, pair1, pair2, linking=False)) NOT FOR HERE --> FOR EXECUTING
-
-                    if 'function' in command_list:
-                        use_tool = True
-                        a_name = "command-type"
-
-                        # QUESTION 1 - COMMAND
-                        question1f = f'Q{qn}. What kind of command is {color.c3(command)} ?'
-                        print(f'{tab * 2}\u25B6 {question1f}')
-                        answer1f = f'{command} > is a (tool function) and {goal_list(transaction, command, a_name)}'
-                        print(box.c3(answer1f, '\u25B6 Requires TOOL', 2))
-
-                        ''' ▶ Q1. What kind of command is command ?
-                            ╭───────────────────────────────────────────────────────╮ ╭─────────────────╮
-                            │ command ▶ is a tool function and ['A-goal', 'B-goal'] ├─┤ ▶ Requires TOOL │
-                            ╰───────────────────────────────────────────────────────╯ ╰─────────────────╯
-                        '''
-                        c_answer1f = f'Q{qn}a.What {color.c4("TOOL(s)")} are available for "{command}" command:'
-                        print(f'{tab * 4}' + '\u25B6 ' + c_answer1f)
-                        query_tool = f'match $x isa tool, has function "{str(command)}", ' \
-                                     f'has element-type $y; get $y;'
-                        tool_list = [e.map().get('y').as_attribute().get_value()
-                                     for e in list(match_query(transaction, query_tool))]
-                        print(box.c4(f'Tool list > ({tool_list})', '', 4))
-
-                        '''     ▶ TOOL(s) available for "clean" command:
-                                ╭────────────────────────────────────────────╮
-                                │ Tool list ▶ ['tool-A', 'tool-B', 'tool-C'] │
-                                ╰────────────────────────────────────────────╯
-                        '''
-                    else:
-                        use_tool = False
-
-                        # QUESTION 1 - COMMAND
-                        question1 = f'Q{qn}. What kind of command is {color.c3(command)} ?'
-                        print(f'{tab * 2}\u25B6 {question1}')
-                        answer1 = f'{command} > is a {goal_list(transaction, command, command_type)}'
-                        print(box.c3(answer1, '', 2))
-
-                        ''' ▶ Q1. What kind of command is command ?
-                            ╭───────────────────────────╮
-                            │ command ▶ is a ['A-goal'] │
-                            ╰───────────────────────────╯
-                        '''
-                else:
-                    print(color.yellow(f" \u25B6\u0009INPUT A COMMAND (look at inquirer.py in COMMAND)"))
-
-                # Verify if command requires more than one element - attribute 'goal-location'
-                # TEST TO SEE IF THE COMMAND REQUIRES 1 OR 2 ELEMENTS
+        elif isinstance(report.error, LocationError):
+            print(color.e1(f'{tab * 2}' + f'{"─" * 120}'))
+            p = input(color.e1(f'\n{tab * 2}MISSING LOCATION - PLEASE ENTER A COMPLETE COMMAND LINE \u25B6 '))
+            self.command_line(p, concurrent=concurrent, position=position)
+        return report
 
-                prep_q = f'match $x isa goal, has command-type "{command}", has goal-location $gl; get $gl;'
-                prep_iter = list(match_query(transaction, prep_q))
-                prep_test = prep_iter[0].map().get('gl').as_attribute().get_value() if prep_iter != [] else ''
+    @traced()
+    def situation_report(self, phrase, concurrent=False, position=None):
+        """
+        Headless mode of command_line: nothing is printed and nothing is asked.
+        :param phrase: input phrase
+        :param concurrent: runs the independent questions of the phrase on parallel READ transactions
+        :param position: actual location of the vehicle (see command_line)
+        :return: SituationReport of the phrase
+        :raise PhraseError: invalid phrase (unknown word, MissingIdError, TagNumberError with the available tag-numbers)
+        :raise ComplianceError, LocationError: procedure stopped - the partial report is in error.report
+        """
+        d_phrase = self.valid_input_phrase('' if phrase is None else phrase, interactive=False)
+        report = self.assess(phrase, d_phrase, concurrent, position, interactive=False)
+        if report.error is not None:
+            raise report.error
+        return report
 
-                # ━━┥ 2. ELEMENT / PAIR INQUIRE ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    def assess(self, phrase, d_phrase, concurrent=False, position=None, interactive=True):
+        """
+        Answers the questions of the situation awareness procedure for a parsed phrase (no output).
+        :param phrase: input phrase
+        :param d_phrase: phrase dictionary (see valid_input_phrase)
+        :param concurrent: runs the independent questions on parallel READ transactions
+        :param position: actual location of the vehicle (see command_line)
+        :param interactive: prints the error of an unknown word (raises PhraseError otherwise, see find_type)
+        :return: SituationReport
+        """
+        db_name = "robot_db"                                # DATABASE NAME
+        report = SituationReport(phrase, d_phrase)
+        with tracer.span('Q0 location'):
+            report.position = position                      # navigation system (nearest tools in Q1)
+        # with session.transaction(TransactionType.READ) as transaction:  # TO TESTE WITHOUT INFERENCE
+        with self.connection.transaction(db_name, self.session_type, TransactionType.READ, self.options) as transaction:
+
+            def return_element(name):
+                return d_phrase.get(name, 0) if d_phrase is not None else 0
+
+            # Extract all elements from the phrase dictionary
+            command = return_element('command')
+            element1 = return_element('element-1')
+            pair1 = return_element('pair-1')
+            prep1 = return_element('prep-1')
+            pair2 = return_element('pair-2')
+
+            questions = Questions(self.connection, db_name, self.session_type, self.options, transaction,
+                                  self.question_executor() if concurrent else None)
+            self.ask_questions(questions, command, element1 if element1 != 0 else pair1, pair2, prep1, position,
+                               interactive)
+
+            # ━━┥ 1. COMMAND INQUIRE ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+            with tracer.span('Q1 command inquiry'):
+                report.command = command
+                if command != 0:
+                    report.command_type = questions.answer('command-type')
+                    command_list = questions.answer('command-functions')
+                    report.use_tool = 'function' in command_list
+                    if report.use_tool:
+                        report.goals = questions.answer('command-type-goals')
+                        report.tools = questions.answer('tools')
+                        if position is not None:                    # nearest tools first (see ProximityIndex)
+                            report.tool_distances = questions.answer('tool-ranking') or {}
+                            report.tools = list(report.tool_distances) + \
+                                [t for t in report.tools if t not in report.tool_distances]
+                    else:
+                        report.goals = questions.answer('command-goals')
 
-                qn += 1
+            # Verify if command requires more than one element - attribute 'goal-location'
+            with tracer.span('goal-location check'):
+                report.goal_location = questions.answer('goal-location')
 
-                def inquiry_element(e):
-                    # Verifies if element is a list or a pair of elements
-                    tag_number = None
-                    if isinstance(e, list):
-                        element = e[0]
-                        tag_number = e[1]
-                    else:
-                        element = e
-
-                    e_type = element_type(transaction, element)
-                    g_list = goal_list(transaction, command, command_type)
-
-                    def inquiry_answer():
-                        relations_dicts = get_relations(transaction, element, e_type, tag_number, pair2, prep1)
-                        f_rxy_dict, f_rxz_dict, f_rwz_dict, l_pair1, l_pair2, l_dict, coord_list = relations_dicts
-
-                        def build_question(tx, e, p_tag=None, pair2=False):
-                            tab = '\u0009'
-                            question2 = f'Q{qn}.What kind of element is {color.c3(e)} ?'
-                            print(color.c3(f'{tab * 2}' + f'{"─" * 120}'))
-                            print(f'{tab * 2}\u25B6 {question2}')
-                            e_type = element_type(tx, e)
-
-                            if pair2:
-                                c_tag = f'has tag-number: {p_tag}'
-                            else:
-                                c_tag = f'has tag-number: {tag_number}' if tag_number is not None else ''
-
-                            '''     ▶ Q2. What kind of element is element?     '''
-
-                            if e_type[1] == 'entity':
-                                query_entity = f'match $e type {e}; get $e;'
-                                iterator = next(match_query(tx, query_entity)).map()
-                                superclass = iterator.get('e').as_remote(tx).get_supertype().get_label()
-                                type_el = e
-                                print(box.c3(f'{e} > is a ({superclass}) {e_type[1]} ', f'{c_tag}', 2))
-                                '''     ╭───────────────────────────╮ ╭─────────────────╮
-                                        │ element ▶ is a e_type[1]  ├─┤ tag-number: T-N │
-                                        ╰───────────────────────────╯ ╰─────────────────╯
-                                '''
-                                question2a = f'Q{qn}a. What kind of relations {color.c4(e)} has ?'
-                                print(f'{tab * 4}\u25B6 {question2a}')
-
-                            else:
-                                superclass = e_type[1]
-                                type_el = e_type[1]
-                                print(box.c3(f'{e} > is a ({e_type[1]}) attribute',
-                                             f'attribute name: {e_type[0]} | {c_tag}', 2))
-                                '''     ╭──────────────────────────╮ ╭────────────────────────────────────────╮
-                                        │ element ▶ is a e_type[1] ├─┤ attribute name: name | tag-number: T-N │
-                                        ╰──────────────────────────╯ ╰────────────────────────────────────────╯
-                                '''
-                                check_command_compliance(command, element, use_tool, superclass, g_list)
-                                question2a = f'Q{qn}a. What kind of relations {color.c4(e)} ' \
-                                             f'{color.c4(type_el)} has ?'
-                                print(f'{tab * 4}\u25B6 {question2a}')
-
-                        def map_relations(e, f_dict, ld, p2=None):
-                            p_test = None
-                            if p2 is not None:
-                                if isinstance(p2, list):
-                                    p_test = p2[0]
-                            else:
-                                p_test = e
-                            loc_list = []
-                            for key, value in ld.items():
-                                loc_list = f'{key} {value[1]}'
-                            for rel in list(f_dict.keys()):
-                                print(box.c4(rel, f'{e}', 4))
-                                if loc_list:
-                                    match_loc = list(filter(lambda l: loc_list in l, f_dict[rel]))
-                                    if match_loc and e == p_test:
-                                        l_value = match_loc[0]
-                                        loc_index = f_dict[rel].index(l_value)
-                                        f_dict[rel][0], f_dict[rel][loc_index] = f_dict[rel][loc_index], f_dict[rel][0]
-                                    else:
-                                        l_value = ''
-                                    if rel == 'assembling':
-                                        msg = 'GRAB ACTION - MANUAL TASK'
-                                        print(box.c5(f_dict[rel], f_dict[rel][0], 6, True, msg, 5))
-                                    else:
-                                        msg = 'TARGET LOCATION'
-                                        print(box.c5(f_dict[rel], l_value, 6, True, msg, 5))
-                                else:
-                                    print(box.c5(f_dict[rel], '', 6, True, '', 5))
-                            return ld
-
-                        def target_location(lp1, lp2, p2=None):
-
-                            if lp1:
-                                if len(lp1) > 1:
-                                    location_1 = f'SAME AS ▶ {p2}'
-                                    coord = f'SAME AS ▶ {p2}'
-                                    return coord, location_1
-                                else:
-                                    location_1 = lp1[0]
-                                    l1 = find_location(transaction, lp1[0])
-                                    if l1:
-                                        coord = f'name: {l1[0]} | latitude: {l1[1]} ' \
-                                                f'| longitude: {l1[2]} | water-depth: {l1[3]}'
-                                    else:
-                                        # coord = 'UNDEFINED'
-                                        raise LocationError
-                                    return coord, location_1
-                            else:
-                                if lp2:
-                                    location_2 = p2
-                                    coord = lp2
-                                else:
-                                    location_2 = 'UNDEFINED'
-                                    coord = 'UNDEFINED'
-                                return coord, location_2
-
-                        def retrieve_coordinates(c, loc, el):
-                            if isinstance(c, list):
-                                print(f'{tab * 2}\u25B6 {color.c3("Possible locations to")} {el}. '
-                                      f'{color.c3("PROBABLY NOT:")} {loc}')
-                                c2, l2 = target_location(l_pair2, coord_list, pair2)
-                                print(box.c3(c, c2, 2, True, 'TARGET LOCATION - PROBABLY NOT HERE'))
-                                return c, loc
-                            else:
-                                print(box.c1(f'Location > (TARGET)', c, 0))
-                                return c, loc
-
-                        def retrieve_target_information(tx, loc):
-                            if loc != 'UNDEFINED':
-                                target_element = loc[0]
-                                target_tag = loc[1]
-                                target_type = element_type(transaction, target_element)
-                                question2a = f'Q{qn}a. What kind of relations {color.c4(target_element)} has ?'
-                                print(f'{tab * 4}\u25B6 {question2a}')
-                                rel_dicts = get_relations(tx, target_element, target_type, target_tag)
-                                t_dict = rel_dicts[0]
-                                map_relations(target_element, t_dict, l_dict)
-                                # return target_element, target_tag, target_type, f_rxy_d
-                                return t_dict
-                            else:
-                                return None
-
-                        def find_common_elements(d1, d2):
-                            if d1 and d2 is not None:
-                                question2a = f'Q{qn}a. Which are the common elements between target and local ?'
-                                print(f'{tab * 2}\u25B6 {question2a}')
-
-                                s1 = set(i.split('▶')[0] for sl in d1.values() for i in sl)
-                                s2 = set(i.split('▶')[0] for sl in d2.values() for i in sl)
-                                c_elements = s1.intersection(s2)
-                                if isinstance(c_elements, set):
-                                    print(box.c3(list(c_elements), '', 2, True))
-                                else:
-                                    print(box.c3(c_elements, '', 2))
-
-                        if pair2:
-
-                            # ELEMENT 1 OR PAIR 1 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-                            build_question(transaction, element, pair2=False)
-                            map_relations(element, f_rxy_dict, l_dict)
-                            coordinates1, local1 = target_location(l_pair1, coord_list, pair2)
-                            retrieve_coordinates(coordinates1, local1, element)
-
-                            # PAIR 2 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-                            build_question(transaction, pair2[0], pair2[1], pair2=True)
-                            map_relations(pair2[0], f_rwz_dict, l_dict, pair2)
-                            coordinates, local = target_location(l_pair2, coord_list, pair2)
-                            retrieve_coordinates(coordinates, local, element)
-                            target_dict = retrieve_target_information(transaction, local)
-                            find_common_elements(target_dict, f_rwz_dict)
-
-                        else:
-
-                            build_question(transaction, element, pair2=False)
-                            map_relations(element, f_rxy_dict, l_dict)
-                            coordinates, local = target_location(l_pair1, coord_list)
-                            retrieve_coordinates(coordinates, local, element)
-                            target_dict = retrieve_target_information(transaction, local)
-                            find_common_elements(target_dict, f_rxy_dict)
-
-                    return inquiry_answer()
+            # ━━┥ 2. ELEMENT / PAIR INQUIRE ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
+            with tracer.span('Q2 element inquiry'):
                 try:
-                    if element1 != 0:
-                        inquiry_element(element1)
+                    self.assess_element(report, questions, element1 if element1 != 0 else pair1, pair2, interactive)
+                except (ComplianceError, LocationError) as e:
+                    e.report = report
+                    report.error = e
+        return report
+
+    @staticmethod
+    def assess_element(report, questions, e, pair2, interactive=True):
+        command = report.command
+        # Verifies if element is a list or a pair of elements
+        tag_number = None
+        if isinstance(e, list):
+            element = e[0]
+            tag_number = e[1]
+        else:
+            element = e
+
+        questions.answer(('element-type', element))
+        g_list = questions.answer('command-goals') if command != 0 else []
+        with tracer.span('get_relations'):
+            relations_dicts = questions.answer(('relations', element))
+        f_rxy_dict, f_rxz_dict, f_rwz_dict, l_pair1, l_pair2, l_dict, coord_list = relations_dicts
+
+        @traced()
+        def build_question(e, p_tag=None, pair2=False):
+            e_type = questions.answer(('element-type', e), lambda t: element_type(t, e, interactive), element_type)
+
+            if pair2:
+                c_tag = f'has tag-number: {p_tag}'
+            else:
+                c_tag = f'has tag-number: {tag_number}' if tag_number is not None else ''
+
+            if e_type[1] == 'entity':
+                superclass = questions.answer(('supertype', e), lambda t: super_type(t, e_type, e), super_type)
+                e_report = ElementReport(e, e_type, c_tag, superclass)
+            else:
+                e_report = ElementReport(e, e_type, c_tag, e_type[1])
+                e_report.requires_tool = report.use_tool
+                e_report.compliance = command_compliance(command, element, report.use_tool, e_type[1], g_list)
+                report.compliance = e_report.compliance if report.compliance is not False else False
+            report.elements.append(e_report)
+            report.add('element', e_report)
+            if e_report.compliance is False:
+                raise ComplianceError(f'cannot {command} {element}')
+
+        @traced()
+        def map_relations(e, f_dict, ld, p2=None):
+            p_test = None
+            if p2 is not None:
+                if isinstance(p2, list):
+                    p_test = p2[0]
+            else:
+                p_test = e
+            location = None
+            for key, value in ld.items():
+                location = (key, value[1])                      # (element, tag-number) of the last location
+            marks = {}                                          # relation -> (highlighted entry, message)
+            for rel in list(f_dict.keys()):
+                if location:
+                    match_loc = [i for i in f_dict[rel] if i.key == location]
+                    if match_loc and e == p_test:
+                        l_value = match_loc[0]
+                        loc_index = f_dict[rel].index(l_value)
+                        f_dict[rel][0], f_dict[rel][loc_index] = f_dict[rel][loc_index], f_dict[rel][0]
                     else:
-                        inquiry_element(pair1)
-
-                    # ━━┥ 3. PREP-1 INQUIRE ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-                    # the preposition confirms the association... if there is no association, need to ask if
-                    # it is necessary to associate... like in:
-                    # operate mechanism OF tool TOOL-CLAMP-MANU-AT-UN-03
-
-                    print(color.cyan('\n' + "\u2501" * 175 + '\n'))
-
-                except ComplianceError:
-                    print(color.e1(f'{tab * 2}' + f'{"─" * 120}'))
-                    p = input(color.e1(f'\n{tab * 2}PLEASE ENTER A VALID COMMAND LINE \u25B6 '))
-                    self.command_line(p)
-
-                except LocationError:
-                    print(color.e1(f'{tab * 2}' + f'{"─" * 120}'))
-                    p = input(color.e1(f'\n{tab * 2}MISSING LOCATION - PLEASE ENTER A COMPLETE COMMAND LINE \u25B6 '))
-                    self.command_line(p)
+                        l_value = ''
+                    if rel == 'assembling':
+                        marks[rel] = (f_dict[rel][0], 'GRAB ACTION - MANUAL TASK')
+                    else:
+                        marks[rel] = (l_value, 'TARGET LOCATION')
+                else:
+                    marks[rel] = ('', '')
+            report.relations[e] = f_dict
+            report.add('relations', e, {rel: list(items) for rel, items in f_dict.items()}, marks)
+            return ld
+
+        @traced()
+        def target_location(lp1, lp2, p2=None):
+
+            if lp1:
+                if len(lp1) > 1:
+                    location_1 = f'SAME AS ▶ {p2}'
+                    coord = f'SAME AS ▶ {p2}'
+                    return coord, location_1
+                else:
+                    location_1 = lp1[0]
+                    l1 = questions.answer(('location', tuple(lp1[0])), lambda t: find_location(t, lp1[0]),
+                                          find_location)
+                    if l1:
+                        coord = f'name: {l1[0]} | latitude: {l1[1]} ' \
+                                f'| longitude: {l1[2]} | water-depth: {l1[3]}'
+                    else:
+                        # coord = 'UNDEFINED'
+                        raise LocationError(f'no location found for {lp1[0]}')
+                    return coord, location_1
+            else:
+                if lp2:
+                    location_2 = p2
+                    coord = lp2
+                else:
+                    location_2 = 'UNDEFINED'
+                    coord = 'UNDEFINED'
+                return coord, location_2
+
+        def retrieve_coordinates(c, loc, el):
+            if isinstance(c, list):
+                report.add('possible-locations', el, loc)
+                c2, l2 = target_location(l_pair2, coord_list, pair2)
+                report.add('alternative-locations', c, c2)
+            else:
+                report.add('location', c)
+            report.target, report.target_location = loc, c
+            return c, loc
+
+        @traced()
+        def retrieve_target_information(loc):
+            if loc != 'UNDEFINED':
+                target_element = loc[0]
+                target_tag = loc[1]
+                target_type = questions.answer(('element-type', target_element),
+                                               lambda t: element_type(t, target_element, interactive),
+                                               element_type)
+                report.add('target', target_element)
+                rel_dicts = questions.answer(('relations', target_element, target_tag),
+                                             lambda t: get_relations(t, target_element, target_type, target_tag,
+                                                                     interactive=interactive),
+                                             get_relations)
+                t_dict = rel_dicts[0]
+                map_relations(target_element, t_dict, l_dict)
+                return t_dict
+            else:
+                return None
+
+        @traced()
+        def find_common_elements(d1, d2):
+            if d1 and d2 is not None:
+                s2 = {i.key for sl in d2.values() for i in sl}
+                report.common_elements = list(dict.fromkeys(i.key for sl in d1.values() for i in sl if i.key in s2))
+                report.add('common', report.common_elements)
+
+        if pair2:
+
+            # ELEMENT 1 OR PAIR 1 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+            build_question(element, pair2=False)
+            map_relations(element, f_rxy_dict, l_dict)
+            coordinates1, local1 = target_location(l_pair1, coord_list, pair2)
+            retrieve_coordinates(coordinates1, local1, element)
+
+            # PAIR 2 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+            build_question(pair2[0], pair2[1], pair2=True)
+            map_relations(pair2[0], f_rwz_dict, l_dict, pair2)
+            coordinates, local = target_location(l_pair2, coord_list, pair2)
+            retrieve_coordinates(coordinates, local, element)
+            target_dict = retrieve_target_information(local)
+            find_common_elements(target_dict, f_rwz_dict)
+
+        else:
+
+            build_question(element, pair2=False)
+            map_relations(element, f_rxy_dict, l_dict)
+            coordinates, local = target_location(l_pair1, coord_list)
+            retrieve_coordinates(coordinates, local, element)
+            target_dict = retrieve_target_information(local)
+            find_common_elements(target_dict, f_rxy_dict)
+
+    @staticmethod
+    @traced()
+    def render(report):
+        """
+        Prints a SituationReport in the terminal (the colored output of command_line).
+        :param report: SituationReport
+        """
+        tab = '\u0009'                                      # ASCII TAB CHARACTER
+        qn = 0
+        command = report.command
+        d_phrase = report.command_line
+
+        print(box.c0(f'(INPUT PHRASE) > {report.phrase}', tab=5, division=True))
+        #      ╭──────────────────────╮
+        # ━━━━━┥ INPUT PHRASE ▶ phase ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+        #      ╰──────────────────────╯
+
+        print(box.c1(f'Command Line > {d_phrase}')) if d_phrase is not None else 0
+        print(color.c3('\n \u25B6 STARTING SITUATION AWARENESS PROCEDURE\n'))
+        '''
+        ╭──────────────────────────────────────────────────────────────────────────╮
+        │ Command Line ▶ {'command': '', element:, '', prep: '', 'pair': ['', '']} │
+        ╰──────────────────────────────────────────────────────────────────────────╯
+        '''
+        question0 = f'Q{qn}. What is my actual location (latitude, longitude) ?'
+        print(f' \u25B6 {question0}')
+        answer0 = 'location > (ACTUAL - from navigation system)'
+        complement_answer0 = 'name | latitude | longitude | Water Depth' if report.position is None else \
+            ' | '.join(str(p) for p in report.position)
+        print(box.c1(answer0, complement_answer0, 0))
+
+        ''' ▶ Q0. What is my actual location (latitude, longitude) ?
+        ╭────────────────────────────────────────────╮ ╭───────────────────────────────────────────╮
+        │ location ▶ ACTUAL - from navigation system ├─┤ name | latitude | longitude | Water Depth │
+        ╰────────────────────────────────────────────╯ ╰───────────────────────────────────────────╯
+        '''
+
+        # ━━┥ 1. COMMAND INQUIRE ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+        qn += 1
+        if command != 0:
+            # QUESTION 1 - COMMAND
+            question1 = f'Q{qn}. What kind of command is {color.c3(command)} ?'
+            print(f'{tab * 2}\u25B6 {question1}')
+            if report.use_tool:
+                answer1f = f'{command} > is a (tool function) and {report.goals}'
+                print(box.c3(answer1f, '\u25B6 Requires TOOL', 2))
+
+                ''' ▶ Q1. What kind of command is command ?
+                    ╭───────────────────────────────────────────────────────╮ ╭─────────────────╮
+                    │ command ▶ is a tool function and ['A-goal', 'B-goal'] ├─┤ ▶ Requires TOOL │
+                    ╰───────────────────────────────────────────────────────╯ ╰─────────────────╯
+                '''
+                c_answer1f = f'Q{qn}a.What {color.c4("TOOL(s)")} are available for "{command}" command:'
+                print(f'{tab * 4}' + '\u25B6 ' + c_answer1f)
+                print(box.c4(f'Tool list > ({report.tools})', '', 4))
+                for e_type, (distance, tag, landmark) in report.tool_distances.items():
+                    print(box.c4(f'{e_type} > ({tag}) at {distance:.0f} m', landmark, 6))
+
+                '''     ▶ TOOL(s) available for "clean" command:
+                        ╭────────────────────────────────────────────╮
+                        │ Tool list ▶ ['tool-A', 'tool-B', 'tool-C'] │
+                        ╰────────────────────────────────────────────╯
+                '''
+            else:
+                answer1 = f'{command} > is a {report.goals}'
+                print(box.c3(answer1, '', 2))
+
+                ''' ▶ Q1. What kind of command is command ?
+                    ╭───────────────────────────╮
+                    │ command ▶ is a ['A-goal'] │
+                    ╰───────────────────────────╯
+                '''
+        else:
+            print(color.yellow(f" \u25B6\u0009INPUT A COMMAND (look at inquirer.py in COMMAND)"))
+
+        # ━━┥ 2. ELEMENT / PAIR INQUIRE ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+        qn += 1
+        for kind, data in report.sections:
+            if kind == 'element':
+                e_report = data[0]
+                e = e_report.element
+                question2 = f'Q{qn}.What kind of element is {color.c3(e)} ?'
+                print(color.c3(f'{tab * 2}' + f'{"─" * 120}'))
+                print(f'{tab * 2}\u25B6 {question2}')
+                if e_report.compliance is None:
+                    print(box.c3(f'{e} > is a ({e_report.superclass}) {e_report.e_type[1]} ', f'{e_report.tag}', 2))
+                    '''     ╭───────────────────────────╮ ╭─────────────────╮
+                            │ element ▶ is a e_type[1]  ├─┤ tag-number: T-N │
+                            ╰───────────────────────────╯ ╰─────────────────╯
+                    '''
+                    question2a = f'Q{qn}a. What kind of relations {color.c4(e)} has ?'
+                else:
+                    print(box.c3(f'{e} > is a ({e_report.e_type[1]}) attribute',
+                                 f'attribute name: {e_report.e_type[0]} | {e_report.tag}', 2))
+                    '''     ╭──────────────────────────╮ ╭────────────────────────────────────────╮
+                            │ element ▶ is a e_type[1] ├─┤ attribute name: name | tag-number: T-N │
+                            ╰──────────────────────────╯ ╰────────────────────────────────────────╯
+                    '''
+                    element = report.elements[0].element
+                    if e_report.requires_tool:
+                        print(box.c3(f'Check compliance > Can {command} {element} ?', f'COMPLIANT ▶ REQUIRES TOOL', 2))
+                    elif e_report.compliance:
+                        print(box.c3(f'Check compliance > Can ({command} {element}) ?', 'YES ▶ COMPLIANT', 2))
+                    else:
+                        print(box.e3(f'Check compliance > Can ({command} {element}) ?',
+                                     f'NO ▶ Cannot {command} {element} !', 2))
+                        continue
+                    question2a = f'Q{qn}a. What kind of relations {color.c4(e)} ' \
+                                 f'{color.c4(e_report.e_type[1])} has ?'
+                print(f'{tab * 4}\u25B6 {question2a}')
+
+            elif kind == 'relations':
+                e, f_dict, marks = data
+                for rel in list(f_dict.keys()):
+                    print(box.c4(rel, f'{e}', 4))
+                    highlight, msg = marks[rel]
+                    print(box.c5([str(i) for i in f_dict[rel]], str(highlight), 6, True, msg, 5))
+
+            elif kind == 'possible-locations':
+                el, loc = data
+                print(f'{tab * 2}\u25B6 {color.c3("Possible locations to")} {el}. '
+                      f'{color.c3("PROBABLY NOT:")} {loc}')
+
+            elif kind == 'alternative-locations':
+                c, c2 = data
+                print(box.c3(c, c2, 2, True, 'TARGET LOCATION - PROBABLY NOT HERE'))
+
+            elif kind == 'location':
+                print(box.c1(f'Location > (TARGET)', data[0], 0))
+
+            elif kind == 'target':
+                question2a = f'Q{qn}a. What kind of relations {color.c4(data[0])} has ?'
+                print(f'{tab * 4}\u25B6 {question2a}')
+
+            elif kind == 'common':
+                question2a = f'Q{qn}a. Which are the common elements between target and local ?'
+                print(f'{tab * 2}\u25B6 {question2a}')
+                print(box.c3([f'{e} {tag}' for e, tag in data[0]], '', 2, True))
+
+        if report.error is None:
+            # ━━┥ 3. PREP-1 INQUIRE ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+            # the preposition confirms the association... if there is no association, need to ask if
+            # it is necessary to associate... like in:
+            # operate mechanism OF tool TOOL-CLAMP-MANU-AT-UN-03
+
+            print(color.cyan('\n' + "\u2501" * 175 + '\n'))
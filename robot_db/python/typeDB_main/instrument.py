@@ -0,0 +1,260 @@
+"""
+                    Project MOSASAUR - instrument.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Query instrumentation file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from functools import lru_cache
+import threading
+import atexit
+import json
+import math
+import time
+import sys
+import os
+import re
+
+STRING = re.compile(r'"(?:[^"\\]|\\.)*"')
+NUMBER = re.compile(r'(?<![\w$-])-?\d+(?:\.\d+)?(?![\w-])')
+IID = re.compile(r'\b0x[0-9a-fA-F]+\b')
+TIME_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]    # ms
+ROW_BUCKETS = [0, 1, 10, 100, 1000, 10000, 100000]
+
+
+@lru_cache(maxsize=4096)
+def template(query):
+    """
+    :return: query with its literals (strings, numbers, iids) replaced by '?', so the queries of one
+             call site built for different elements share their statistics
+    """
+    return NUMBER.sub('?', IID.sub('?', STRING.sub('"?"', ' '.join(query.split()))))
+
+
+def call_site(depth=1):
+    """
+    :return: 'module:function' of the frame 'depth' levels above the function calling call_site
+    """
+    code = sys._getframe(depth + 1).f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f'{module}:{getattr(code, "co_qualname", code.co_name).replace(".<locals>", "")}'
+
+
+def inference_of(tx):
+    """
+    :return: True if the transaction runs with the inference, None if its options are unknown
+    """
+    try:
+        return bool(getattr(tx.options(), 'infer', False))
+    except Exception:
+        return None
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram: counts[i] values <= buckets[i], the last count for the values above.
+    """
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+
+    def add(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, p):
+        """
+        :return: upper bound of the bucket holding the nearest-rank percentile (max for the last bucket)
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_dict(self):
+        return {'buckets': self.buckets, 'counts': self.counts, 'count': self.count, 'total': self.total,
+                'max': self.max, 'p50': self.percentile(50), 'p95': self.percentile(95),
+                'p99': self.percentile(99)}
+
+
+class QueryRecord:
+    """
+    Statistics of one query template at one call site, for one inference mode.
+    """
+    def __init__(self, site, query, infer):
+        self.site = site
+        self.query = query
+        self.infer = infer
+        self.calls = 0
+        self.partial = 0                                        # streams closed before their last row
+        self.errors = 0
+        self.first = Histogram(TIME_BUCKETS)                    # ms to the first row (queries with rows)
+        self.total = Histogram(TIME_BUCKETS)                    # ms in the stream, to exhaustion or close
+        self.rows = Histogram(ROW_BUCKETS)
+
+    def add(self, first, total, rows, exhausted, error):
+        self.calls += 1
+        self.partial += 0 if exhausted or error else 1
+        self.errors += 1 if error else 0
+        self.first.add(first * 1000) if rows else None
+        self.total.add(total * 1000)
+        self.rows.add(rows)
+
+    def to_dict(self):
+        return {'site': self.site, 'query': self.query, 'infer': self.infer, 'calls': self.calls,
+                'partial': self.partial, 'errors': self.errors, 'first_row_ms': self.first.to_dict(),
+                'total_ms': self.total.to_dict(), 'rows': self.rows.to_dict()}
+
+
+class QueryStats:
+    """
+    Instrumentation of the match queries: every read query goes through match_rows, which records per
+    call site and query template the time to the first row and to the exhaustion of the answer stream,
+    the rows returned and whether the transaction had the inference on.
+    Only the time spent inside the stream is measured (the work of the caller between two rows is not).
+    The statistics can be dumped as JSON or as a text table (dump), also at exit with the environment
+    variable MOSASAUR_QUERY_STATS=<path> ('-' for the standard output, JSON if the path ends with .json).
+    """
+    def __init__(self):
+        self.enabled = True
+        self.lock = threading.Lock()
+        self.records = {}                                       # (site, template, infer) -> QueryRecord
+
+    def match(self, tx, query, depth=1):
+        """
+        :param tx: READ or WRITE transaction
+        :param query: match query
+        :param depth: 1 if the caller is the call site, +1 per wrapper function in between
+        :return: iterator of the ConceptMaps of the query
+        """
+        if not self.enabled:
+            return tx.query().match(query)
+        key = (call_site(depth), template(query), inference_of(tx))
+        start = time.perf_counter()
+        try:
+            iterator = iter(tx.query().match(query))
+        except BaseException:
+            self.record(key, time.perf_counter() - start, 0, False, True)
+            raise
+        return self.rows(key, iterator, time.perf_counter() - start)
+
+    def rows(self, key, iterator, elapsed):
+        first = None
+        rows = 0
+        exhausted = error = False
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    row = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    elapsed += time.perf_counter() - start
+                first = elapsed if first is None else first
+                rows += 1
+                yield row
+        finally:
+            self.record(key, elapsed, rows, exhausted, error, first)
+
+    def record(self, key, elapsed, rows, exhausted, error, first=None):
+        with self.lock:
+            record = self.records.get(key)
+            if record is None:
+                record = self.records[key] = QueryRecord(*key)
+            record.add(elapsed if first is None else first, elapsed, rows, exhausted, error)
+
+    def reset(self):
+        with self.lock:
+            self.records = {}
+
+    def to_dict(self):
+        """
+        :return: [QueryRecord.to_dict], the most expensive (total time in the stream) first
+        """
+        with self.lock:
+            records = sorted(self.records.values(), key=lambda r: r.total.total, reverse=True)
+            return [r.to_dict() for r in records]
+
+    def table(self):
+        """
+        :return: text table of the statistics (times in ms, p50/p95 from the histogram buckets)
+        """
+        lines = [f'{"call site":<45}{"infer":>6}{"calls":>7}{"rows":>8}{"max":>7}{"first p50":>11}'
+                 f'{"p95":>9}{"total p50":>11}{"p95":>9}{"max":>10}{"sum":>11}{"partial":>9}{"errors":>8}']
+        for r in self.to_dict():
+            first, total, rows = r['first_row_ms'], r['total_ms'], r['rows']
+
+            def ms(value):
+                return '-' if value is None else f'{value:.2f}'
+
+            lines.append(f'{r["site"]:<45}{str(r["infer"]):>6}{r["calls"]:>7}{rows["total"]:>8.0f}'
+                         f'{rows["max"]:>7}{ms(first["p50"]):>11}{ms(first["p95"]):>9}{ms(total["p50"]):>11}'
+                         f'{ms(total["p95"]):>9}{ms(total["max"]):>10}{ms(total["total"]):>11}'
+                         f'{r["partial"]:>9}{r["errors"]:>8}')
+            lines.append(f'    ▶ {r["query"]}')
+        return '\n'.join(lines)
+
+    def dump(self, path=None):
+        """
+        :param path: file of the statistics (JSON if it ends with .json, else text table), None or '-'
+                     for the standard output
+        """
+        text = json.dumps(self.to_dict(), indent=2) if path and path.endswith('.json') else self.table()
+        if path is None or path == '-':
+            print(text)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+
+    def dump_at_exit(self, path=None):
+        atexit.register(self.dump, path)
+
+
+query_stats = QueryStats()
+query_stats.dump_at_exit(os.environ['MOSASAUR_QUERY_STATS']) if os.environ.get('MOSASAUR_QUERY_STATS') else None
+
+
+def match_rows(tx, query):
+    """
+    Runs a match query through the instrumentation (see QueryStats), recorded for the caller.
+    """
+    return query_stats.match(tx, query, 2)
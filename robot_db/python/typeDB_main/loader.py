@@ -0,0 +1,375 @@
+"""
+                    Project MOSASAUR - loader.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Loader file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typedb.client import SessionType, TransactionType
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from project.robot_db.python.typeDB_main.color_text import Color, Box
+from project.robot_db.python.typeDB_main.connection import connection
+from project.robot_db.python.typeDB_main.cache import value_index
+from project.robot_db.python.typeDB_main.instrument import match_rows
+import threading
+import datetime
+import time
+import csv
+
+color = Color()
+box = Box()
+
+
+def to_string(v):
+    return f'"{v}"'
+
+
+def to_long(v):
+    try:
+        return str(int(v))
+    except ValueError:
+        number = float(v)                                       # '12.0' in a long column
+        if not number.is_integer():
+            raise
+        return str(int(number))
+
+
+def to_double(v):
+    return repr(float(v))
+
+
+def to_boolean(v):
+    value = v.strip().lower()
+    if value not in ('true', 'false'):
+        raise ValueError(f'invalid boolean: {v!r}')
+    return value
+
+
+def to_datetime(v):
+    value = v.strip()
+    try:
+        date_obj = datetime.datetime.fromisoformat(value)      # fast path - ISO 8601 (YYYY-MM-DD[THH:MM[:SS[.f]]])
+    except ValueError:
+        date_obj = None
+        for date_format in ["%Y-%m-%d", "%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f"]:
+            try:
+                date_obj = datetime.datetime.strptime(value, date_format)
+                break
+            except ValueError:
+                pass
+        if date_obj is None:
+            raise
+    if date_obj.tzinfo is not None:                             # TypeDB datetimes have no time zone - stored in UTC
+        date_obj = date_obj.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    if date_obj.microsecond:
+        return date_obj.isoformat(timespec='milliseconds')
+    return date_obj.isoformat(timespec='seconds')
+
+
+converters = {'string': to_string, 'long': to_long, 'double': to_double,
+              'boolean': to_boolean, 'datetime': to_datetime}
+
+
+def compile_converter(label, value_type):
+    """
+    Builds the TypeQL literal converter of an attribute from its schema value type.
+    :param label: attribute label (for the error messages)
+    :param value_type: 'string', 'long', 'double', 'boolean' or 'datetime' (None when unknown)
+    :return: converter function or None (the value type is then guessed per cell)
+    """
+    function = converters.get(value_type)
+    if function is None:
+        return None
+
+    def convert(v):
+        try:
+            return function(v)
+        except ValueError:
+            raise ValueError(f'{label}: "{v}" is not a valid {value_type} value') from None
+    return convert
+
+
+class Column:
+    """
+    One column of a data file, with its header already parsed.
+    Entity files:   'attribute' or 'concept-key : attribute' or 'concept-key : attribute-1 | attribute-2'
+    Relation files: 'role : attribute' or 'role* : attribute-1 | attribute-2' (role* for repeated roles)
+    """
+    __slots__ = ('index', 'key', 'attribute', 'attributes', 'multi', 'role', 'last', 'indexed',
+                 'convert', 'converters', 'temporal')
+
+    def __init__(self, index, key, last, plan):
+        self.index = index
+        self.key = key
+        self.last = last                                        # no trailing comma after the last column
+        self.attribute = key.split(" : ")[1] if " : " in key else None
+        self.attributes = self.attribute.split(" | ") if self.attribute is not None else []
+        self.multi = self.attribute is not None and "|" in self.attribute
+        role = key.split(" : ")[0]
+        self.role = role.split("*")[0] if "*" in role else role
+        self.indexed = key in value_index.key_attributes
+        self.convert = plan.converter(key)                      # entity column 'attribute'
+        self.converters = [plan.converter(a) for a in self.attributes]
+        self.temporal = plan.value_type(key) == 'datetime'      # ':' in the value is not a special cell
+
+    def value(self, values):
+        return values[self.index] if self.index < len(values) else ''
+
+
+class ColumnPlan:
+    """
+    Header of a data file compiled once, so the loader does not re-parse the column
+    names (or rebuild the row dictionaries) for every cell of every row.
+    With the value types of the schema, every attribute also gets one converter to its
+    TypeQL literal, instead of guessing the type of each cell (determine_data_type).
+    """
+    def __init__(self, header, concept_type=None, value_types=None):
+        self.concept_type = concept_type
+        self.value_types = value_types or {}
+        self.converters = {}
+        self.columns = [Column(n, key, n == len(header) - 1, self) for n, key in enumerate(header)]
+        self.by_key = {}
+        for column in self.columns:
+            self.by_key.setdefault(column.key, column)
+        self.tag_column = self.by_key.get('tag-number')
+
+    def column(self, key):
+        return self.by_key[key]
+
+    def value_type(self, label):
+        return self.value_types.get(label)
+
+    def converter(self, label):
+        """
+        :return: converter of the attribute (compiled once per label), None when the value type is unknown
+        """
+        if label not in self.converters:
+            self.converters[label] = compile_converter(label, self.value_type(label))
+        return self.converters[label]
+
+
+class BulkLoader:
+    """
+    Bulk-load mode of DataHandling.load_data.
+    The rows of a data file are grouped in batches of batch_size rows, each batch is inserted
+    in its own write transaction and up to 'workers' transactions are in flight at once.
+    A row is the list of insert queries built for one line of the CSV file.
+    """
+    def __init__(self, db_name, batch_size=500, workers=4, commitment=True):
+        self.db_name = db_name
+        self.batch_size = max(1, int(batch_size))
+        self.workers = max(1, int(workers))
+        self.commitment = commitment
+        self.connection = connection()
+        self.lock = threading.Lock()
+        self.total_rows = 0
+        self.total_time = 0.0
+
+    def insert_batch(self, batch):
+        """
+        Inserts a batch of rows in one write transaction.
+        :param batch: list of rows (each row is a list of insert queries)
+        :return: number of rows inserted
+        """
+        with self.connection.transaction(self.db_name, SessionType.DATA, TransactionType.WRITE) as tx:
+            for row in batch:
+                for q in row:
+                    tx.query().insert(q)
+            tx.commit() if self.commitment else None
+        return len(batch)
+
+    def load(self, thing, rows):
+        """
+        Inserts the rows of one data file. The rows are consumed lazily, so the number of batches
+        kept in memory is bounded by the number of workers.
+        :param thing: concept type of the data file
+        :param rows: iterable of rows (each row is a list of insert queries)
+        :return: number of rows inserted, elapsed time in seconds
+        """
+        start = time.time()
+        count = 0
+        pending = set()
+        batch = []
+
+        def collect(futures):
+            return sum(f.result() for f in futures)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    pending.add(pool.submit(self.insert_batch, batch))
+                    batch = []
+                    if len(pending) >= self.workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        count += collect(done)
+            if batch:
+                pending.add(pool.submit(self.insert_batch, batch))
+            done, pending = wait(pending)
+            count += collect(done)
+
+        elapsed = time.time() - start
+        with self.lock:
+            self.total_rows += count
+            self.total_time += elapsed
+        rate = count / elapsed if elapsed > 0 else 0.0
+        print(box.l_cyan(f'{thing} > ({count}) rows in {elapsed:.2f} s', f'({rate:.1f}) rows/s'))
+        return count, elapsed
+
+    def report(self):
+        rate = self.total_rows / self.total_time if self.total_time > 0 else 0.0
+        print(box.c3(f'BULK LOAD > ({self.total_rows}) rows in {self.total_time:.2f} s', f'({rate:.1f}) rows/s'))
+        return rate
+
+
+class IngestionScheduler:
+    """
+    Loads the entity_data and relation_data folders on a worker pool.
+    The dependency graph is built from the CSV files themselves:
+        - an entity file produces its own type (file name) and the types of its special 'a : b' cells
+        - a relation file produces its own type and references the concept of every role column
+    A file depends on the files producing any subtype of a concept it references. A reference that no
+    file produces (e.g. an attribute role player) depends on every entity file, which is the original
+    "entities before relations" barrier. Files without pending dependencies are loaded concurrently.
+    """
+    def __init__(self, datahandling, db_name, workers=4, commitment=False, batch_size=None, verbose=False):
+        self.datahandling = datahandling
+        self.db_name = db_name
+        self.workers = max(1, int(workers))
+        self.commitment = commitment
+        self.batch_size = batch_size
+        self.verbose = verbose
+        self.connection = connection()
+
+    @staticmethod
+    def scan_file(i, concept_type):
+        """
+        Reads a data file once and collects the types it produces and references.
+        :param i: file dictionary {"data_path": path without extension}
+        :param concept_type: 'entity' or 'relation'
+        :return: set of produced types, set of referenced types
+        """
+        thing = i["data_path"].split("/")[-1]
+        produces = {thing}
+        references = set()
+        with open(i["data_path"] + ".csv") as csv_file:
+            reader = csv.reader(csv_file, skipinitialspace=True)
+            header = next(reader, [])
+            role_columns = [n for n, key in enumerate(header) if " : " in key]
+            for row in reader:
+                for n in role_columns:
+                    value = row[n] if n < len(row) else ''
+                    if concept_type == 'entity':
+                        if ":" in value:
+                            produces.add(value.split(" : ")[0])
+                    elif value:
+                        references.add(value.split(" : ")[0])
+        return produces, references
+
+    def subtypes(self, tx, label, cache):
+        if label not in cache:
+            try:
+                iterator = match_rows(tx, f'match $t sub {label}; get $t;')
+                cache[label] = {cmap.get('t').get_label().name() for cmap in iterator}
+            except Exception:
+                cache[label] = set()
+        return cache[label]
+
+    def plan(self):
+        """
+        Builds the dependency graph of the data files.
+        :return: files {name: (file dictionary, concept type)}, dependencies {name: set of names}
+        """
+        files = {}
+        produced = {}
+        referenced = {}
+        for concept_type in ['entity', 'relation']:
+            for i in self.datahandling.file_paths(concept_type):
+                name = i["data_path"].split("/")[-1]
+                files[name] = (i, concept_type)
+                produces, references = self.scan_file(i, concept_type)
+                for p in produces:
+                    produced.setdefault(p, set()).add(name)
+                referenced[name] = references
+
+        entity_files = {name for name, (i, c) in files.items() if c == 'entity'}
+        dependencies = {name: set() for name in files}
+        cache = {}
+        with self.connection.transaction(self.db_name, SessionType.DATA, TransactionType.READ) as tx:
+            for name, references in referenced.items():
+                for ref in references:
+                    producers = set()
+                    for label in self.subtypes(tx, ref, cache) | {ref}:
+                        producers |= produced.get(label, set())
+                    dependencies[name] |= producers if producers else entity_files
+                dependencies[name].discard(name)
+        return files, dependencies
+
+    def run(self):
+        """
+        Loads every data file, each one as soon as the files it depends on are loaded.
+        :return: list of the loaded files in completion order
+        """
+        files, dependencies = self.plan()
+        waiting = {name: set(deps) for name, deps in dependencies.items()}
+        dependents = {name: set() for name in files}
+        for name, deps in dependencies.items():
+            for d in deps:
+                dependents[d].add(name)
+
+        loader = BulkLoader(self.db_name, self.batch_size, self.workers, self.commitment) if self.batch_size else None
+        loaded = []
+        failed = None
+        start = time.time()
+
+        def load(name):
+            i, concept_type = files[name]
+            self.datahandling.load_file(self.db_name, i, concept_type, self.commitment, loader, self.verbose)
+            return name
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {pool.submit(load, n): n for n, deps in waiting.items() if not deps}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    if future.exception() is not None:
+                        failed = failed or future.exception()
+                        continue
+                    loaded.append(name)
+                    for d in dependents[name]:
+                        waiting[d].discard(name)
+                        if not waiting[d] and failed is None:
+                            pending[pool.submit(load, d)] = d
+        if failed is not None:
+            raise failed
+        skipped = [name for name in files if name not in loaded]
+        if skipped:
+            # Only a dependency cycle leaves files behind
+            print(box.e3(f'INGESTION > ({len(skipped)}) files with circular dependencies', f'{skipped}'))
+            for name in skipped:
+                load(name)
+                loaded.append(name)
+
+        loader.report() if loader is not None else None
+        print(box.c3(f'INGESTION > ({len(loaded)}) files in {time.time() - start:.2f} s', f'{self.workers} workers'))
+        return loaded
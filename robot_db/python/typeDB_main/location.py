@@ -0,0 +1,245 @@
+"""
+                    Project MOSASAUR - location.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Location file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typedb.client import SessionType, TransactionType
+from project.robot_db.python.typeDB_main.connection import connection
+from project.robot_db.python.typeDB_main.cache import relation_cache
+from project.robot_db.python.typeDB_main.telemetry import reasoning_options
+from project.robot_db.python.typeDB_main.snapshot import TypeHierarchy
+from project.robot_db.python.typeDB_main.instrument import match_rows
+import threading
+import math
+
+EARTH_RADIUS = 6371008.8                                        # mean earth radius (m)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    :return: great-circle distance (m) between two points given in degrees
+    """
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class LocationService:
+    """
+    In-memory index of the landmark-points and of the things located at them (locating relations), used by
+    find_location and get_relations instead of a landmark-point query per lookup. It answers locally:
+        where is a thing (where / locations), what is located at a landmark (located_at), and which landmarks
+        are within a radius of a position (within), through a grid of lat/lon cells.
+    It is loaded with three queries (landmarks, locating relations, attributes of the located things) the
+    first time a transaction asks for it, and loaded again after the data version changes (see RelationCache).
+    The queries always run on a pooled transaction with inference, whatever the options of the transaction
+    asking for the index, so the locations inferred by the rules are in it for every caller.
+    """
+    landmark_query = 'match $y isa landmark-point, has name $n, has latitude $lat, has longitude $lon, ' \
+                     'has water-depth $wdp; get $y, $n, $lat, $lon, $wdp;'
+    locating_query = 'match $y isa landmark-point; $l($r:$x, location:$y) isa locating; ' \
+                     'not {$r type relation:role;}; get $x, $y, $r;'
+    attribute_query = 'match $y isa landmark-point; ($x, location:$y) isa locating; $x has $a; get $x, $a;'
+
+    def __init__(self, cell=0.01, db_name='robot_db'):
+        self.lock = threading.RLock()
+        self.cell = cell                                        # grid cell size (degrees)
+        self.db_name = db_name
+        self.version = None                                     # data version of the index
+        self.failed = None                                      # data version the index failed to load
+        self.landmarks = {}                                     # landmark iid -> [(name, lat, lon, water-depth)]
+        self.names = {}                                         # landmark name -> [landmark iids]
+        self.things = {}                                        # thing iid -> (types, {(attribute, value)})
+        self.located = {}                                       # thing iid -> {landmark iid: {roles}}
+        self.at = {}                                            # landmark iid -> [thing iids]
+        self.grid = {}                                          # (lat cell, lon cell) -> [landmark iids]
+
+    def load(self, tx):
+        hierarchy = TypeHierarchy.load(tx)
+        landmarks = {}
+        names = {}
+        for cmap in match_rows(tx, self.landmark_query):
+            record = tuple(cmap.get(v).as_attribute().get_value() for v in ['n', 'lat', 'lon', 'wdp'])
+            records = landmarks.setdefault(cmap.get('y').get_iid(), [])
+            if record not in records:
+                records.append(record)
+            names.setdefault(record[0], []).append(cmap.get('y').get_iid())
+        things = {}
+        located = {}
+        at = {}
+        for cmap in match_rows(tx, self.locating_query):
+            x = cmap.get('x')
+            y = cmap.get('y').get_iid()
+            if x.get_iid() not in things:
+                things[x.get_iid()] = (hierarchy.ancestors(x.get_type().get_label().name()), set())
+            located.setdefault(x.get_iid(), {}).setdefault(y, set()).add(cmap.get('r').get_label().name())
+            if x.get_iid() not in at.setdefault(y, []):
+                at[y].append(x.get_iid())
+        for cmap in match_rows(tx, self.attribute_query):
+            attribute = cmap.get('a').as_attribute()
+            if cmap.get('x').get_iid() in things:
+                things[cmap.get('x').get_iid()][1].add((attribute.get_type().get_label().name(),
+                                                         attribute.get_value()))
+        grid = {}
+        for iid, records in landmarks.items():
+            for cell in {self.cell_of(r[1], r[2]) for r in records}:
+                grid.setdefault(cell, []).append(iid) if cell is not None else None
+        with self.lock:
+            self.landmarks = landmarks
+            self.names = names
+            self.things = things
+            self.located = located
+            self.at = at
+            self.grid = grid
+
+    def ensure(self, tx):
+        """
+        Loads the index if it is empty or older than the data.
+        :param tx: open transaction of the caller (the index is loaded on its own transaction with inference)
+        :return: True if the index can be used
+        """
+        if self.version == relation_cache.version:
+            return True
+        with self.lock:
+            version = relation_cache.version
+            if self.version != version and self.failed != version:
+                try:
+                    with connection().transaction(self.db_name, SessionType.DATA, TransactionType.READ,
+                                                  reasoning_options(infer=True)) as infer_tx:
+                        self.load(infer_tx)
+                    self.version = version
+                except Exception:
+                    self.failed = version                       # not retried until the data changes
+            return self.version == version
+
+    def invalidate(self):
+        with self.lock:
+            self.version = None
+            self.failed = None
+
+    def cell_of(self, lat, lon):
+        lat = to_float(lat)
+        lon = to_float(lon)
+        if lat is None or lon is None:
+            return None
+        return math.floor(lat / self.cell), math.floor(lon / self.cell)
+
+    def match(self, x_type=None, tag=None, attribute=None, value=None):
+        """
+        :return: iids of the located things of type x_type (or of a subtype), with the tag-number tag
+                 and the attribute value (None matches anything)
+        """
+        for iid, (types, attributes) in self.things.items():
+            if x_type is not None and x_type not in types:
+                continue
+            if tag is not None and ('tag-number', tag) not in attributes:
+                continue
+            if attribute is not None and (attribute, value) not in attributes:
+                continue
+            yield iid
+
+    def where(self, tx, x_type=None, tag=None, attribute=None, value=None, role=None):
+        """
+        Where is a thing ? (see match)
+        :param role: role the thing plays in the locating relation (None for any role)
+        :return: distinct landmark records [name, latitude, longitude, water-depth], None if the index is unavailable
+        """
+        if not self.ensure(tx):
+            return None
+        result_list = []
+        for iid in self.match(x_type, tag, attribute, value):
+            for landmark, roles in self.located[iid].items():
+                if role is not None and role not in roles:
+                    continue
+                for record in self.landmarks.get(landmark, []):
+                    result_list.append(list(record)) if list(record) not in result_list else None
+        return result_list
+
+    def locations(self, tx, loc_pair):
+        """
+        :param loc_pair: [type, tag-number]
+        :return: every landmark record of the thing, None if the index is unavailable
+        """
+        return self.where(tx, loc_pair[0], loc_pair[1])
+
+    def located_at(self, tx, name):
+        """
+        What is located at the landmark ?
+        :param name: landmark name
+        :return: [type, tag-numbers, roles] of the things located at the landmark, None if the index is unavailable
+        """
+        if not self.ensure(tx):
+            return None
+        result_list = []
+        for landmark in self.names.get(name, []):
+            for iid in self.at.get(landmark, []):
+                types, attributes = self.things[iid]
+                tags = sorted(str(v) for a, v in attributes if a == 'tag-number')
+                result_list.append([types[0], tags, sorted(self.located[iid][landmark])])
+        return result_list
+
+    def within(self, tx, lat, lon, radius, depth=None):
+        """
+        Which landmarks are near a position ?
+        :param lat: latitude (degrees)
+        :param lon: longitude (degrees)
+        :param radius: search radius (m)
+        :param depth: water depth (m) - the distance includes the depth difference if provided
+        :return: [distance (m), name, latitude, longitude, water-depth] sorted by distance,
+                 None if the index is unavailable
+        """
+        if not self.ensure(tx):
+            return None
+        lat_span = math.ceil(radius / (EARTH_RADIUS * math.radians(self.cell))) + 1
+        cos_lat = math.cos(math.radians(lat))
+        lon_span = math.ceil(lat_span / cos_lat) if cos_lat > 1e-6 else None
+        if lon_span is None or (2 * lat_span + 1) * (2 * lon_span + 1) > len(self.grid):
+            candidates = self.landmarks.keys()                  # fewer landmarks than cells to visit
+        else:
+            c_lat, c_lon = self.cell_of(lat, lon)
+            candidates = {iid for i in range(c_lat - lat_span, c_lat + lat_span + 1)
+                          for j in range(c_lon - lon_span, c_lon + lon_span + 1)
+                          for iid in self.grid.get((i, j), [])}
+        result_list = []
+        for iid in candidates:
+            for name, l_lat, l_lon, wdp in self.landmarks[iid]:
+                if to_float(l_lat) is None or to_float(l_lon) is None:
+                    continue
+                distance = haversine(lat, lon, to_float(l_lat), to_float(l_lon))
+                if depth is not None and to_float(wdp) is not None:
+                    distance = math.hypot(distance, to_float(wdp) - depth)
+                if distance <= radius:
+                    result_list.append([distance, name, l_lat, l_lon, wdp])
+        return sorted(result_list, key=lambda r: r[0])
+
+
+location_service = LocationService()
@@ -0,0 +1,216 @@
+"""
+                    Project MOSASAUR - proximity.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Proximity file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from project.robot_db.python.typeDB_main.location import location_service, haversine, to_float, EARTH_RADIUS
+from project.robot_db.python.typeDB_main.telemetry import query_site
+import threading
+import math
+try:
+    import numpy as np
+except ImportError:                                             # distances computed one by one (slower)
+    np = None
+
+
+class ProximityIndex:
+    """
+    Coordinates of the located assets (things with a locating relation, see LocationService) in arrays, to rank
+    thousands of candidates by distance to a position in one vectorized pass (haversine, plus the water depth
+    difference if the depth is given). The candidates are filtered by type, function, element-type or
+    tag-number prefix through precomputed index arrays. It is rebuilt when the location index is reloaded.
+    """
+    def __init__(self, locations=None):
+        self.locations = location_service if locations is None else locations
+        self.lock = threading.RLock()
+        self.version = None                                     # version of the location index
+        self.rows = []                                          # [type, tag-number, element-type, landmark, lat, lon, depth]
+        self.by_type = {}                                       # type (and supertypes) -> row indexes
+        self.by_attribute = {}                                  # (attribute, value) -> row indexes
+        self.tags = []
+        self.lat = []                                           # radians
+        self.lon = []
+        self.depth = []                                         # nan if unknown
+
+    def build(self):
+        rows = []
+        by_type = {}
+        by_attribute = {}
+        for iid, landmarks in self.locations.located.items():
+            types, attributes = self.locations.things[iid]
+            values = {}
+            for attribute, value in sorted(attributes, key=lambda a: str(a[1])):
+                values.setdefault(attribute, value)
+            for landmark in landmarks:
+                for name, lat, lon, wdp in self.locations.landmarks.get(landmark, []):
+                    if to_float(lat) is None or to_float(lon) is None:
+                        continue
+                    for label in types:
+                        by_type.setdefault(label, []).append(len(rows))
+                    for attribute in attributes:
+                        by_attribute.setdefault(attribute, []).append(len(rows))
+                    rows.append([types[0], values.get('tag-number', ''), values.get('element-type', ''), name,
+                                 to_float(lat), to_float(lon), to_float(wdp)])
+        lat = [math.radians(r[4]) for r in rows]
+        lon = [math.radians(r[5]) for r in rows]
+        depth = [math.nan if r[6] is None else r[6] for r in rows]
+        tags = [str(r[1]) for r in rows]
+        if np is not None:
+            by_type = {k: np.array(v, dtype=np.intp) for k, v in by_type.items()}
+            by_attribute = {k: np.array(v, dtype=np.intp) for k, v in by_attribute.items()}
+            lat, lon, depth, tags = np.array(lat), np.array(lon), np.array(depth), np.array(tags, dtype=str)
+        with self.lock:
+            self.rows = rows
+            self.by_type = by_type
+            self.by_attribute = by_attribute
+            self.tags = tags
+            self.lat = lat
+            self.lon = lon
+            self.depth = depth
+
+    def ensure(self, tx):
+        """
+        :return: True if the index can be used (the location index is loaded)
+        """
+        if not self.locations.ensure(tx):
+            return False
+        with self.lock:
+            if self.version != self.locations.version:
+                self.build()
+                self.version = self.locations.version
+        return True
+
+    def candidates(self, x_type=None, function=None, element_type=None, tag_prefix=None):
+        """
+        :return: indexes of the rows matching every filter (None matches anything)
+        """
+        empty = np.array([], dtype=np.intp) if np is not None else []
+        selected = np.arange(len(self.rows)) if np is not None else list(range(len(self.rows)))
+        filters = [self.by_type.get(x_type, empty) if x_type is not None else None,
+                   self.by_attribute.get(('function', function), empty) if function is not None else None,
+                   self.by_attribute.get(('element-type', element_type), empty) if element_type is not None else None]
+        for index in filters:
+            if index is None:
+                continue
+            if np is not None:
+                selected = np.intersect1d(selected, index, assume_unique=True)
+            else:
+                index = set(index)
+                selected = [i for i in selected if i in index]
+        if tag_prefix is not None:
+            if np is not None:
+                selected = selected[np.char.startswith(self.tags[selected], tag_prefix)]
+            else:
+                selected = [i for i in selected if self.tags[i].startswith(tag_prefix)]
+        return selected
+
+    def distances(self, selected, lat, lon, depth=None):
+        """
+        :param selected: row indexes
+        :param lat: latitude of the position (degrees)
+        :param lon: longitude of the position (degrees)
+        :param depth: water depth of the position (m)
+        :return: distances (m) from the position to the selected rows
+        """
+        if np is None:
+            result_list = []
+            for i in selected:
+                distance = haversine(lat, lon, self.rows[i][4], self.rows[i][5])
+                if depth is not None and not math.isnan(self.depth[i]):
+                    distance = math.hypot(distance, self.depth[i] - depth)
+                result_list.append(distance)
+            return result_list
+        p_lat = math.radians(lat)
+        lat2 = self.lat[selected]
+        a = np.sin((lat2 - p_lat) / 2) ** 2 + \
+            math.cos(p_lat) * np.cos(lat2) * np.sin((self.lon[selected] - math.radians(lon)) / 2) ** 2
+        distance = 2 * EARTH_RADIUS * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+        if depth is not None:
+            delta = self.depth[selected] - depth
+            distance = np.where(np.isnan(delta), distance, np.hypot(distance, delta))
+        return distance
+
+    def nearest(self, tx, lat, lon, depth=None, x_type=None, function=None, element_type=None, tag_prefix=None,
+                limit=10, radius=None):
+        """
+        Which assets are the nearest to a position ?
+        :param lat: latitude of the position (degrees)
+        :param lon: longitude of the position (degrees)
+        :param depth: water depth of the position (m) - the distance includes the depth difference if provided
+        :param x_type: type of the assets (subtypes included), e.g. 'tool'
+        :param function: function of the assets, e.g. 'clean'
+        :param element_type: element-type of the assets
+        :param tag_prefix: beginning of the tag-number of the assets
+        :param limit: number of assets returned (None for all)
+        :param radius: maximum distance (m)
+        :return: [distance (m), type, tag-number, element-type, landmark, latitude, longitude, water-depth]
+                 sorted by distance, None if the location index is unavailable
+        """
+        if not self.ensure(tx):
+            return None
+        with self.lock:
+            selected = self.candidates(x_type, function, element_type, tag_prefix)
+            distance = self.distances(selected, lat, lon, depth)
+            rows = self.rows
+        if np is not None:
+            if radius is not None:
+                selected, distance = selected[distance <= radius], distance[distance <= radius]
+            if limit is not None and limit < len(distance):     # only the candidates up to the limit-th distance
+                keep = distance <= np.partition(distance, limit - 1)[limit - 1]
+                selected, distance = selected[keep], distance[keep]
+            order = np.lexsort((selected, distance))[:limit]    # ties in row order
+            ranked = zip(distance[order].tolist(), selected[order].tolist())
+        else:
+            ranked = sorted((d, i) for d, i in zip(distance, selected) if radius is None or d <= radius)[:limit]
+        return [[d] + rows[i] for d, i in ranked]
+
+    def rank_tools(self, tx, command, tools, position):
+        """
+        Ranks the tools of a command by the distance of their nearest located instance to the position.
+        :param command: tool function (e.g. 'clean')
+        :param tools: element-types of the tools (see tool_list)
+        :param position: (latitude, longitude) or (latitude, longitude, water-depth)
+        :return: {element-type: [distance (m), tag-number, landmark]} of the located tools (in ranking order),
+                 None if the location index is unavailable
+        """
+        lat, lon, depth = (list(position) + [None])[:3]
+        nearest = self.nearest(tx, lat, lon, depth, 'tool', command, limit=None)
+        if nearest is None:
+            return None
+        ranking = {}
+        for distance, _, tag, e_type, landmark, _, _, _ in nearest:
+            if e_type in tools and e_type not in ranking:
+                ranking[e_type] = [distance, tag, landmark]
+        return ranking
+
+
+proximity_index = ProximityIndex()
+
+
+@query_site(infer=False)
+def rank_tools(tx, command, tools, position):
+    """
+    Query site of ProximityIndex.rank_tools (the tool ranking of a command, from the location index).
+    """
+    return proximity_index.rank_tools(tx, command, tools, position)
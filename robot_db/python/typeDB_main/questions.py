@@ -0,0 +1,118 @@
+"""
+                    Project MOSASAUR - questions.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Questions file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typedb.client import TransactionType
+from project.robot_db.python.typeDB_main.telemetry import query_sites
+from project.robot_db.python.typeDB_main.tracing import tracer
+from concurrent.futures import Future
+import threading
+
+
+class Questions:
+    """
+    The questions of the situation awareness procedure for one phrase, each one a function of a
+    transaction registered under a name ('command-type', ('element-type', element), ...).
+    A question may answer other questions inside its function, which makes the dependency graph of
+    the phrase: e.g. the relations of an element need its element type.
+        Sequential mode (executor=None): ask() only registers the question, and answer() runs it on the
+        transaction of command_line the first time it is needed - the original order of the queries.
+        Concurrent mode: ask() submits the question to the executor at once, on its own pooled READ
+        transaction, so independent branches run in parallel while answer() waits for the result.
+    Every question is answered once per phrase (the answers are memoized).
+    A question may name the query site it runs (see query_site): its transaction then comes from the
+    pool of the reasoning options of the site, and only the questions whose site has the options of
+    the command_line transaction run on it.
+    A question that is not started yet when it is needed is run by the thread that needs it, so no
+    thread ever waits for a question still queued in the executor.
+    """
+    def __init__(self, connection, db_name, session_type, options, transaction=None, executor=None):
+        self.connection = connection
+        self.db_name = db_name
+        self.session_type = session_type
+        self.options = options
+        self.transaction = transaction
+        self.executor = executor
+        self.owner = threading.get_ident()                      # thread allowed to use self.transaction
+        self.futures = {}                                       # name -> Future of the answer
+        self.functions = {}                                     # name -> function(tx)
+        self.sites = {}                                         # name -> TypeDBOptions of the question
+        self.lock = threading.Lock()
+
+    def ask(self, name, function, site=None):
+        """
+        Registers a question (submitted at once in concurrent mode). Asking it again does nothing.
+        :param name: name of the question (hashable)
+        :param function: function(tx) returning the answer
+        :param site: query site run by the function (None for the options of the questions)
+        :return: Future of the answer
+        """
+        with self.lock:
+            if name in self.futures:
+                return self.futures[name]
+            future = Future()
+            self.futures[name] = future
+            self.functions[name] = function
+            self.sites[name] = options = query_sites.options(site, self.options)
+        if self.executor is not None:
+            self.executor.submit(self.run, name, future, function, options)
+        return future
+
+    def answer(self, name, function=None, site=None):
+        """
+        Returns the answer of a question, running it now if it was not started yet.
+        :param name: name of the question
+        :param function: function(tx) of the question, if it may not have been asked before
+        :param site: query site of the function (see ask)
+        :return: answer (the exception of the question is raised again here)
+        """
+        future = self.ask(name, function, site) if function is not None else self.futures[name]
+        if self.claim(future):                                  # not started yet - run it on this thread
+            options = self.sites[name]
+            inline = self.transaction is not None and threading.get_ident() == self.owner and \
+                self.connection.options_key(options) == self.connection.options_key(self.options)
+            self.run(name, future, self.functions[name], options, self.transaction if inline else None,
+                     claimed=True)
+        return future.result()
+
+    def claim(self, future):
+        with self.lock:
+            return not future.running() and not future.done() and future.set_running_or_notify_cancel()
+
+    def run(self, name, future, function, options, tx=None, claimed=False):
+        if not claimed and not self.claim(future):
+            return                                              # already answered by another thread
+        try:
+            with tracer.span(str(name), 'question', inline=tx is not None):
+                if tx is None:
+                    with self.connection.transaction(self.db_name, self.session_type, TransactionType.READ,
+                                                     options) as pooled_tx:
+                        result = function(pooled_tx)
+                else:
+                    result = function(tx)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
@@ -0,0 +1,88 @@
+"""
+                    Project MOSASAUR - report.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Situation report file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+class ElementReport:
+    """
+    Answer of Q2 (What kind of element is ... ?) for one element of the phrase.
+    """
+    def __init__(self, element, e_type, tag='', superclass=None):
+        self.element = element
+        self.e_type = e_type                                    # (label, entity | attribute | owner type)
+        self.tag = tag                                          # 'has tag-number: ...' ('' if none)
+        self.superclass = superclass
+        self.compliance = None                                  # None (entity) | True | False
+        self.requires_tool = False
+
+    def to_dict(self):
+        return {'element': self.element, 'type': list(self.e_type), 'tag': self.tag,
+                'superclass': None if self.superclass is None else str(self.superclass),
+                'compliance': self.compliance, 'requires_tool': self.requires_tool}
+
+
+class SituationReport:
+    """
+    Result of the situation awareness procedure of one phrase (see QueryModel.assess).
+    The fields hold the answers of the questions; 'sections' keeps them in the order they are
+    presented by QueryModel.render, which is only one consumer of the report.
+    If the procedure stopped on a ComplianceError or a LocationError, 'error' holds it and the
+    report contains the answers up to that point.
+    """
+    def __init__(self, phrase, command_line=None):
+        self.phrase = phrase
+        self.command_line = command_line                        # phrase dictionary (see phrase2dict)
+        self.command = None
+        self.command_type = None
+        self.use_tool = False
+        self.goals = []
+        self.tools = None                                       # only for tool commands (nearest first)
+        self.tool_distances = {}                                # tool -> [distance (m), tag-number, landmark]
+        self.position = None                                    # actual location (see QueryModel.command_line)
+        self.goal_location = ''
+        self.elements = []                                      # [ElementReport]
+        self.relations = {}                                     # element -> {relation: [RelationEntry]}
+        self.target = None                                      # target location element [type, tag-number]
+        self.target_location = None                             # coordinates of the target location
+        self.common_elements = None                             # [(element, tag-number)] of target and local
+        self.compliance = None                                  # None (not checked) | True | False
+        self.error = None
+        self.sections = []                                      # [(kind, data)] in rendering order
+
+    def add(self, kind, *data):
+        self.sections.append((kind, data))
+
+    def to_dict(self):
+        return {'phrase': self.phrase, 'command': self.command, 'command_type': self.command_type,
+                'use_tool': self.use_tool, 'goals': self.goals, 'tools': self.tools,
+                'tool_distances': self.tool_distances, 'position': self.position,
+                'goal_location': self.goal_location,
+                'elements': [e.to_dict() for e in self.elements],
+                'relations': {e: {rel: [i._asdict() for i in items] for rel, items in d.items()}
+                              for e, d in self.relations.items()},
+                'target': self.target,
+                'target_location': self.target_location, 'common_elements': self.common_elements,
+                'compliance': self.compliance,
+                'error': None if self.error is None else type(self.error).__name__}
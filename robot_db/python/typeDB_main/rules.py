@@ -29,6 +29,9 @@ NOTE: NO RULE IS PROVIDED IN THIS FILE SINCE THEY ARE INTELLECTUAL PROPERTY.
 from project.robot_db.python.typeDB_main.builder import BuildModel
 from typedb.client import SessionType, TransactionType
 from project.robot_db.python.typeDB_main.color_text import Color, Box
+from project.robot_db.python.typeDB_main.connection import connection
+from project.robot_db.python.typeDB_main.cache import type_cache, relation_cache
+from project.robot_db.python.typeDB_main.snapshot import invalidate_snapshot
 import pprint
 
 color = Color()
@@ -39,6 +42,7 @@ class RuleBuilder:
     def __init__(self):
         self.db_name = "robot_db"
         self.client = BuildModel.Client().client
+        self.connection = connection()
         self.session_type = SessionType.SCHEMA
         self.transaction_type = TransactionType.WRITE
         self.rule_set = \
@@ -49,22 +53,23 @@ class RuleBuilder:
         condition = rule_set[rule_name]['when']
         conclusion = rule_set[rule_name]['then']
         session_type = SessionType.SCHEMA
-        with self.client.session(self.db_name, session_type) as sch_session:
-            with sch_session.transaction(TransactionType.WRITE) as transaction:
-                if erase is False:
-                    msg = box.cyan(f'\u26A0\u0009 > BUILD ({rule_name})')
-                    print(msg)
-                    query = f'define rule {rule_name}: when {condition} then {conclusion};'
-                    print(f'{color.c6(f"rule {rule_name}:")}' + '\n\u0009' +
-                          f'{color.c7(f"when {condition}")}' + '\n\u0009' +
-                          f'{color.c4(f"then {conclusion}")}')
-                    transaction.query().define(query)
-                    transaction.commit() if commitment else None
-                else:
-                    msg = box.red(f'\u26A0\u0009 > ERASE ({rule_name})')
-                    print(msg)
-                    query = f'undefine rule {rule_name};'
-                    transaction.query().undefine(query)
-                    transaction.commit() if commitment else None
-            transaction.close()
+        with self.connection.transaction(self.db_name, session_type, TransactionType.WRITE) as transaction:
+            if erase is False:
+                msg = box.cyan(f'\u26A0\u0009 > BUILD ({rule_name})')
+                print(msg)
+                query = f'define rule {rule_name}: when {condition} then {conclusion};'
+                print(f'{color.c6(f"rule {rule_name}:")}' + '\n\u0009' +
+                      f'{color.c7(f"when {condition}")}' + '\n\u0009' +
+                      f'{color.c4(f"then {conclusion}")}')
+                transaction.query().define(query)
+                transaction.commit() if commitment else None
+            else:
+                msg = box.red(f'\u26A0\u0009 > ERASE ({rule_name})')
+                print(msg)
+                query = f'undefine rule {rule_name};'
+                transaction.query().undefine(query)
+                transaction.commit() if commitment else None
+        type_cache.invalidate()
+        relation_cache.bump()
+        invalidate_snapshot(self.db_name)
 
@@ -0,0 +1,295 @@
+"""
+                    Project MOSASAUR - snapshot.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Schema snapshot file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from project.robot_db.python.typeDB_main.instrument import match_rows
+import hashlib
+import threading
+import json
+import os
+
+roots = ['entity', 'attribute', 'relation']
+
+
+def split_top_level(text, separator):
+    """
+    Splits a TypeQL text on a separator that is outside quotes and braces.
+    :param text: TypeQL text
+    :param separator: ';' (statements) or ',' (clauses of a statement)
+    :return: list of stripped, non-empty parts
+    """
+    parts = []
+    depth = 0
+    quote = None
+    start = 0
+    for n, ch in enumerate(text):
+        if quote:
+            if ch == quote and text[n - 1] != '\\':
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+        elif ch == separator and depth == 0:
+            parts.append(text[start:n].strip())
+            start = n + 1
+    parts.append(text[start:].strip())
+    return [p for p in parts if p]
+
+
+class TypeHierarchy:
+    """
+    Tree of the schema types built from their direct supertype edges. TypeHierarchy.load gets every
+    edge with a single 'sub!' query, instead of one query per type of the tree.
+    """
+    def __init__(self, parents):
+        self.parents = parents                                  # label -> supertype label
+        self.children_of = {}                                   # label -> [subtype labels]
+        for label, parent in parents.items():
+            self.children_of.setdefault(parent, []).append(label)
+
+    @classmethod
+    def load(cls, tx):
+        """
+        :param tx: open transaction (schema or data session)
+        :return: TypeHierarchy of every entity, attribute and relation type
+        """
+        parents = {}
+        for cmap in match_rows(tx, 'match $t sub! $s; $s sub thing; get $t, $s;'):
+            parents[cmap.get('t').get_label().name()] = cmap.get('s').get_label().name()
+        return cls(parents)
+
+    def children(self, label):
+        return self.children_of.get(label, [])
+
+    def ancestors(self, label):
+        """
+        :return: label and its supertypes up to the root type
+        """
+        result_list = [label]
+        while result_list[-1] in self.parents:
+            result_list.append(self.parents[result_list[-1]])
+        return result_list
+
+    def tree(self, label):
+        """
+        :return: nested dictionary of the subtypes of label (same format as Schema.schema_dict)
+        """
+        result_dict = {}
+        for concept in self.children(label):
+            sub_dict = self.tree(concept)
+            result_dict[concept] = sub_dict if sub_dict else ''
+        return result_dict
+
+    def ordered(self, label):
+        """
+        :return: subtypes of label in topological order (every type comes after its supertype)
+        """
+        result_list = []
+        pending = list(reversed(self.children(label)))
+        while pending:
+            concept = pending.pop()
+            result_list.append(concept)
+            pending.extend(reversed(self.children(concept)))
+        return result_list
+
+
+class SchemaSnapshot:
+    """
+    Parsed copy of the schema of a database: type hierarchy, attribute ownerships, value types,
+    relation roles, played roles and rules. It is saved on disk as JSON, keyed by the SHA-256 hash
+    of the schema text, so a process restart reuses it instead of deriving the schema again with
+    one query per type (see schema_snapshot).
+    """
+    def __init__(self, schema_hash=''):
+        self.hash = schema_hash
+        self.parents = {}                                       # label -> supertype label
+        self.kinds = {root: root for root in roots}             # label -> entity | attribute | relation
+        self.abstract = []
+        self.value_types = {}                                   # attribute label -> long | string | ...
+        self.owns = {}                                          # label -> [attribute labels]
+        self.keys = {}                                          # label -> [@key attribute labels]
+        self.plays = {}                                         # label -> ['relation:role']
+        self.relates = {}                                       # relation label -> [role names]
+        self.rules = {}                                         # rule name -> {'when': ..., 'then': ...}
+
+    @staticmethod
+    def schema_hash(schema_text):
+        return hashlib.sha256(schema_text.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def parse(cls, schema_text):
+        """
+        Parses the text returned by database().schema() (a TypeQL 'define' query).
+        :param schema_text: schema of the database
+        :return: SchemaSnapshot
+        """
+        snapshot = cls(cls.schema_hash(schema_text))
+        lines = [line for line in schema_text.split('\n') if not line.strip().startswith('#')]
+        text = '\n'.join(lines).strip()
+        text = text[len('define'):] if text.startswith('define') else text
+
+        for statement in split_top_level(text, ';'):
+            if statement.startswith('rule '):
+                snapshot.parse_rule(statement)
+            else:
+                snapshot.parse_type(statement)
+        snapshot.resolve()
+        return snapshot
+
+    def parse_rule(self, statement):
+        name = statement[len('rule '):statement.index(':')].strip()
+        body = statement[statement.index(':') + 1:]
+        when = body[body.index('when') + len('when'):body.rindex('then')].strip()
+        then = body[body.rindex('then') + len('then'):].strip()
+        self.rules[name] = {'when': when, 'then': then}
+
+    def parse_type(self, statement):
+        clauses = split_top_level(statement, ',')
+        words = clauses[0].split()
+        if len(words) < 3 or words[1] != 'sub':
+            return
+        label = words[0]
+        self.parents[label] = words[2]
+        for clause in clauses[1:] + [' '.join(words[3:])]:
+            tokens = clause.split()
+            if not tokens:
+                continue
+            if tokens[0] == 'abstract':
+                self.abstract.append(label)
+            elif tokens[0] == 'value' and len(tokens) > 1:
+                self.value_types[label] = tokens[1]
+            elif tokens[0] == 'owns' and len(tokens) > 1:
+                self.owns.setdefault(label, []).append(tokens[1])
+                if '@key' in tokens:
+                    self.keys.setdefault(label, []).append(tokens[1])
+            elif tokens[0] == 'plays' and len(tokens) > 1:
+                self.plays.setdefault(label, []).append(tokens[1])
+            elif tokens[0] == 'relates' and len(tokens) > 1:
+                self.relates.setdefault(label, []).append(tokens[1])
+
+    def resolve(self):
+        """
+        Computes the root kind of every type and the inherited value types.
+        """
+        for label in self.parents:
+            chain = []
+            current = label
+            while current in self.parents and current not in roots and current not in chain:
+                chain.append(current)
+                current = self.parents[current]
+            if current in roots:
+                for c in chain:
+                    self.kinds[c] = current
+        for label, kind in self.kinds.items():
+            if kind == 'attribute' and label not in self.value_types:
+                current = self.parents.get(label)
+                while current is not None and current not in self.value_types:
+                    current = self.parents.get(current)
+                if current is not None:
+                    self.value_types[label] = self.value_types[current]
+
+    def hierarchy(self, label):
+        """
+        :return: nested dictionary of the subtypes of label (same format as Schema.schema_dict)
+        """
+        return TypeHierarchy(self.parents).tree(label)
+
+    def roles(self):
+        """
+        :return: role name -> first relation relating it
+        """
+        roles = {}
+        for relation, role_list in self.relates.items():
+            for role in role_list:
+                roles.setdefault(role, relation)
+        return roles
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data):
+        snapshot = cls()
+        snapshot.__dict__.update(data)
+        return snapshot
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+snapshot_folder = './project/robot_db/cache'
+snapshots = {}                                                  # db_name -> SchemaSnapshot (this process)
+snapshots_lock = threading.Lock()
+
+
+def schema_snapshot(client, db_name, folder=None):
+    """
+    Returns the schema snapshot of the database. The schema text is fetched (one round trip) to
+    compute its hash; the snapshot on disk is used when the hash matches, otherwise the text is
+    parsed and the snapshot saved again.
+    :param client: TypeDB client
+    :param db_name: name of the database
+    :param folder: folder of the snapshot files
+    :return: SchemaSnapshot
+    """
+    folder = snapshot_folder if folder is None else folder
+    schema_text = client.databases().get(db_name).schema()
+    schema_hash = SchemaSnapshot.schema_hash(schema_text)
+    with snapshots_lock:
+        snapshot = snapshots.get(db_name)
+        if snapshot is not None and snapshot.hash == schema_hash:
+            return snapshot
+        path = os.path.join(folder, f'{db_name}_schema.json')
+        snapshot = None
+        if os.path.exists(path):
+            try:
+                snapshot = SchemaSnapshot.load(path)
+            except (ValueError, OSError):
+                snapshot = None
+        if snapshot is None or snapshot.hash != schema_hash:
+            snapshot = SchemaSnapshot.parse(schema_text)
+            try:
+                snapshot.save(path)
+            except OSError:
+                pass                                            # read-only folder - keep it in memory
+        snapshots[db_name] = snapshot
+        return snapshot
+
+
+def invalidate_snapshot(db_name):
+    with snapshots_lock:
+        snapshots.pop(db_name, None)
@@ -0,0 +1,1348 @@
+"""
+                    Project MOSASAUR - standin.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+TypeDB stand-in file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from project.robot_db.python.typeDB_main import client_standin     # typedb.client without typedb-client
+from typedb.client import TransactionType
+from project.robot_db.python.typeDB_main.connection import connection
+from project.robot_db.python.typeDB_main.cache import type_cache, value_index, relation_cache
+from project.robot_db.python.typeDB_main.location import location_service
+from project.robot_db.python.typeDB_main.snapshot import split_top_level, snapshots, snapshots_lock, roots
+from project.robot_db.python.typeDB_main.instrument import template
+import itertools
+import threading
+import random
+import json
+import math
+import time
+import re
+
+INFINITE = float('inf')
+VARIABLE = re.compile(r'\$[\w-]+')
+NUMBER = re.compile(r'-?\d+(\.\d+)?$')
+
+
+class StandInError(Exception):
+    """
+    Error of the stand-in, with the message format of the TypeDB server errors.
+    """
+
+
+def type_error(label):
+    return StandInError(f"[TYR03] Invalid Type Read: The type '{label}' does not exist.")
+
+
+def syntax_error(text):
+    return StandInError(f'[TQL03] TypeQL Syntax Read: unsupported pattern "{text}".')
+
+
+def closed_error():
+    return StandInError('[TXN04] Invalid Transaction Operation: The transaction has been closed and no further '
+                        'operation is allowed.')
+
+
+def wait(deadline):
+    """
+    Sleeps until the deadline (time.perf_counter), if it is not past.
+    """
+    delay = deadline - time.perf_counter()
+    time.sleep(delay) if delay > 0 else None
+
+
+# ━━┥ CONCEPTS ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class Label:
+    __slots__ = ('scope', 'label')
+
+    def __init__(self, label, scope=None):
+        self.label = label
+        self.scope = scope                                      # relation of a role type
+
+    def name(self):
+        return self.label
+
+    def scoped_name(self):
+        return f'{self.scope}:{self.label}' if self.scope else self.label
+
+    def __str__(self):
+        return self.scoped_name()
+
+    def __repr__(self):
+        return self.scoped_name()
+
+    def __eq__(self, other):
+        return isinstance(other, Label) and (self.scope, self.label) == (other.scope, other.label)
+
+    def __hash__(self):
+        return hash((self.scope, self.label))
+
+
+class ValueType:
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name.upper()                                # STRING | LONG | DOUBLE | BOOLEAN | DATETIME
+
+    def __str__(self):
+        return self.name
+
+
+class Concept:
+    """
+    Concept of the stand-in. It is local and holds all its properties, so the conversions of the client
+    API (as_entity, as_remote, ...) return the concept itself.
+    """
+    def as_remote(self, tx):
+        return self
+
+    def as_thing(self):
+        return self
+
+    def as_entity(self):
+        return self
+
+    def as_relation(self):
+        return self
+
+    def as_attribute(self):
+        return self
+
+    def as_type(self):
+        return self
+
+    def as_thing_type(self):
+        return self
+
+    def as_entity_type(self):
+        return self
+
+    def as_relation_type(self):
+        return self
+
+    def as_attribute_type(self):
+        return self
+
+    def as_role_type(self):
+        return self
+
+
+class Type(Concept):
+    def __init__(self, label, kind, supertype=None, value_type=None, abstract=False, scope=None):
+        self.label = Label(label, scope)
+        self.kind = kind                                        # thing | entity | relation | attribute | role
+        self.supertype = supertype
+        self.value_type = ValueType(value_type) if value_type else None
+        self.abstract = abstract
+        self.owns = []                                          # attribute labels
+        self.keys = []                                          # @key attribute labels
+        self.plays = []                                         # 'relation:role'
+        self.relates = []                                       # role types
+
+    def get_label(self):
+        return self.label
+
+    def get_supertype(self):
+        return self.supertype
+
+    def get_value_type(self):
+        return self.value_type
+
+    def is_abstract(self):
+        return self.abstract
+
+    def is_type(self):
+        return True
+
+    def is_thing(self):
+        return False
+
+    def is_thing_type(self):
+        return self.kind != 'role'
+
+    def is_entity_type(self):
+        return self.kind == 'entity'
+
+    def is_relation_type(self):
+        return self.kind == 'relation'
+
+    def is_attribute_type(self):
+        return self.kind == 'attribute'
+
+    def is_role_type(self):
+        return self.kind == 'role'
+
+    def ancestors(self):
+        current = self
+        while current is not None:
+            yield current
+            current = current.supertype
+
+    def __repr__(self):
+        return f'Type({self.label})'
+
+
+class Thing(Concept):
+    def __init__(self, iid, thing_type, value=None):
+        self.iid = iid
+        self.type = thing_type
+        self.value = value                                      # attributes only
+        self.attributes = []                                    # owned attributes
+        self.owners = []                                        # owners (attributes only)
+        self.relations = []                                     # relations played in
+        self.players = []                                       # [(role type, player)] (relations only)
+
+    def get_iid(self):
+        return self.iid
+
+    def get_type(self):
+        return self.type
+
+    def get_value(self):
+        return self.value
+
+    def is_inferred(self):
+        return False
+
+    def is_type(self):
+        return False
+
+    def is_thing(self):
+        return True
+
+    def is_entity(self):
+        return self.type.kind == 'entity'
+
+    def is_relation(self):
+        return self.type.kind == 'relation'
+
+    def is_attribute(self):
+        return self.type.kind == 'attribute'
+
+    def __repr__(self):
+        return f'{self.type.label}({self.iid})' if self.value is None else f'{self.type.label}({self.value!r})'
+
+
+class ConceptMap:
+    __slots__ = ('variables',)
+
+    def __init__(self, variables):
+        self.variables = variables                              # variable name (without $) -> concept
+
+    def get(self, variable):
+        return self.variables.get(variable.lstrip('$'))
+
+    def map(self):
+        return self.variables
+
+    def concepts(self):
+        return list(self.variables.values())
+
+
+class Numeric:
+    """
+    Answer of a match aggregate query (also its own QueryFuture: get returns it).
+    """
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self
+
+    def is_int(self):
+        return isinstance(self.value, int)
+
+    def is_float(self):
+        return isinstance(self.value, float)
+
+    def as_int(self):
+        return int(self.value)
+
+    def as_float(self):
+        return float(self.value)
+
+
+# ━━┥ PATTERNS ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# Every constraint of a conjunction gives the cost of its next step for a partial answer (cost) and
+# extends the partial answer in every possible way (bind). World.solve always binds the cheapest one.
+
+def extend(binding, *pairs):
+    result = dict(binding)
+    for variable, concept in zip(pairs[::2], pairs[1::2]):
+        if variable is not None:
+            result[variable] = concept
+    return result
+
+
+class Isa:
+    def __init__(self, var, label, exact=False):
+        self.var = var
+        self.label = label
+        self.exact = exact                                      # isa!
+        self.variables = {var}
+
+    def cost(self, world, binding):
+        return 0 if self.var in binding else len(world.instances(self.label, self.exact))
+
+    def bind(self, world, binding):
+        x = binding.get(self.var)
+        if x is None:
+            for thing in world.instances(self.label, self.exact):
+                yield extend(binding, self.var, thing)
+        elif isinstance(x, Thing) and world.is_a(x.type, self.label, self.exact):
+            yield binding
+
+
+class Has:
+    def __init__(self, owner, label=None, var=None, value=None):
+        self.owner = owner
+        self.label = label                                      # attribute type (None for any)
+        self.var = var                                          # attribute variable, or
+        self.value = value                                      # attribute value
+        self.variables = {owner, var} - {None}
+
+    def cost(self, world, binding):
+        if self.owner in binding or (self.var is not None and self.var in binding):
+            return 1
+        if self.var is None:
+            return 2
+        return len(world.ownerships)
+
+    def bind(self, world, binding):
+        owner = binding.get(self.owner)
+        attribute = binding.get(self.var) if self.var is not None else None
+        if owner is not None:
+            pairs = [(owner, a) for a in owner.attributes] if isinstance(owner, Thing) else []
+        elif attribute is not None:
+            pairs = [(o, attribute) for o in attribute.owners] if isinstance(attribute, Thing) else []
+        elif self.var is None:
+            pairs = [(o, a) for a in world.by_value.get(self.value, []) for o in a.owners]
+        else:
+            pairs = world.ownerships
+        for o, a in pairs:
+            if self.label is not None and not world.is_a(a.type, self.label):
+                continue
+            if self.var is None and a.value != self.value:
+                continue
+            if attribute is not None and a is not attribute:
+                continue
+            yield extend(binding, self.owner, o, self.var, a)
+
+
+class Value:
+    def __init__(self, var, value):
+        self.var = var
+        self.value = value
+        self.variables = {var}
+
+    def cost(self, world, binding):
+        return 0 if self.var in binding else 2
+
+    def bind(self, world, binding):
+        x = binding.get(self.var)
+        if x is None:
+            for attribute in world.by_value.get(self.value, []):
+                yield extend(binding, self.var, attribute)
+        elif isinstance(x, Thing) and x.type.kind == 'attribute' and x.value == self.value:
+            yield binding
+
+
+class RolePlayers:
+    """
+    $r(role: $x, $role: $y, $z) - the role of a player is a label, a variable or any role (None).
+    """
+    def __init__(self, var, players):
+        self.var = var
+        self.players = players                                  # [(role label | $role | None, player variable)]
+        self.variables = {var} | {p for _, p in players} | {r[1:] for r, _ in players if r and r[0] == '$'}
+
+    def cost(self, world, binding):
+        if self.var in binding:
+            return 1
+        if any(p in binding for _, p in self.players):
+            return 3
+        return len(world.relation_things)
+
+    def bind(self, world, binding):
+        relation = binding.get(self.var)
+        if relation is not None:
+            relations = [relation] if isinstance(relation, Thing) else []
+        else:
+            bound = [binding[p] for _, p in self.players if p in binding]
+            relations = (bound[0].relations if isinstance(bound[0], Thing) else []) if bound else \
+                world.relation_things
+        for r in relations:
+            yield from self.assign(r, 0, extend(binding, self.var, r), ())
+
+    def assign(self, relation, k, binding, used):
+        if k == len(self.players):
+            yield binding
+            return
+        role, var = self.players[k]
+        role_var = role[1:] if role and role[0] == '$' else None
+        for n, (role_type, player) in enumerate(relation.players):
+            if n in used:
+                continue
+            if role_var is None and role is not None and role not in (role_type.label.name(), str(role_type.label)):
+                continue
+            if role_var is not None and binding.get(role_var, role_type) is not role_type:
+                continue
+            if binding.get(var, player) is not player:
+                continue
+            yield from self.assign(relation, k + 1, extend(binding, var, player, role_var, role_type), used + (n,))
+
+
+class TypeIs:
+    def __init__(self, var, label):
+        self.var = var
+        self.label = label
+        self.variables = {var}
+
+    def cost(self, world, binding):
+        return 0 if self.var in binding else 1
+
+    def bind(self, world, binding):
+        t = world.type(self.label)
+        x = binding.get(self.var)
+        if x is None or x is t:
+            yield extend(binding, self.var, t)
+
+
+class Sub:
+    def __init__(self, var, supertype, exact=False):
+        self.var = var
+        self.sup_var = supertype[1:] if supertype.startswith('$') else None
+        self.label = None if self.sup_var else supertype
+        self.exact = exact                                      # sub!
+        self.variables = {var, self.sup_var} - {None}
+
+    def cost(self, world, binding):
+        if self.var in binding:
+            return 1
+        if self.sup_var is None or self.sup_var in binding:
+            return len(world.types)
+        return 2 * len(world.types)
+
+    def bind(self, world, binding):
+        x = binding.get(self.var)
+        s = world.type(self.label) if self.sup_var is None else binding.get(self.sup_var)
+        if x is not None:
+            if isinstance(x, Type):
+                for p in ([x.supertype] if self.exact else x.ancestors()):
+                    if p is not None and (s is None or p is s):
+                        yield extend(binding, self.sup_var, p)
+        elif s is not None:
+            if isinstance(s, Type):
+                for t in world.types.values():
+                    if (t.supertype is s) if self.exact else world.is_a(t, s.label.name()):
+                        yield extend(binding, self.var, t)
+        else:
+            for t in world.types.values():
+                for p in ([t.supertype] if self.exact else t.ancestors()):
+                    yield extend(binding, self.var, t, self.sup_var, p) if p is not None else None
+
+
+class Relates:
+    def __init__(self, var, role):
+        self.var = var
+        self.role_var = role[1:] if role.startswith('$') else None
+        self.role = None if self.role_var else role
+        self.variables = {var, self.role_var} - {None}
+
+    def cost(self, world, binding):
+        return 1 if self.var in binding else len(world.types)
+
+    def bind(self, world, binding):
+        r = binding.get(self.var)
+        relations = [r] if r is not None else [t for t in world.types.values() if t.kind == 'relation']
+        found = False
+        for relation in relations:
+            for role_type in getattr(relation, 'relates', []):
+                if self.role is not None and role_type.label.name() != self.role:
+                    continue
+                if self.role_var is not None and binding.get(self.role_var, role_type) is not role_type:
+                    continue
+                found = True
+                yield extend(binding, self.var, relation, self.role_var, role_type)
+        if not found and self.role is not None and self.role not in world.role_names:
+            raise type_error(self.role)
+
+
+class Iid:
+    def __init__(self, var, iid):
+        self.var = var
+        self.iid = iid
+        self.variables = {var}
+
+    def cost(self, world, binding):
+        return 0
+
+    def bind(self, world, binding):
+        thing = world.by_iid.get(self.iid)
+        if thing is not None and binding.get(self.var, thing) is thing:
+            yield extend(binding, self.var, thing)
+
+
+class Negation:
+    def __init__(self, constraints):
+        self.constraints = constraints
+        self.variables = set().union(*(c.variables for c in constraints))
+        self.outer = set()                                      # variables shared with the enclosing conjunction
+
+    def cost(self, world, binding):
+        return 0 if all(v in binding for v in self.outer) else INFINITE
+
+    def bind(self, world, binding):
+        if next(world.solve(self.constraints, binding), None) is None:
+            yield binding
+
+
+class Disjunction:
+    def __init__(self, branches):
+        self.branches = branches
+        self.variables = set().union(*(c.variables for branch in branches for c in branch))
+        self.outer = set()
+
+    def cost(self, world, binding):
+        return 1 if all(v in binding for v in self.outer) else 1000
+
+    def bind(self, world, binding):
+        for branch in self.branches:
+            yield from world.solve(branch, binding)
+
+
+class Pattern:
+    """
+    Parsed match query: the constraints of its conjunction, the variables of its answers, limit and count.
+    """
+    def __init__(self, constraints, variables, limit=None, offset=0, count=False):
+        self.constraints = constraints
+        self.variables = variables
+        self.limit = limit
+        self.offset = offset
+        self.count = count
+        self.size = size(constraints)                           # statements (for the latency model)
+
+
+def size(constraints):
+    total = 0
+    for c in constraints:
+        if isinstance(c, Negation):
+            total += size(c.constraints)
+        elif isinstance(c, Disjunction):
+            total += sum(size(branch) for branch in c.branches)
+        else:
+            total += 1
+    return total
+
+
+def parse_literal(text):
+    text = text.strip()
+    if len(text) > 1 and text[0] in '"\'' and text[-1] == text[0]:
+        return text[1:-1].replace(f'\\{text[0]}', text[0])
+    if text in ('true', 'false'):
+        return text == 'true'
+    if NUMBER.match(text):
+        return float(text) if '.' in text else int(text)
+    raise syntax_error(text)
+
+
+def parse_match(query):
+    """
+    Parses the subset of TypeQL sent by the model: isa, isa!, has, values, relations (role labels,
+    role variables or no role), type, sub, sub!, relates, iid, disjunctions and negations; get, limit,
+    offset, sort (ignored) and count.
+    :param query: match query
+    :return: Pattern
+    """
+    text = query.strip()
+    if not text.startswith('match'):
+        raise syntax_error(text[:40])
+    names = itertools.count()
+    statements = []
+    get = None
+    limit = None
+    offset = 0
+    count = False
+    for statement in split_top_level(text[len('match'):], ';'):
+        words = statement.split()
+        if words[0] == 'get':
+            get = [v.strip().lstrip('$') for v in statement[len('get'):].split(',') if v.strip()]
+        elif words[0] == 'limit':
+            limit = int(words[1])
+        elif words[0] == 'offset':
+            offset = int(words[1])
+        elif words[0] == 'count':
+            count = True
+        elif words[0] != 'sort':
+            statements.append(statement)
+    constraints = parse_conjunction(statements, names)
+    named = sorted({v for c in constraints if not isinstance(c, Negation) for v in c.variables if v[0] != '_'})
+    for v in get or []:
+        if v not in named:
+            raise StandInError(f'[TQL22] TypeQL Syntax Read: the variable ${v} is not in the match pattern.')
+    return Pattern(constraints, get if get is not None else named, limit, offset, count)
+
+
+def parse_conjunction(statements, names):
+    constraints = []
+    for statement in statements:
+        constraints.extend(parse_statement(statement, names))
+    for c in constraints:
+        if isinstance(c, (Negation, Disjunction)):
+            others = set().union(*(o.variables for o in constraints if o is not c))
+            c.outer = c.variables & others
+    return constraints
+
+
+def parse_block(text, names):
+    text = text.strip()
+    if not (text.startswith('{') and text.endswith('}')):
+        raise syntax_error(text)
+    return parse_conjunction(split_top_level(text[1:-1], ';'), names)
+
+
+def parse_statement(text, names):
+    text = text.strip()
+    if text.startswith('not') and text[len('not'):].lstrip().startswith('{'):
+        return [Negation(parse_block(text[len('not'):], names))]
+    if text.startswith('{'):
+        branches = []
+        depth = 0
+        start = 0
+        for n, ch in enumerate(text):
+            if ch == '{':
+                start = n if depth == 0 else start
+                depth += 1
+            elif ch == '}':
+                depth -= 1
+                branches.append(parse_block(text[start:n + 1], names)) if depth == 0 else None
+        return [Disjunction(branches)]
+
+    var = None
+    rest = text
+    if text.startswith('$'):
+        var = VARIABLE.match(text).group()[1:]
+        rest = text[len(var) + 1:].strip()
+    constraints = []
+    if rest.startswith('('):
+        end = rest.index(')')
+        players = []
+        for player in split_top_level(rest[1:end], ','):
+            role, _, name = player.rpartition(':')
+            players.append((role.strip() or None, name.strip().lstrip('$')))
+        var = f'_{next(names)}' if var is None else var
+        constraints.append(RolePlayers(var, players))
+        rest = rest[end + 1:].strip()
+    if var is None:
+        raise syntax_error(text)
+    for clause in split_top_level(rest, ','):
+        constraints.append(parse_clause(var, clause))
+    return constraints
+
+
+def parse_clause(var, clause):
+    keyword, _, argument = clause.partition(' ')
+    argument = argument.strip()
+    if keyword in ('isa', 'isa!'):
+        return Isa(var, argument, keyword == 'isa!')
+    if keyword == 'has':
+        label, _, target = argument.partition(' ')
+        if label.startswith('$'):
+            return Has(var, None, label[1:])
+        target = target.strip()
+        if target.startswith('$'):
+            return Has(var, label, target[1:])
+        return Has(var, label, None, parse_literal(target))
+    if keyword == 'type':
+        return TypeIs(var, argument)
+    if keyword in ('sub', 'sub!'):
+        return Sub(var, argument, keyword == 'sub!')
+    if keyword == 'relates':
+        return Relates(var, argument)
+    if keyword == 'iid':
+        return Iid(var, argument)
+    return Value(var, parse_literal(clause))
+
+
+# ━━┥ WORLD ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class World:
+    """
+    In-memory knowledge base of the stand-in: the schema types, the things, and an evaluator of the match
+    patterns sent by the model (see parse_match). Writes are not applied, so every run reads the same data,
+    and the answers of a query are computed once and kept.
+    """
+    def __init__(self):
+        self.types = {}                                         # label -> Type (thing types)
+        self.roles = {}                                         # 'relation:role' -> role Type
+        self.role_names = set()
+        self.instances_of = {}                                  # label -> [Thing] (exact type)
+        self.attribute_things = {}                              # (label, value) -> attribute Thing
+        self.by_value = {}                                      # value -> [attribute Things]
+        self.by_iid = {}
+        self.ownerships = []                                    # [(owner, attribute)]
+        self.relation_things = []
+        self.cache = {}                                         # (label, exact) -> subtypes, instances
+        self.patterns = {}                                      # query -> Pattern
+        self.answers = {}                                       # query -> [ConceptMap] | Numeric
+        thing = self.types['thing'] = Type('thing', 'thing')
+        for root in roots:
+            self.types[root] = Type(root, root, thing)
+        self.roles['relation:role'] = Type('role', 'role', scope='relation')
+        self.types['relation'].relates.append(self.roles['relation:role'])
+
+    # SCHEMA ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def define(self, label, supertype, value_type=None, abstract=False, owns=(), keys=(), plays=(), relates=()):
+        parent = self.types[supertype]
+        value_type = value_type or (parent.value_type.name if parent.value_type else None)
+        t = self.types[label] = Type(label, parent.kind, parent, value_type, abstract)
+        t.owns = list(owns) + [k for k in keys if k not in owns]
+        t.keys = list(keys)
+        t.plays = list(plays)
+        for role in relates:
+            role_type = self.roles[f'{label}:{role}'] = Type(role, 'role', self.roles['relation:role'], scope=label)
+            t.relates.append(role_type)
+            self.role_names.add(role)
+        self.cache = {}
+        return t
+
+    def type(self, label):
+        t = self.roles.get(label) if ':' in label else self.types.get(label)
+        if t is None:
+            raise type_error(label)
+        return t
+
+    def subtypes(self, label, exact=False):
+        """
+        :return: type of the label and its subtypes (only the type if exact), in definition order
+        """
+        key = ('subtypes', label, exact)
+        if key not in self.cache:
+            t = self.type(label)
+            self.cache[key] = [t] if exact else [s for s in self.types.values() if t in s.ancestors()]
+            self.cache[('set', label, exact)] = set(self.cache[key])
+        return self.cache[key]
+
+    def is_a(self, thing_type, label, exact=False):
+        self.subtypes(label, exact)
+        return thing_type in self.cache[('set', label, exact)]
+
+    def schema(self):
+        """
+        :return: schema text of the database (format of database().schema())
+        """
+        lines = ['define', '']
+        for label, t in self.types.items():
+            if label in roots or label == 'thing':
+                continue
+            clauses = [f'{label} sub {t.supertype.label.name()}']
+            clauses.append('abstract') if t.abstract else None
+            if t.value_type is not None and t.supertype.label.name() == 'attribute':
+                clauses.append(f'value {t.value_type.name.lower()}')
+            clauses.extend(f'owns {a} @key' if a in t.keys else f'owns {a}' for a in t.owns)
+            clauses.extend(f'plays {r}' for r in t.plays)
+            clauses.extend(f'relates {r.label.name()}' for r in t.relates)
+            lines.append(',\n    '.join(clauses) + ';')
+        return '\n'.join(lines) + '\n'
+
+    # DATA ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def thing(self, label, value=None):
+        t = self.type(label)
+        if t.abstract:
+            raise StandInError(f"[THW01] Invalid Thing Write: The type '{label}' is abstract.")
+        prefix = {'entity': '826e', 'relation': '846e', 'attribute': '866e'}[t.kind]
+        thing = Thing(f'0x{prefix}{len(self.by_iid) + 1:020x}', t, value)
+        self.by_iid[thing.iid] = thing
+        self.instances_of.setdefault(label, []).append(thing)
+        self.cache = {}
+        return thing
+
+    def attribute(self, label, value):
+        attribute = self.attribute_things.get((label, value))
+        if attribute is None:
+            attribute = self.attribute_things[(label, value)] = self.thing(label, value)
+            self.by_value.setdefault(value, []).append(attribute)
+        return attribute
+
+    def has(self, owner, label, value):
+        attribute = self.attribute(label, value)
+        if attribute not in owner.attributes:
+            owner.attributes.append(attribute)
+            attribute.owners.append(owner)
+            self.ownerships.append((owner, attribute))
+
+    def entity(self, label, attributes):
+        """
+        :param label: entity type
+        :param attributes: {attribute label: value}
+        :return: new entity
+        """
+        entity = self.thing(label)
+        for a_label, value in attributes.items():
+            self.has(entity, a_label, value)
+        return entity
+
+    def relation(self, label, players):
+        """
+        :param label: relation type
+        :param players: [(role, player)]
+        :return: new relation
+        """
+        relation = self.thing(label)
+        for role, player in players:
+            relation.players.append((self.type(f'{label}:{role}'), player))
+            player.relations.append(relation) if relation not in player.relations else None
+        self.relation_things.append(relation)
+        return relation
+
+    def instances(self, label, exact=False):
+        key = ('instances', label, exact)
+        if key not in self.cache:
+            self.cache[key] = [x for t in self.subtypes(label, exact) for x in self.instances_of.get(t.label.name(), [])]
+        return self.cache[key]
+
+    # QUERIES ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def parse(self, query):
+        pattern = self.patterns.get(query)
+        if pattern is None:
+            pattern = self.patterns[query] = parse_match(query)
+        return pattern
+
+    def solve(self, constraints, binding):
+        """
+        Yields every extension of the partial answer satisfying the constraints.
+        """
+        if not constraints:
+            yield binding
+            return
+        costs = [c.cost(self, binding) for c in constraints]
+        best = min(range(len(constraints)), key=costs.__getitem__)
+        if costs[best] == INFINITE:
+            raise StandInError('[TQL08] TypeQL Syntax Read: a negation has a variable bound nowhere else.')
+        rest = constraints[:best] + constraints[best + 1:]
+        for extended in constraints[best].bind(self, binding):
+            yield from self.solve(rest, extended)
+
+    def answer(self, query):
+        """
+        :param query: match (or match aggregate) query
+        :return: [ConceptMap] distinct on the variables of the answers (Numeric for a count)
+        """
+        answers = self.answers.get(query)
+        if answers is None:
+            pattern = self.parse(query)
+            rows = {}
+            last = None if pattern.limit is None else pattern.offset + pattern.limit
+            for binding in self.solve(pattern.constraints, {}):
+                concepts = {v: binding[v] for v in pattern.variables}
+                rows.setdefault(tuple(id(c) for c in concepts.values()), concepts)
+                if last is not None and len(rows) >= last:
+                    break
+            answers = [ConceptMap(c) for c in list(rows.values())[pattern.offset:last]]
+            answers = Numeric(len(answers)) if pattern.count else answers
+            self.answers[query] = answers
+        return answers
+
+
+def synthetic_world(scale=20, seed=1729):
+    """
+    Subsea field of the stand-in, always the same for a scale and a seed: manifolds (equipment) with their
+    valves, interfaces and ROV panels, connectors linked to the interfaces, tools with their components,
+    vessels with their storage, winch and wire ropes, the surface of every asset, the goals of the commands
+    and the landmark-points locating the assets. It holds the elements of the phrases of main.py, among
+    'scale' manifolds (and as many other assets of each kind).
+    :param scale: number of manifolds
+    :param seed: seed of the random choices (relations, coordinates)
+    :return: World
+    """
+    rng = random.Random(seed)
+    world = World()
+    for label in ['tag-number', 'element-type', 'name', 'description', 'command-type', 'function', 'goal-location']:
+        world.define(label, 'attribute', 'string')
+    for label in ['latitude', 'longitude', 'water-depth']:
+        world.define(label, 'attribute', 'double')
+    for label, roles in [('forming', ['form', 'formed']), ('composing', ['part', 'whole']),
+                         ('assembling', ['assembled', 'assembler']), ('linking', ['link']),
+                         ('positioning', ['positioned', 'reference']),
+                         ('locating', ['located-at', 'currently-located-at', 'location'])]:
+        world.define(label, 'relation', relates=roles)
+    world.define('asset', 'entity', abstract=True, owns=['element-type', 'description'], keys=['tag-number'],
+                 plays=['forming:formed', 'composing:part', 'composing:whole', 'assembling:assembled',
+                        'assembling:assembler', 'linking:link', 'positioning:positioned', 'positioning:reference',
+                        'locating:located-at', 'locating:currently-located-at'])
+    for label, supertype in [('equipment', 'asset'), ('valve', 'equipment'), ('rov-panel', 'equipment'),
+                             ('AHTS-vessel-winch', 'equipment'), ('vessel', 'asset'), ('storage', 'asset'),
+                             ('interface', 'asset'), ('connector', 'asset'), ('tool', 'asset'),
+                             ('component', 'asset'), ('cable', 'asset')]:
+        world.define(label, supertype, owns=['function'] if label == 'tool' else [])
+    world.define('surface', 'entity', owns=['tag-number', 'name'], plays=['forming:form'])
+    world.define('landmark-point', 'entity', owns=['latitude', 'longitude', 'water-depth'], keys=['name'],
+                 plays=['locating:location'])
+    world.define('goal', 'entity', abstract=True, owns=['name', 'command-type', 'goal-location'])
+    for label in ['valve-goal', 'mechanism-goal', 'connector-goal', 'interface-goal']:
+        world.define(label, 'goal')
+
+    landmarks = [world.entity('landmark-point', {'name': f'LMPT-{n + 1:03d}',
+                                                 'latitude': round(-22.0 - rng.random(), 6),
+                                                 'longitude': round(-40.0 - rng.random(), 6),
+                                                 'water-depth': float(rng.randint(90, 2200))})
+                 for n in range(max(4, scale))]
+
+    def asset(label, tag, element_type, attributes=None):
+        thing = world.entity(label, dict({'element-type': element_type, 'tag-number': tag,
+                                          'description': f'{element_type} {rng.randint(1, 999):03d}'},
+                                         **(attributes or {})))
+        surface = world.entity('surface', {'tag-number': tag, 'name': f'surface-of-{element_type}'})
+        world.relation('forming', [('form', surface), ('formed', thing)])
+        return thing
+
+    def part_of(part, whole):
+        world.relation('composing', [('part', part), ('whole', whole)])
+
+    def located(thing, role='located-at'):
+        world.relation('locating', [(role, thing), ('location', rng.choice(landmarks))])
+
+    manifolds = [asset('equipment', f'EQPT-MANIF-UNDF-FX-{n // 100:02d}-{n % 100 + 1:02d}', 'manifold')
+                 for n in range(scale)]
+    for m in manifolds:
+        located(m)
+
+    valves = [asset('valve', 'MECH-VALVE-TURN-UN-IN-11', 'gate-valve'),
+              asset('valve', 'MECH-VALVE-TURN-UN-HD-10', 'ball-valve')] + \
+        [asset('valve', f'MECH-VALVE-BALL-UN-FX-{n + 1:02d}', rng.choice(['gate-valve', 'ball-valve']))
+         for n in range(2 * scale)]
+    for v in valves:
+        part_of(v, rng.choice(manifolds))
+    interfaces = [asset('interface', f'INTF-VALVE-TURN-FX-{n + 1:02d}', 'interface') for n in range(3 * scale)]
+    for n, i in enumerate(interfaces):
+        part_of(i, valves[n % len(valves)])
+    panels = [asset('rov-panel', 'SUBS-ROVPN-UNDF-FX-HD-01', 'rov-panel')] + \
+        [asset('rov-panel', f'SUBS-ROVPN-UNDF-FX-{n + 2:02d}', 'rov-panel') for n in range(scale // 2)]
+    for p in panels:
+        part_of(p, rng.choice(manifolds))
+
+    plugs = [asset('interface', 'INTF-RCELE-SLID-FX-00-21', 'interface')] + \
+        [asset('interface', f'INTF-RCELE-SLID-FX-01-{n + 1:02d}', 'interface') for n in range(scale // 2)]
+    for p in plugs:
+        part_of(p, rng.choice(manifolds))
+    connectors = [asset('connector', 'CONN-ELECT-PUSH-MB-HD-01', 'electrical-connector')] + \
+        [asset('connector', f'CONN-ELECT-PUSH-FX-{n + 2:02d}', 'electrical-connector') for n in range(scale)]
+    for n, c in enumerate(connectors):
+        world.relation('linking', [('link', c), ('link', plugs[0] if n == 0 else rng.choice(plugs + interfaces))])
+        located(c, 'currently-located-at')
+
+    kinds = [('clamp', 'CLAMP', 'grab'), ('cleaning-brush', 'BRUSH', 'clean'), ('cutter', 'CUTTR', 'cut'),
+             ('torque-tool', 'TORQT', 'apply-torque-on')]
+    tools = [asset('tool', 'TOOL-CLAMP-MANU-AT-UN-03', 'clamp', {'function': 'grab'})] + \
+        [asset('tool', f'TOOL-{kinds[n % 4][1]}-MANU-FX-{n + 1:02d}', kinds[n % 4][0], {'function': kinds[n % 4][2]})
+         for n in range(max(scale, len(kinds)))]               # every kind of tool at any scale
+    for t in tools:
+        located(t, 'currently-located-at')
+    components = [asset('component', 'COMP-MECHA-CLAMP-AT-UN-03', 'mechanism')] + \
+        [asset('component', f'COMP-PARTS-MANU-FX-{n + 1:02d}', rng.choice(['mechanism', 'gear', 'spring']))
+         for n in range(2 * scale)]
+    for n, c in enumerate(components):
+        tool = tools[0] if n == 0 else rng.choice(tools)
+        part_of(c, tool)
+        world.relation('assembling', [('assembled', c), ('assembler', tool)]) if n % 2 == 0 else None
+
+    for n in range(1 + scale // 4):
+        code = '00-17' if n == 0 else f'01-{n:02d}'
+        vessel = asset('vessel', f'SHIP-VESSL-UNDF-MB-{code}', 'AHTS-vessel')
+        storage = asset('storage', f'STOR-DECKS-UNDF-MB-{code}', 'deck-storage')
+        winch = asset('AHTS-vessel-winch', f'EQPT-WINCH-AHTS-MB-{code}', 'winch')
+        located(vessel)
+        located(storage)
+        part_of(storage, vessel)
+        part_of(winch, vessel)
+        for k in range(2):
+            rope = asset('cable', f'CABL-SWROP-UNDF-MB-{code}-{k + 1}', f'steel-wire-rope{k + 1}')
+            part_of(rope, vessel)
+            world.relation('assembling', [('assembled', rope), ('assembler', winch)])
+
+    goals = [('valve-goal', 'open', ''), ('valve-goal', 'close', ''), ('mechanism-goal', 'operate', ''),
+             ('connector-goal', 'plug', 'interface'), ('connector-goal', 'unplug', 'interface'),
+             ('interface-goal', 'connect', '')]
+    for n, (label, command, goal_location) in enumerate(goals):
+        attributes = {'name': f'{label}-{n + 1:02d}', 'command-type': command}
+        attributes.update({'goal-location': goal_location} if goal_location else {})
+        world.entity(label, attributes)
+    return world
+
+
+# ━━┥ LATENCIES ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class LatencyModel:
+    """
+    Server time of the stand-in operations (ms). A match query takes a round trip plus the planning and
+    traversal of its statements (times the reasoning factor if the transaction infers) to its first answer,
+    then a time per answer and a round trip per batch of answers after the first one. A write takes a round
+    trip plus a time per statement, a commit a fixed time plus a time per write of the transaction.
+    With a recording (query_stats JSON dump of a run against a server, see instrument.py) the mean times of
+    the recorded query templates replace the model for the queries of those templates.
+    'scale' multiplies every latency (0: no latency, only the time of the Python code is measured).
+    """
+    def __init__(self, scale=1.0, round_trip=0.5, statement=0.2, answer=0.02, batch=50, reasoning=3.0,
+                 write=0.05, commit=5.0, transaction=1.0, session=10.0, recording=None):
+        self.scale = scale
+        self.round_trip = round_trip
+        self.statement = statement
+        self.answer = answer
+        self.batch = batch                                      # answers per streamed batch
+        self.reasoning = reasoning
+        self.write = write
+        self.commit = commit
+        self.transaction = transaction
+        self.session = session
+        self.recording = {}                                     # (template, infer) -> (first, total) ms
+        self.source = None
+        self.load(recording) if recording is not None else None
+
+    def load(self, path):
+        """
+        Reads the mean times per query template and inference mode of a query_stats JSON dump.
+        :param path: JSON file of QueryStats.dump
+        """
+        with open(path, encoding='utf-8') as f:
+            records = json.load(f)
+        sums = {}                                               # (template, infer) -> [first ms, rows, total ms, calls]
+        for r in records:
+            s = sums.setdefault((r['query'], bool(r['infer'])), [0.0, 0, 0.0, 0])
+            s[0] += r['first_row_ms']['total']
+            s[1] += r['first_row_ms']['count']
+            s[2] += r['total_ms']['total']
+            s[3] += r['total_ms']['count']
+        self.recording = {key: (s[0] / s[1] if s[1] else s[2] / s[3], s[2] / s[3])
+                          for key, s in sums.items() if s[3]}
+        self.source = path
+
+    def read(self, query, statements, answers, infer):
+        """
+        :return: seconds to the first answer and to the last one
+        """
+        recorded = self.recording.get((template(query), bool(infer))) if self.recording else None
+        if recorded is not None:
+            first, total = recorded
+        else:
+            first = self.round_trip + self.statement * statements * (self.reasoning if infer else 1.0)
+            total = first + self.answer * answers + self.round_trip * max(0, math.ceil(answers / self.batch) - 1)
+        return first * self.scale / 1000, total * self.scale / 1000
+
+    def write_time(self, statements):
+        return (self.round_trip + self.write * statements) * self.scale / 1000
+
+    def commit_time(self, writes):
+        return (self.commit + self.write * writes) * self.scale / 1000
+
+    def open_time(self, what):
+        """
+        :param what: 'transaction' or 'session'
+        """
+        return getattr(self, what) * self.scale / 1000
+
+    def to_dict(self):
+        return {'scale': self.scale, 'round_trip': self.round_trip, 'statement': self.statement,
+                'answer': self.answer, 'batch': self.batch, 'reasoning': self.reasoning, 'write': self.write,
+                'commit': self.commit, 'transaction': self.transaction, 'session': self.session,
+                'recording': self.source, 'recorded_templates': len(self.recording)}
+
+
+# ━━┥ CLIENT ┝━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class StandInClient:
+    """
+    In-process replacement of the TypeDB client (TypeDB.core_client) for the runs without a server: its
+    databases, sessions and transactions answer from a World and wait the latencies of a LatencyModel.
+    As the server, a query error closes the transaction. The client counts what it serves (sessions,
+    transactions, match queries, answers, writes, commits, errors), numbers that do not depend on the machine.
+    """
+    counter_names = ['sessions', 'transactions', 'matches', 'answers', 'writes', 'commits', 'errors']
+
+    def __init__(self, world, latency=None, databases=('robot_db',)):
+        self.world = world
+        self.latency = LatencyModel() if latency is None else latency
+        self.names = list(databases)
+        self.open = True
+        self.lock = threading.Lock()
+        self.counters = dict.fromkeys(self.counter_names, 0)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def reset_counters(self):
+        with self.lock:
+            self.counters = dict.fromkeys(self.counter_names, 0)
+
+    def is_open(self):
+        return self.open
+
+    def close(self):
+        self.open = False
+
+    def databases(self):
+        return StandInDatabases(self)
+
+    def session(self, db_name, session_type, options=None):
+        if db_name not in self.names:
+            raise StandInError(f"[DBS01] Database '{db_name}' does not exist.")
+        wait(time.perf_counter() + self.latency.open_time('session'))
+        self.count('sessions')
+        return StandInSession(self, db_name, session_type)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StandInDatabases:
+    def __init__(self, client):
+        self.client = client
+
+    def all(self):
+        return [StandInDatabase(self.client, name) for name in self.client.names]
+
+    def contains(self, db_name):
+        return db_name in self.client.names
+
+    def get(self, db_name):
+        if db_name not in self.client.names:
+            raise StandInError(f"[DBS01] Database '{db_name}' does not exist.")
+        return StandInDatabase(self.client, db_name)
+
+    def create(self, db_name):
+        self.client.names.append(db_name) if db_name not in self.client.names else None
+
+
+class StandInDatabase:
+    def __init__(self, client, db_name):
+        self.client = client
+        self.db_name = db_name
+
+    def name(self):
+        return self.db_name
+
+    def schema(self):
+        return self.client.world.schema()
+
+    def delete(self):
+        self.client.names.remove(self.db_name)
+
+
+class StandInSession:
+    def __init__(self, client, db_name, session_type):
+        self.client = client
+        self.db_name = db_name
+        self.session_type = session_type
+        self.open = True
+
+    def database(self):
+        return StandInDatabase(self.client, self.db_name)
+
+    def transaction(self, tx_type, options=None):
+        if not self.open:
+            raise StandInError('[SSN02] Invalid Session Operation: The session has been closed.')
+        wait(time.perf_counter() + self.client.latency.open_time('transaction'))
+        self.client.count('transactions')
+        return StandInTransaction(self, tx_type, options)
+
+    def is_open(self):
+        return self.open
+
+    def close(self):
+        self.open = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StandInTransaction:
+    def __init__(self, session, tx_type, options=None):
+        self.session = session
+        self.client = session.client
+        self.tx_type = tx_type
+        self.transaction_options = options
+        self.infer = bool(getattr(options, 'infer', False))
+        self.open = True
+        self.writes = 0
+
+    def options(self):
+        return self.transaction_options
+
+    def query(self):
+        return StandInQueries(self)
+
+    def concepts(self):
+        return StandInConcepts(self)
+
+    def check(self):
+        if not self.open or not self.session.open:
+            raise closed_error()
+
+    def abort(self, error):
+        """
+        A query error closes the transaction (the gRPC call of the transaction is stopped).
+        """
+        self.open = False
+        self.client.count('errors')
+        return error
+
+    def commit(self):
+        self.check()
+        if self.tx_type == TransactionType.READ:
+            raise self.abort(StandInError('[TXN08] Invalid Transaction Operation: READ transactions cannot be '
+                                          'committed.'))
+        wait(time.perf_counter() + self.client.latency.commit_time(self.writes))
+        self.client.count('commits')
+        self.open = False
+
+    def rollback(self):
+        self.check()
+        self.writes = 0
+
+    def is_open(self):
+        return self.open
+
+    def close(self):
+        self.open = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StandInQueries:
+    def __init__(self, transaction):
+        self.transaction = transaction
+        self.client = transaction.client
+
+    def match(self, query):
+        self.transaction.check()
+        return self.stream(query, time.perf_counter())
+
+    def stream(self, query, start):
+        """
+        Answers of a match query, each one given at the time of the latency model (the time spent by the
+        stand-in to compute them counts in it).
+        """
+        tx = self.transaction
+        try:
+            tx.check()
+            answers = self.client.world.answer(query)
+            statements = self.client.world.parse(query).size
+        except StandInError as e:
+            raise tx.abort(e) from None
+        first, total = self.client.latency.read(query, statements, len(answers), tx.infer)
+        self.client.count('matches')
+        self.client.count('answers', len(answers))
+        batch = self.client.latency.batch
+        for n, answer in enumerate(answers):
+            wait(start + first + (total - first) * n / len(answers)) if n % batch == 0 else None
+            yield answer
+        wait(start + total)
+
+    def match_aggregate(self, query):
+        self.transaction.check()
+        start = time.perf_counter()
+        try:
+            numeric = self.client.world.answer(query)
+            statements = self.client.world.parse(query).size
+        except StandInError as e:
+            raise self.transaction.abort(e) from None
+        wait(start + self.client.latency.read(query, statements, 1, self.transaction.infer)[1])
+        self.client.count('matches')
+        return numeric
+
+    def write(self, query):
+        """
+        Inserts, deletes and schema queries are timed and counted, not applied to the world.
+        """
+        tx = self.transaction
+        tx.check()
+        if tx.tx_type == TransactionType.READ:
+            raise tx.abort(StandInError('[TXN06] Invalid Transaction Operation: writes are not allowed in READ '
+                                        'transactions.'))
+        wait(time.perf_counter() + self.client.latency.write_time(len(split_top_level(query, ';'))))
+        tx.writes += 1
+        self.client.count('writes')
+
+    def insert(self, query):
+        self.write(query)
+        return iter([])
+
+    def delete(self, query):
+        self.write(query)
+
+    def update(self, query):
+        self.write(query)
+        return iter([])
+
+    def define(self, query):
+        self.write(query)
+
+    def undefine(self, query):
+        self.write(query)
+
+
+class StandInConcepts:
+    def __init__(self, transaction):
+        self.transaction = transaction
+
+    def get_thing_type(self, label):
+        self.transaction.check()
+        t = self.transaction.client.world.types.get(label)
+        return t if t is not None and t.kind != 'thing' else None
+
+
+def install(client, manager=None):
+    """
+    Makes the ConnectionManager hand out the sessions and transactions of another client (a StandInClient):
+    the warm sessions and pooled transactions of the previous one are closed, and the caches filled from it
+    (schema snapshot, type cache, value index, relation cache, location index) are dropped.
+    :param client: StandInClient
+    :param manager: ConnectionManager (the process-wide one by default)
+    :return: ConnectionManager
+    """
+    manager = connection() if manager is None else manager
+    with manager.lock:
+        manager.close()
+        manager.client = client
+    with snapshots_lock:
+        snapshots.clear()
+    type_cache.invalidate()
+    value_index.invalidate()
+    relation_cache.bump()
+    location_service.invalidate()
+    return manager
@@ -0,0 +1,282 @@
+"""
+                    Project MOSASAUR - sync.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Data synchronization file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typedb.client import TransactionType
+from project.robot_db.python.typeDB_main.auxiliary import csv_header, csv_rows, determine_data_type, find_type
+from project.robot_db.python.typeDB_main.color_text import Color, Box
+from project.robot_db.python.typeDB_main.loader import to_datetime, compile_converter
+from project.robot_db.python.typeDB_main.cache import type_cache, value_index, relation_cache
+from project.robot_db.python.typeDB_main.instrument import match_rows
+from collections import Counter
+import datetime
+
+color = Color()
+box = Box()
+
+
+def cell_literal(column, v):
+    """
+    :return: TypeQL literal of a cell, as written by query_builder
+    """
+    return literal(column.key, v, column.convert)
+
+
+def literal(label, v, convert=None):
+    """
+    :return: TypeQL literal of a value of an attribute, with its converter (compiled from the value type of
+             the schema cache when None - the type is only guessed for an attribute missing from the cache)
+    """
+    convert = compile_converter(label, type_cache.value_type(label)) if convert is None else convert
+    if convert is not None:
+        return convert(v)
+    data_type = determine_data_type(v)
+    return f'"{v}"' if data_type == 'string' else str(data_type)
+
+
+def value_literal(value):
+    """
+    :return: TypeQL literal of an attribute value read from the database (same format as the converters)
+    """
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, datetime.datetime):
+        return to_datetime(value.isoformat())
+    return f'"{value}"'
+
+
+class DataSync:
+    """
+    Incremental mode of DataHandling.update_data: each data file is compared with the database and only
+    the differences are written, instead of unloading and loading the whole knowledge base again.
+    Entity rows are keyed on their tag-number: new tags are inserted (same queries as load_data),
+    missing tags are deleted and the plain attribute columns of the other rows are updated in place.
+    The rows with a 'concept-key : attribute' cell are not compared: entity_queries turns them into an
+    insert of the concept of the cell, which has no tag-number of the file type to be matched on.
+    Relation rows are keyed on their roles and the values of their players (the file attributes of an
+    entity player, the value of an attribute player): the relations of the file type stored in the
+    database are read with two queries, each row is paired with a stored relation having the same roles
+    and player values, the unpaired rows are inserted and the unpaired relations deleted. A row with an
+    empty 'concept : ' cell is inserted once per instance of the concept, so it is paired with every
+    stored relation having its roles and the values of its other cells.
+    """
+    def __init__(self, datahandling, db_name, commitment=False, verbose=True):
+        self.datahandling = datahandling
+        self.db_name = db_name
+        self.commitment = commitment
+        self.verbose = verbose
+        self.connection = datahandling.connection
+
+    def sync_file(self, i, concept_type):
+        """
+        :param i: file dictionary {"data_path": path without extension}
+        :param concept_type: 'entity' or 'relation'
+        :return: dictionary with the number of inserted, updated and deleted rows
+        """
+        thing = i["data_path"].split("/")[-1]
+        header = csv_header(i)
+        rows = list(csv_rows(i))
+        entries = []
+        with self.connection.transaction(self.db_name, self.datahandling.session_type,
+                                         TransactionType.WRITE) as transaction:
+            plan = self.datahandling.column_plan(transaction, header, concept_type)
+            if concept_type == 'entity':
+                counts = self.sync_entities(transaction, thing, rows, plan, entries)
+            else:
+                counts = self.sync_relations(transaction, thing, rows, plan)
+            transaction.commit() if self.commitment else None
+        if self.commitment:
+            if counts['updated'] or counts['deleted']:
+                value_index.invalidate()
+            else:
+                value_index.add_all(entries)
+            relation_cache.bump()
+        print(box.l_cyan(f'{thing} > ({counts["inserted"]}) inserted, ({counts["updated"]}) updated',
+                         f'({counts["deleted"]}) deleted'))
+        return counts
+
+    def sync_entities(self, transaction, thing, rows, plan, entries):
+        counts = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        if plan.tag_column is None:
+            print(color.red(f' {thing}: no tag-number column - file skipped'))
+            return counts
+
+        # Attributes of every entity of the file, in one query
+        stored = {}                                             # tag -> {attribute: [literals]}
+        query = f'match $e isa! {thing}, has tag-number $t, has $a; get $t, $a;'
+        for cmap in match_rows(transaction, query):
+            tag = str(cmap.get('t').as_attribute().get_value())
+            attribute = cmap.get('a').as_attribute()
+            label = attribute.get_type().get_label().name()
+            stored.setdefault(tag, {}).setdefault(label, []).append(value_literal(attribute.get_value()))
+
+        concept_rows = [values for values in rows if self.concept_cell(plan, values)]
+        skipped = {plan.tag_column.value(values) for values in concept_rows}
+        rows = [values for values in rows if not self.concept_cell(plan, values)]
+        print(color.red(f' {thing}: ({len(concept_rows)}) rows with a concept-key cell - not compared')) \
+            if concept_rows else None
+        tags = [plan.tag_column.value(values) for values in rows]
+        new_rows = [values for tag, values in zip(tags, rows) if tag not in stored]
+        for row in self.datahandling.row_queries(transaction, 'entity', thing, new_rows, plan, self.verbose, entries):
+            for q in row:
+                transaction.query().insert(q)
+            counts['inserted'] += 1
+
+        for tag, values in zip(tags, rows):
+            if tag not in stored:
+                continue
+            changed = False
+            for column in plan.columns:
+                a_value = column.value(values)
+                if column is plan.tag_column or (":" in a_value and not column.temporal):
+                    continue
+                literal = cell_literal(column, a_value)
+                if stored[tag].get(column.key) == [literal]:
+                    continue
+                match_e = f'match $e isa! {thing}, has tag-number "{tag}"'
+                if column.key in stored[tag]:
+                    self.write(transaction.query().delete, f'{match_e}, has {column.key} $a; delete $e has $a;')
+                self.write(transaction.query().insert, f'{match_e}; insert $e has {column.key} {literal};')
+                changed = True
+            counts['updated'] += 1 if changed else 0
+
+        for tag in set(stored) - set(tags) - skipped:
+            self.write(transaction.query().delete, f'match $e isa! {thing}, has tag-number "{tag}"; '
+                                                   f'delete $e isa {thing};')
+            self.write(transaction.query().delete, f'match $s isa surface, has tag-number "{tag}"; '
+                                                   f'delete $s isa surface;') if thing != 'surface' else None
+            counts['deleted'] += 1
+        return counts
+
+    @staticmethod
+    def concept_cell(plan, values):
+        """
+        :return: True if a cell of the entity row is a 'concept-key : value' cell (see entity_queries)
+        """
+        return any(":" in column.value(values) and not column.temporal for column in plan.columns)
+
+    def sync_relations(self, transaction, thing, rows, plan):
+        counts = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        attributes = sorted({a for column in plan.columns for a in column.attributes})
+        if not attributes:
+            print(color.red(f' {thing}: no role player attribute column - file skipped'))
+            return counts
+        stored = self.stored_relations(transaction, thing, attributes)
+        index = {}                                              # (role, attribute, literal) -> {relation iids}
+        for iid, (roles, keys) in stored.items():
+            for key in keys:
+                index.setdefault(key, set()).add(iid)
+
+        paired = set()
+        new_rows = []
+        for values in rows:
+            roles, keys, empty = self.row_key(transaction, plan, values)
+            candidates = set.intersection(*(index.get(key, set()) for key in keys)) if keys else set(stored)
+            matches = [iid for iid in sorted(candidates) if iid not in paired and stored[iid][0] == roles]
+            if not matches:
+                new_rows.append(values)
+            paired.update(matches if empty else matches[:1])
+        for row in self.datahandling.row_queries(transaction, 'relation', thing, new_rows, plan, False):
+            print(f'{color.cyan(row[0])}') if self.verbose else None
+            transaction.query().insert(row[0])
+            counts['inserted'] += 1
+
+        removed = [iid for iid in stored if iid not in paired]
+        if removed:                                             # every removed relation in one delete query
+            disjunction = ' or '.join(f'{{$rel iid {iid};}}' for iid in removed)
+            self.write(transaction.query().delete, f'match $rel isa! {thing}; {disjunction}; '
+                                                   f'delete $rel isa {thing};')
+            counts['deleted'] = len(removed)
+        return counts
+
+    @staticmethod
+    def stored_relations(transaction, thing, attributes):
+        """
+        Reads every relation of exactly the file type with its role players (any thing), then the values of
+        the file attributes owned by these players.
+        :return: relation iid -> (Counter of the roles of its players, set of (role, attribute, literal))
+        """
+        query = f'match $rel isa! {thing}; $rel($role: $p); not {{$role type relation:role;}}; ' \
+                f'get $rel, $role, $p;'
+        players = {}                                            # iid -> {(role, player iid)}
+        keys = {}                                               # iid -> {(role, attribute, literal)}
+        for cmap in match_rows(transaction, query):
+            iid = cmap.get('rel').get_iid()
+            role = cmap.get('role').get_label().name()
+            player = cmap.get('p')
+            players.setdefault(iid, set()).add((role, player.get_iid()))
+            keys.setdefault(iid, set())
+            if player.is_attribute():                           # attribute player - keyed on its own value
+                attribute = player.as_attribute()
+                keys[iid].add((role, attribute.get_type().get_label().name(), value_literal(attribute.get_value())))
+
+        filters = ' or '.join(f'{{$a isa {a};}}' for a in attributes) if len(attributes) > 1 else \
+            f'$a isa {attributes[0]}'
+        query = f'match $rel isa! {thing}; $rel($p); $p has $a; {filters}; get $p, $a;'
+        owned = {}                                              # player iid -> {(attribute, literal)}
+        for cmap in match_rows(transaction, query):
+            attribute = cmap.get('a').as_attribute()
+            owned.setdefault(cmap.get('p').get_iid(), set()).add((attribute.get_type().get_label().name(),
+                                                                  value_literal(attribute.get_value())))
+        for iid, pairs in players.items():
+            keys[iid].update((role, a, v) for role, p in pairs for a, v in owned.get(p, ()))
+        return {iid: (Counter(role for role, _ in players[iid]), keys[iid]) for iid in players}
+
+    @staticmethod
+    def row_key(transaction, plan, values):
+        """
+        Keys a relation row like relation_queries inserts it: an entity player by the values of the file
+        attributes of its cell (the '-' parts of a multiple attribute cell are left out), an attribute
+        player by its own value, and the player of an empty 'concept : ' cell by its role only.
+        :return: Counter of the roles of the row, set of (role, attribute, literal) of its players and
+                 True if a cell is empty
+        """
+        roles = Counter()
+        keys = set()
+        empty = False
+        for column in plan.columns:
+            cell = column.value(values)
+            if ' : ' not in cell:
+                continue
+            roles[column.role] += 1
+            concept, a_value = cell.split(' : ')[0], cell.split(' : ')[1]
+            if not a_value:
+                empty = True
+                continue
+            if find_type(transaction, concept).split(':')[0] != 'entity' and not (column.multi and '|' in a_value):
+                keys.add((column.role, concept, literal(concept, a_value, plan.converter(concept))))
+                continue
+            parts = a_value.split(' | ') if column.multi else [a_value]
+            for a, convert, v in zip(column.attributes, column.converters, parts):
+                keys.add((column.role, a, literal(a, v, convert))) if v != '-' else None
+        return roles, keys, empty
+
+    def write(self, function, query):
+        print(f'{color.c4(query)}') if self.verbose else None
+        return function(query)
@@ -0,0 +1,241 @@
+"""
+                    Project MOSASAUR - telemetry.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Query telemetry file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typedb.client import SessionType, TypeDBOptions, TransactionType
+from project.robot_db.python.typeDB_main.color_text import Color, Box
+from functools import wraps
+import threading
+import time
+
+color = Color()
+box = Box()
+
+_options = {}
+_options_lock = threading.Lock()
+
+
+def reasoning_options(infer=False, explain=False):
+    """
+    :return: TypeDBOptions of a READ transaction with the given reasoning (explain implies infer). The
+             same object is returned for the same arguments, so the transactions of the query sites
+             are drawn from one pool per reasoning mode (see ConnectionManager.transaction)
+    """
+    key = (bool(infer or explain), bool(explain))
+    with _options_lock:
+        options = _options.get(key)
+        if options is None:
+            options = TypeDBOptions.core()
+            options.infer, options.explain = key
+            _options[key] = options
+        return options
+
+
+class QuerySite:
+    """
+    Statistics of one query site: the calls in its declared reasoning mode and, in audit mode, the
+    same calls run again with the inference switched (see QuerySites.start_audit).
+    """
+    def __init__(self, name, infer=False, explain=False, audit=True):
+        self.name = name
+        self.infer = infer or explain
+        self.explain = explain
+        self.audit = audit                                      # False for cache wrappers of other sites
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.errors = 0
+        self.audits = 0
+        self.audit_seconds = 0.0                                # declared mode, audited calls only
+        self.other_seconds = 0.0                                # the same calls with the inference switched
+        self.differences = 0                                    # audited calls with a different answer
+
+    @property
+    def options(self):
+        return reasoning_options(self.infer, self.explain)
+
+    @property
+    def mode(self):
+        return 'explain' if self.explain else 'infer' if self.infer else 'no inference'
+
+    def record(self, seconds, error=False):
+        with self.lock:
+            self.calls += 1
+            self.seconds += seconds
+            self.errors += 1 if error else 0
+
+    def record_audit(self, seconds, other_seconds, same):
+        with self.lock:
+            self.audits += 1
+            self.audit_seconds += seconds
+            self.other_seconds += other_seconds
+            self.differences += 0 if same else 1
+
+    def reasoning_cost(self):
+        """
+        :return: mean time (ms) added by the inference to an audited call (None before any audit)
+        """
+        if not self.audits:
+            return None
+        on, off = (self.audit_seconds, self.other_seconds) if self.infer else (self.other_seconds, self.audit_seconds)
+        return (on - off) / self.audits * 1000
+
+    def to_dict(self):
+        return {'site': self.name, 'mode': self.mode, 'calls': self.calls, 'errors': self.errors,
+                'total': self.seconds * 1000, 'mean': self.seconds / self.calls * 1000 if self.calls else None,
+                'audits': self.audits, 'reasoning_cost': self.reasoning_cost(),
+                'differences': self.differences}
+
+
+class QuerySites:
+    """
+    Registry of the query sites (see query_site). Each site declares whether its queries need the
+    inference or the explanations, and the callers draw its transactions from the matching option pool
+    (options), so only the questions that depend on the rules pay for the reasoner.
+    In audit mode every call of a site is run a second time, on a transaction of the other inference
+    mode, to measure the reasoning cost of the site and to check its declaration: a site declared without
+    inference that answers differently with it (or a site declared with inference that never does)
+    shows in the differences of report. The answers are compared as served, after the in-memory caches.
+    """
+    def __init__(self):
+        self.sites = {}                                         # name -> QuerySite
+        self.lock = threading.Lock()
+        self.auditor = None                                     # function(options) -> transaction context
+        self.local = threading.local()
+
+    def register(self, name, infer=False, explain=False, audit=True):
+        with self.lock:
+            site = self.sites.get(name)
+            if site is None:
+                site = self.sites[name] = QuerySite(name, infer, explain, audit)
+            return site
+
+    @staticmethod
+    def site(function):
+        return getattr(function, 'query_site', None)
+
+    def options(self, function, default=None):
+        """
+        :param function: query site (decorated by query_site), or None
+        :param default: options if the function is not a query site
+        :return: TypeDBOptions the transaction of the function needs
+        """
+        site = self.site(function)
+        return default if site is None else site.options
+
+    def start_audit(self, connection, db_name, session_type=SessionType.DATA):
+        """
+        Runs every following call of a query site a second time with the inference switched.
+        :param connection: ConnectionManager of the audit transactions
+        """
+        self.auditor = lambda options: connection.transaction(db_name, session_type, TransactionType.READ, options)
+
+    def stop_audit(self):
+        self.auditor = None
+
+    def auditing(self):
+        return getattr(self.local, 'auditing', False)
+
+    def call(self, site, function, tx, args, kwargs):
+        if self.auditing():                                     # inner site of an audit run - not recorded
+            return function(tx, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = function(tx, *args, **kwargs)
+        except BaseException:
+            site.record(time.perf_counter() - start, error=True)
+            raise
+        seconds = time.perf_counter() - start
+        site.record(seconds)
+        auditor = self.auditor
+        if auditor is not None and site.audit:
+            self.compare(site, auditor, function, args, kwargs, result, seconds)
+        return result
+
+    def compare(self, site, auditor, function, args, kwargs, result, seconds):
+        self.local.auditing = True
+        try:
+            with auditor(reasoning_options(infer=not site.infer)) as other_tx:
+                start = time.perf_counter()
+                other = function(other_tx, *args, **kwargs)
+                other_seconds = time.perf_counter() - start
+        except Exception:
+            return                                              # nothing to compare with
+        finally:
+            self.local.auditing = False
+        site.record_audit(seconds, other_seconds, other == result)
+
+    def reset(self):
+        for site in list(self.sites.values()):
+            with site.lock:
+                site.clear()
+
+    def report(self, verbose=True):
+        """
+        :return: [QuerySite.to_dict] of the sites called so far, the most expensive first
+        """
+        sites = sorted((s for s in self.sites.values() if s.calls), key=lambda s: s.seconds, reverse=True)
+        report = [s.to_dict() for s in sites]
+        if verbose:
+            print(color.cyan('\n' + "━" * 175 + '\n'))
+            for r in report:
+                line = f'{r["total"]:10.2f} ms ▶ {r["site"]} ({r["mode"]}) | calls: {r["calls"]} | ' \
+                       f'mean: {r["mean"]:.2f} ms'
+                if r['audits']:
+                    line += f' | reasoning cost: {r["reasoning_cost"]:+.2f} ms/call | ' \
+                            f'different answers: {r["differences"]}/{r["audits"]}'
+                print(color.e1(line) if r['errors'] else color.c3(line))
+            audited = [r for r in report if r['audits']]
+            if audited:
+                needless = [r['site'] for r in audited if r['mode'] != 'no inference' and not r['differences']]
+                missing = [r['site'] for r in audited if r['mode'] == 'no inference' and r['differences']]
+                print(box.c4(f'REASONING > same answers without inference: {", ".join(needless) or "-"}',
+                             f'different answers with inference: {", ".join(missing) or "-"}', 0))
+        return report
+
+
+query_sites = QuerySites()
+
+
+def query_site(infer=False, explain=False, audit=True):
+    """
+    Declares a function of a transaction, function(tx, *args), as a query site of query_sites.
+    :param infer: the queries of the site need the inference (rules)
+    :param explain: the site uses the explanations of the inferred answers (implies infer)
+    :param audit: the site is rerun in audit mode (False for a cache wrapper of another site)
+    """
+    def decorator(function):
+        site = query_sites.register(function.__name__, infer, explain, audit)
+
+        @wraps(function)
+        def wrapper(tx, *args, **kwargs):
+            return query_sites.call(site, function, tx, args, kwargs)
+
+        wrapper.query_site = site
+        return wrapper
+    return decorator
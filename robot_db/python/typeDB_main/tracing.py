@@ -0,0 +1,213 @@
+"""
+                    Project MOSASAUR - tracing.py
+
+[MO]del-based [S]ystem [A]pplied to [S]ubsea [AU]tonomous [R]obotics
+
+Tracing file for the Situation Awareness Model (SAM) prototype applied
+to Robotic Underwater Autonomy. This code is part of the author's
+PhD research project conducted at Polytechnique Montreal University
+and funded by Petróleo Brasileiro S.A. - PETROBRAS.
+
+        Copyright (C) 2023  Carlos Eduardo Maia de Souza
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from contextlib import nullcontext
+from functools import wraps
+import threading
+import cProfile
+import atexit
+import json
+import time
+import os
+
+NO_SPAN = nullcontext()
+
+
+class Span:
+    """
+    One timed section of a Tracer, recorded as a complete event ('X') when it ends.
+    """
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start', 'profiled')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+        self.profiled = False
+
+    def __enter__(self):
+        self.profiled = self.name == self.tracer.profiled and self.tracer.profile_start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        self.tracer.profile_stop() if self.profiled else None
+        if self.tracer.enabled:
+            self.args.update({'error': exc_type.__name__}) if exc_type is not None else None
+            self.tracer.add(self.name, self.category, self.start, end, self.args)
+        return False
+
+
+class Tracer:
+    """
+    Nested spans of the phases of the situation awareness procedure (see QueryModel.command_line), kept in
+    memory and written in the Chrome trace event format (a JSON object with 'traceEvents'), which flame-chart
+    viewers read as is: chrome://tracing, ui.perfetto.dev or speedscope. Every thread has its own track, so
+    the questions answered in parallel (concurrent mode) show under their worker thread.
+    Switched on with the environment variable MOSASAUR_TRACE=<path> (the trace is written at exit), or with
+    start(path). While it is off a span costs one function call.
+    MOSASAUR_PROFILE=<span name> runs cProfile during every span of that name (traced or not), and writes
+    the accumulated statistics at exit to MOSASAUR_PROFILE_OUT (default '<span name>.prof', read with pstats
+    or snakeviz). Only one thread is profiled at a time: the spans of that name entered on other threads
+    meanwhile are not profiled.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.events = []
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.origin = time.perf_counter()
+        self.threads = set()                                    # thread idents with a name event
+        self.profiled = None                                    # span name profiled by cProfile
+        self.profiler = None
+        self.profile_path = None
+        self.profile_owner = None                               # thread running the profiler
+        self.profile_depth = 0
+
+    def start(self, path=None):
+        """
+        :param path: file of the trace written at exit (None to save it explicitly with save)
+        """
+        if path is not None and self.path is None:
+            atexit.register(self.save)
+        self.path = path if path is not None else self.path
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def span(self, name, category='phase', **args):
+        """
+        :param name: name of the span (phase)
+        :param category: category of the span ('phase', 'question', ...)
+        :param args: values shown with the span in the viewer
+        :return: context manager of the span
+        """
+        if not self.enabled and name != self.profiled:
+            return NO_SPAN
+        return Span(self, name, category, args)
+
+    def add(self, name, category, start, end, args):
+        tid = threading.get_ident()
+        event = {'name': name, 'cat': category, 'ph': 'X', 'pid': self.pid, 'tid': tid,
+                 'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6, 'args': args}
+        with self.lock:
+            if tid not in self.threads:
+                self.threads.add(tid)
+                self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid,
+                                    'args': {'name': threading.current_thread().name}})
+            self.events.append(event)
+
+    def to_dict(self):
+        with self.lock:
+            return {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+
+    def save(self, path=None):
+        """
+        :param path: trace file (default: the path given to start)
+        """
+        path = self.path if path is None else path
+        if path is None:
+            return
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+    def reset(self):
+        with self.lock:
+            self.events = []
+            self.threads = set()
+
+    def summary(self):
+        """
+        :return: {span name: [count, total (ms), max (ms)]} of the recorded spans, the longest total first
+        """
+        totals = {}
+        for event in self.to_dict()['traceEvents']:
+            if event['ph'] == 'X':
+                t = totals.setdefault(event['name'], [0, 0.0, 0.0])
+                t[0] += 1
+                t[1] += event['dur'] / 1000
+                t[2] = max(t[2], event['dur'] / 1000)
+        return dict(sorted(totals.items(), key=lambda item: item[1][1], reverse=True))
+
+    def profile(self, name, path=None):
+        """
+        Profiles every following span of the given name with cProfile (see the class description).
+        """
+        if self.profiler is None:
+            atexit.register(self.save_profile)
+        self.profiled = name
+        self.profile_path = path if path else f'{name}.prof'
+        self.profiler = cProfile.Profile()
+
+    def profile_start(self):
+        tid = threading.get_ident()
+        with self.lock:
+            if self.profile_owner not in (None, tid):
+                return False
+            if not self.profile_depth:
+                try:
+                    self.profiler.enable()
+                except ValueError:                              # another profiler is active
+                    return False
+            self.profile_owner = tid
+            self.profile_depth += 1                             # > 1 for nested spans of the same name
+            return True
+
+    def profile_stop(self):
+        with self.lock:
+            self.profile_depth -= 1
+            if not self.profile_depth:
+                self.profiler.disable()
+                self.profile_owner = None
+
+    def save_profile(self):
+        self.profiler.dump_stats(self.profile_path) if self.profiler is not None else None
+
+
+tracer = Tracer()
+tracer.start(os.environ['MOSASAUR_TRACE']) if os.environ.get('MOSASAUR_TRACE') else None
+tracer.profile(os.environ['MOSASAUR_PROFILE'], os.environ.get('MOSASAUR_PROFILE_OUT')) \
+    if os.environ.get('MOSASAUR_PROFILE') else None
+
+
+def traced(name=None, category='phase'):
+    """
+    Runs every call of the decorated function in a span of the tracer (named after the function by default).
+    """
+    def decorator(function):
+        label = function.__name__ if name is None else name
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with tracer.span(label, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
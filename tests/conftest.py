@@ -0,0 +1,33 @@
+"""
+Fixtures of the tests: the repository is imported as the 'project' package (as main.py does from its parent
+folder) and the TypeDB client is replaced by a StandInClient (see standin.py), so no server is needed.
+"""
+
+import types
+import sys
+import os
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if 'project' not in sys.modules:
+    project = types.ModuleType('project')
+    project.__path__ = [root]
+    sys.modules['project'] = project
+
+from project.robot_db.python.typeDB_main import client_standin     # typedb.client without typedb-client
+from project.robot_db.python.typeDB_main.standin import StandInClient, LatencyModel, synthetic_world, install
+from project.robot_db.python.typeDB_main import snapshot
+import pytest
+
+
+@pytest.fixture
+def stand_in(tmp_path, monkeypatch):
+    """
+    :return: factory installing a StandInClient over a world (synthetic_world(2) by default), without latencies
+    """
+    monkeypatch.setattr(snapshot, 'snapshot_folder', str(tmp_path / 'cache'))
+
+    def factory(world=None):
+        client = StandInClient(synthetic_world(2) if world is None else world, LatencyModel(scale=0))
+        install(client)
+        return client
+    return factory
@@ -0,0 +1,26 @@
+from project.robot_db.python.typeDB_main.batch import BatchRunner, percentile
+import pytest
+
+
+@pytest.mark.parametrize('p, expected', [(0, 1), (10, 1), (11, 2), (50, 5), (90, 9), (95, 10), (100, 10)])
+def test_nearest_rank_percentile(p, expected):
+    assert percentile(list(range(1, 11)), p) == expected
+
+
+def test_percentile_of_no_values():
+    assert percentile([], 50) is None
+
+
+def test_headless_reports_in_phrase_order(stand_in):
+    stand_in()
+    phrases = ['open valve MECH-VALVE-TURN-UN-IN-11', 'open zorglub X', 'open valve MECH-VALVE-TURN-UN-IN-11']
+    runner = BatchRunner(workers=3)
+    report = runner.run(phrases)
+    assert report['phrases'] == 3 and report['errors'] == 1
+    assert [r.phrase if r is not None else None for r in runner.reports] == [phrases[0], None, phrases[2]]
+    assert runner.reports[0] is not runner.reports[2]
+
+
+def test_interactive_batch_runs_on_one_worker():
+    with pytest.raises(ValueError):
+        BatchRunner(query_model=object(), workers=2, headless=False)
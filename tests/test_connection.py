@@ -0,0 +1,24 @@
+from typedb.client import SessionType, TransactionType
+from project.robot_db.python.typeDB_main.connection import connection
+
+
+def test_read_transaction_is_pooled(stand_in):
+    stand_in()
+    manager = connection()
+    with manager.transaction('robot_db') as first:
+        pass
+    with manager.transaction('robot_db') as second:
+        assert second is first
+
+
+def test_read_transaction_opened_before_a_write_is_not_pooled(stand_in):
+    client = stand_in()
+    manager = connection()
+    with manager.transaction('robot_db') as old:
+        with manager.transaction('robot_db', SessionType.DATA, TransactionType.WRITE) as tx:
+            tx.commit()
+    assert not old.is_open()
+    opened = client.counters['transactions']
+    with manager.transaction('robot_db') as tx:
+        assert tx is not old
+    assert client.counters['transactions'] == opened + 1
@@ -0,0 +1,24 @@
+from project.robot_db.python.typeDB_main.inquirer import QueryModel
+from project.robot_db.python.typeDB_main.auxiliary import PhraseError
+import pytest
+
+
+@pytest.mark.parametrize('phrase', ['open zorglub MECH-VALVE-TURN-UN-IN-11',
+                                    'plug connector CONN-ELECT-PUSH-MB-HD-01 AT zorglub INTF-RCELE-SLID-FX-00-21'])
+def test_unknown_word_raises_phrase_error_without_output(stand_in, capsys, phrase):
+    stand_in()
+    query_model = QueryModel()
+    capsys.readouterr()
+    with pytest.raises(PhraseError, match='unknown word zorglub'):
+        query_model.situation_report(phrase)
+    assert capsys.readouterr().out == ''
+
+
+def test_assess_without_command(stand_in):
+    stand_in()
+    query_model = QueryModel()
+    d_phrase = query_model.valid_input_phrase('open valve MECH-VALVE-TURN-UN-IN-11', interactive=False)
+    del d_phrase['command']
+    report = query_model.assess('valve MECH-VALVE-TURN-UN-IN-11', d_phrase, interactive=False)
+    assert report.command == 0
+    assert [e.element for e in report.elements] == ['valve']
@@ -0,0 +1,28 @@
+from typedb.client import SessionType, TransactionType
+from project.robot_db.python.typeDB_main.location import location_service
+from project.robot_db.python.typeDB_main.inquirer import QueryModel
+from project.robot_db.python.typeDB_main.connection import connection
+from project.robot_db.python.typeDB_main.telemetry import reasoning_options
+import pytest
+
+
+def test_index_is_loaded_with_inference(stand_in, monkeypatch):
+    stand_in()
+    load = location_service.load
+    reasoning = []
+    monkeypatch.setattr(location_service, 'load', lambda tx: reasoning.append(tx.infer) or load(tx))
+    with connection().transaction('robot_db', SessionType.DATA, TransactionType.READ,
+                                  reasoning_options(infer=False)) as tx:
+        assert location_service.ensure(tx)
+    assert reasoning == [True]
+
+
+@pytest.mark.parametrize('phrase', ['clean surface OF rov-panel SUBS-ROVPN-UNDF-FX-HD-01',
+                                    'plug connector CONN-ELECT-PUSH-MB-HD-01 AT interface INTF-RCELE-SLID-FX-00-21'])
+def test_location_answers_do_not_depend_on_the_position(stand_in, phrase):
+    answers = []
+    for position in [(-22.5, -40.5, 1200.0), None]:                 # the position first: tool ranking loads the index
+        stand_in()
+        report = QueryModel().situation_report(phrase, position=position)
+        answers.append((report.target, report.target_location, report.common_elements, report.to_dict()['relations']))
+    assert answers[0] == answers[1]
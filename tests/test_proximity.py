@@ -0,0 +1,20 @@
+from project.robot_db.python.typeDB_main import proximity
+from project.robot_db.python.typeDB_main.proximity import ProximityIndex
+from project.robot_db.python.typeDB_main.connection import connection
+import pytest
+
+pytest.importorskip('numpy')
+
+
+@pytest.mark.parametrize('filters', [{}, {'x_type': 'tool'}, {'x_type': 'tool', 'function': 'clean'},
+                                     {'tag_prefix': 'EQPT-MANIF'}, {'radius': 60000.0}])
+@pytest.mark.parametrize('depth', [None, 1200.0])
+def test_numpy_and_fallback_rankings_are_equal(stand_in, monkeypatch, filters, depth):
+    stand_in()
+    with connection().transaction('robot_db') as tx:
+        vectorized = ProximityIndex().nearest(tx, -22.5, -40.5, depth, limit=5, **filters)
+        monkeypatch.setattr(proximity, 'np', None)
+        fallback = ProximityIndex().nearest(tx, -22.5, -40.5, depth, limit=5, **filters)
+    assert vectorized
+    assert [row[1:] for row in vectorized] == [row[1:] for row in fallback]
+    assert [row[0] for row in vectorized] == pytest.approx([row[0] for row in fallback])
@@ -0,0 +1,64 @@
+from project.robot_db.python.typeDB_main.builder import BuildModel
+from project.robot_db.python.typeDB_main.standin import World
+import pytest
+
+files = {'entity_data/pump.csv': 'tag-number\nP-1\nP-2\n',
+         'entity_data/skid.csv': 'tag-number\nS-1\n',
+         'relation_data/rating.csv': 'rated : tag-number, value : rated-weight\npump : P-1, rated-weight : 1.0\n',
+         'relation_data/grouping.csv': 'member : tag-number, group : tag-number\npump : , skid : S-1\n'}
+
+
+def pump_world():
+    """
+    Things of the data files: a relation with an attribute player (a double written '1.0' in the file) and
+    the relations of a row with an empty 'pump : ' cell (one per pump).
+    """
+    world = World()
+    world.define('rating', 'relation', relates=['rated', 'value'])
+    world.define('grouping', 'relation', relates=['member', 'group'])
+    world.define('tag-number', 'attribute', 'string')
+    world.define('rated-weight', 'attribute', 'double', plays=['rating:value'])
+    world.define('pump', 'entity', keys=['tag-number'], plays=['rating:rated', 'grouping:member'])
+    world.define('skid', 'entity', keys=['tag-number'], plays=['grouping:group'])
+    pumps = [world.entity('pump', {'tag-number': tag}) for tag in ['P-1', 'P-2']]
+    skid = world.entity('skid', {'tag-number': 'S-1'})
+    world.relation('rating', [('rated', pumps[0]), ('value', world.attribute('rated-weight', 1.0))])
+    for pump in pumps:
+        world.relation('grouping', [('member', pump), ('group', skid)])
+    return world
+
+
+@pytest.fixture
+def datahandling(stand_in, tmp_path):
+    def factory(data=None):
+        for name, text in dict(files, **(data or {})).items():
+            path = tmp_path / 'data' / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+        client = stand_in(pump_world())
+        handling = BuildModel.DataHandling()
+        handling.data_folder = str(tmp_path / 'data')
+        return client, handling
+    return factory
+
+
+def test_sync_of_unchanged_files_writes_nothing(datahandling):
+    client, handling = datahandling()
+    for concept_type in ['entity', 'relation']:
+        totals = handling.update_data('robot_db', concept_type, commitment=True, verbose=False)
+        assert totals == {'inserted': 0, 'updated': 0, 'deleted': 0}
+    assert client.counters['writes'] == 0
+
+
+def test_sync_deletes_the_relations_of_a_removed_row(datahandling):
+    client, handling = datahandling({'relation_data/grouping.csv': 'member : tag-number, group : tag-number\n'})
+    totals = handling.update_data('robot_db', 'relation', commitment=True, verbose=False)
+    assert totals == {'inserted': 0, 'updated': 0, 'deleted': 2}
+    assert client.counters['writes'] == 1                       # one delete query for both relations
+
+
+def test_sync_inserts_a_changed_attribute_player(datahandling):
+    client, handling = datahandling({'relation_data/rating.csv': 'rated : tag-number, value : rated-weight\n'
+                                                                 'pump : P-1, rated-weight : 1.5\n'})
+    totals = handling.update_data('robot_db', 'relation', commitment=True, verbose=False)
+    assert totals == {'inserted': 1, 'updated': 0, 'deleted': 1}